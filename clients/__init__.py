@@ -0,0 +1,3 @@
+"""
+Shared clients for upstream services (Telegram Bot API, OpenAI, Dexscreener, RPC)
+"""
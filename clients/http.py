@@ -0,0 +1,70 @@
+import logging
+import threading
+from typing import Dict
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from web3 import Web3
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TIMEOUT = 10.0
+DEFAULT_POOL_SIZE = 10
+
+class TimeoutSession(requests.Session):
+    """requests.Session with a default timeout and a bounded keep-alive pool"""
+
+    def __init__(self, timeout: float = DEFAULT_TIMEOUT, pool_size: int = DEFAULT_POOL_SIZE):
+        super().__init__()
+        self.timeout = timeout
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, **kwargs)
+
+_lock = threading.Lock()
+_sessions: Dict[str, TimeoutSession] = {}  # upstream name -> session
+_web3: Dict[str, Web3] = {}  # provider url -> client
+
+def get_session(name: str, timeout: float = DEFAULT_TIMEOUT, pool_size: int = DEFAULT_POOL_SIZE) -> TimeoutSession:
+    """Get the pooled session of an upstream, created on first use
+
+    Sessions are shared by all threads; settings of the first call win.
+    """
+    with _lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = TimeoutSession(timeout=timeout, pool_size=pool_size)
+            _sessions[name] = session
+        return session
+
+def get_web3(provider_url: str, timeout: float = 30.0, pool_size: int = DEFAULT_POOL_SIZE) -> Web3:
+    """Get the shared Web3 client of an RPC endpoint, its requests reuse one pooled session"""
+    with _lock:
+        web3 = _web3.get(provider_url)
+        if web3 is None:
+            session = TimeoutSession(timeout=timeout, pool_size=pool_size)
+            _sessions[f"rpc:{provider_url}"] = session
+            web3 = Web3(Web3.HTTPProvider(provider_url, request_kwargs={"timeout": timeout}, session=session))
+            _web3[provider_url] = web3
+        return web3
+
+def create_async_openai_http_client(timeout: float = 60.0, max_connections: int = 20) -> httpx.AsyncClient:
+    """HTTP client for the async OpenAI SDK with keep-alive, timeouts and a connection limit"""
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(timeout, connect=10.0),
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+    )
+
+def close_sessions() -> None:
+    """Close the pooled connections of all shared sessions, e.g. on shutdown
+
+    Sessions and Web3 clients stay registered, so references held elsewhere
+    (the monitors) remain valid and reconnect on their next request.
+    """
+    with _lock:
+        for session in _sessions.values():
+            session.close()
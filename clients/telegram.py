@@ -0,0 +1,10 @@
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+
+def create_bot(token: str, timeout: float = 60.0, connection_limit: int = 100) -> Bot:
+    """Bot with its own pooled aiohttp session, share one instance across services
+
+    Close it with `await bot.session.close()`.
+    """
+    session = AiohttpSession(limit=connection_limit, timeout=timeout)
+    return Bot(token=token, session=session)
@@ -1,9 +1,11 @@
 import asyncio
 import logging
 from pathlib import Path
-from post_parser.main import setup_bot
-from personality_analyzer import CharacterAnalyzer
-from storage.storage import Storage
+import os
+from post_parser.main import setup_bot, SCRIPT_DIR
+from personality_analyzer import AsyncCharacterAnalyzer, LLMCache
+from storage.storage import create_storage
+from clients.http import create_async_openai_http_client
 from post_parser.config import load_config as load_telegram_config
 from personality_analyzer.config import load_config as load_analyzer_config
 
@@ -15,6 +17,7 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 async def main():
+    storage = None
     try:
         # Load configurations
         logger.info("Loading configurations...")
@@ -23,14 +26,29 @@ async def main():
 
         # Initialize storage
         logger.info("Initializing storage...")
-        storage = Storage()
+        storage = create_storage(telegram_config.get("storage"), SCRIPT_DIR)
 
         # Initialize personality analyzer
         logger.info("Initializing personality analyzer...")
-        analyzer = CharacterAnalyzer(
+        analyzer = AsyncCharacterAnalyzer(
             api_key=analyzer_config["openai"]["api_key"],
             model=analyzer_config["openai"]["model"],
-            temperature=analyzer_config["openai"]["temperature"]
+            temperature=analyzer_config["openai"]["temperature"],
+            http_client=create_async_openai_http_client(
+                timeout=telegram_config["clients"]["openai_timeout"],
+                max_connections=telegram_config["clients"]["openai_connections"]
+            ),
+            timeout=telegram_config["clients"]["openai_timeout"],
+            max_concurrent=telegram_config["clients"]["openai_max_concurrent"],
+            chunk_tokens=telegram_config["analysis_chunk_tokens"],
+            reduce_fan_in=telegram_config["analysis_reduce_fan_in"],
+            sample_tokens=telegram_config["analysis_sample_tokens"],
+            # Responses are shared by all users, e.g. two users adding the same channel
+            cache=LLMCache(
+                max_entries=telegram_config["llm_cache_size"],
+                ttl=telegram_config["llm_cache_ttl"],
+                path=os.path.join(SCRIPT_DIR, telegram_config["llm_cache_path"]) if telegram_config["llm_cache_path"] else None
+            )
         )
 
         # Setup and run bot
@@ -40,6 +58,9 @@ async def main():
     except Exception as e:
         logger.error(f"Error in main: {str(e)}", exc_info=True)
         raise
+    finally:
+        if storage:
+            storage.close()
 
 if __name__ == "__main__":
     try:
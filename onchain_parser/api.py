@@ -1,5 +1,15 @@
-from typing import Callable
+from typing import Callable, Optional
+from onchain_parser.config import config
 from onchain_parser.monitor_service import monitor_service
+from onchain_parser.pending_monitor import PendingMonitor
+
+# Built by the application on start when pending tracking is enabled
+_pending_monitor: Optional[PendingMonitor] = None
+
+def set_pending_monitor(pending_monitor: Optional[PendingMonitor]) -> None:
+    """Set the monitor that pending subscriptions go to, None disables them"""
+    global _pending_monitor
+    _pending_monitor = pending_monitor
 
 def subscribe_to_wallet(wallet_address: str, callback: Callable) -> bool:
     """
@@ -25,4 +35,35 @@ def unsubscribe_from_wallet(wallet_address: str) -> bool:
     Returns:
         bool: True if unsubscription was successful
     """
-    return monitor_service.unsubscribe(wallet_address)
\ No newline at end of file
+    return monitor_service.unsubscribe(wallet_address)
+
+def subscribe_to_pending(wallet_address: str, callback: Callable) -> bool:
+    """
+    Subscribe to a wallet's pending (not yet mined) transactions
+
+    Args:
+        wallet_address: The sender address to watch in the mempool
+        callback: Function called when a pending transaction is seen and again
+                 when it is mined or dropped
+                 Callback signature: fn(pending: PendingTransaction)
+
+    Returns:
+        bool: True if subscription was successful, False if disabled in config
+    """
+    if not config.pending_enabled or _pending_monitor is None:
+        return False
+    return _pending_monitor.subscribe(wallet_address, callback)
+
+def unsubscribe_from_pending(wallet_address: str) -> bool:
+    """
+    Unsubscribe from a wallet's pending transactions
+
+    Args:
+        wallet_address: The sender address to stop watching
+
+    Returns:
+        bool: True if unsubscription was successful
+    """
+    if _pending_monitor is None:
+        return False
+    return _pending_monitor.unsubscribe(wallet_address)
@@ -33,6 +33,18 @@ class Config:
                     'monitoring': {
                         'block_delay': config.get('monitoring', {}).get('block_delay', 3),  # Default 3 seconds
                         'retry_delay': config.get('monitoring', {}).get('retry_delay', 6),  # Default 6 seconds
+                        'pending': {
+                            'enabled': config.get('monitoring', {}).get('pending', {}).get('enabled', False),  # Default off
+                            'mode': config.get('monitoring', {}).get('pending', {}).get('mode', 'ws'),  # 'ws' or 'poll'
+                            'ws_url': config.get('monitoring', {}).get('pending', {}).get('ws_url', ''),  # Default derived from provider_url
+                            'poll_interval': config.get('monitoring', {}).get('pending', {}).get('poll_interval', 1),  # Default 1 second
+                            'drop_timeout': config.get('monitoring', {}).get('pending', {}).get('drop_timeout', 180),  # Default 3 minutes
+                        },
+                    },
+                    'http': {
+                        'rpc_timeout': config.get('http', {}).get('rpc_timeout', 30),  # Default 30 seconds
+                        'dexscreener_timeout': config.get('http', {}).get('dexscreener_timeout', 10),  # Default 10 seconds
+                        'pool_size': config.get('http', {}).get('pool_size', 10),  # Keep-alive connections per upstream
                     },
                     'test': {
                         'wallet_address': config.get('test', {}).get('wallet_address',
@@ -73,6 +85,49 @@ class Config:
         """Get delay for retries on error"""
         return self._config['monitoring']['retry_delay']
 
+    @property
+    def pending_enabled(self) -> bool:
+        """Get whether pending transaction tracking is enabled"""
+        return self._config['monitoring']['pending']['enabled']
+
+    @property
+    def pending_mode(self) -> str:
+        """Get pending transaction source: 'ws' subscription or 'poll' of the pending block"""
+        return self._config['monitoring']['pending']['mode']
+
+    @property
+    def pending_ws_url(self) -> str:
+        """Get websocket URL for eth_subscribe, derived from provider URL if not set"""
+        ws_url = self._config['monitoring']['pending']['ws_url']
+        if ws_url:
+            return ws_url
+        return self.provider_url.replace('https://', 'wss://', 1).replace('http://', 'ws://', 1)
+
+    @property
+    def pending_poll_interval(self) -> float:
+        """Get delay between pending block polls"""
+        return self._config['monitoring']['pending']['poll_interval']
+
+    @property
+    def pending_drop_timeout(self) -> float:
+        """Get time after which an unmined pending transaction is considered dropped"""
+        return self._config['monitoring']['pending']['drop_timeout']
+
+    @property
+    def rpc_timeout(self) -> float:
+        """Get timeout of RPC requests"""
+        return self._config['http']['rpc_timeout']
+
+    @property
+    def dexscreener_timeout(self) -> float:
+        """Get timeout of Dexscreener requests"""
+        return self._config['http']['dexscreener_timeout']
+
+    @property
+    def http_pool_size(self) -> int:
+        """Get number of keep-alive connections per upstream"""
+        return self._config['http']['pool_size']
+
     @property
     def debug_mode(self) -> bool:
         """Get debug mode status"""
@@ -1,5 +1,5 @@
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Dict, List, Optional
 from datetime import datetime
 
 @dataclass
@@ -51,6 +51,16 @@ class TransactionEvent:
     status: str
     transfers: List[TokenTransfer]
 
+    @property
+    def net_value(self) -> Optional[float]:
+        """Net USD value of the wallet's token flows (positive when value came in)"""
+        values = [
+            transfer.total_value if transfer.operation == 'BUY' else -transfer.total_value
+            for transfer in self.transfers
+            if transfer.total_value is not None
+        ]
+        return sum(values) if values else None
+
     @property
     def datetime(self) -> datetime:
         """Get datetime object from timestamp"""
@@ -96,6 +106,9 @@ class TransactionEvent:
                     f"└── Total Value: {total_value_str}",
                 ])
 
+            if self.net_value is not None:
+                output.extend(["", f"Net Value: ${self.net_value:,.2f}"])
+
         return "\n".join(output)
 
     def format_brief(self) -> str:
@@ -118,4 +131,107 @@ class TransactionEvent:
                 f"Operation: {transfer.operation}"
             ])
 
-        return "\n".join(result)
\ No newline at end of file
+        return "\n".join(result)
+
+@dataclass
+class PendingTransaction:
+    hash: str
+    from_address: str
+    to_address: Optional[str]
+    value: float  # in ETH
+    nonce: int
+    method_id: Optional[str]  # 4-byte selector of the call, None for plain transfers
+    method_name: str
+    first_seen: float
+    status: str = 'PENDING'  # 'PENDING', 'MINED' or 'DROPPED'
+    block_number: Optional[int] = None
+    token_address: Optional[str] = None  # Token bought or sold, decoded from router calls with a path
+
+    @property
+    def operation(self) -> str:
+        """Best guess of the operation before the receipt is known"""
+        if self.method_name.startswith('swapExactETH') or self.method_name.startswith('swapETH'):
+            return 'BUY'
+        if 'ForETH' in self.method_name:
+            return 'SELL'
+        if self.method_id is None:
+            return 'TRANSFER'
+        return 'SWAP' if 'swap' in self.method_name.lower() or self.method_name == 'execute' else 'CALL'
+
+    def format_brief(self) -> str:
+        """Format brief pending transaction info"""
+        return "\n".join([
+            f"Pending transaction seen at {datetime.fromtimestamp(self.first_seen)}:",
+            f"Hash: {self.hash}",
+            f"From: {self.from_address}",
+            f"To: {self.to_address}",
+            f"Value: {self.value} ETH",
+            f"Call: {self.method_name}"
+        ])
+
+@dataclass
+class TransactionDigest:
+    """Transactions of one wallet collected within a time window"""
+    wallet_address: str
+    events: List[TransactionEvent]
+
+    @property
+    def hashes(self) -> List[str]:
+        return [event.hash for event in self.events]
+
+    @property
+    def tokens(self) -> List[str]:
+        """Symbols of all tokens touched, in order of first appearance"""
+        return list(dict.fromkeys(transfer.token.symbol for event in self.events for transfer in event.transfers))
+
+    @property
+    def positions(self) -> Dict[str, Dict[str, float]]:
+        """Net amount and USD value per token (positive when the wallet gained)"""
+        positions: Dict[str, Dict[str, float]] = {}
+        for event in self.events:
+            for transfer in event.transfers:
+                sign = 1 if transfer.operation == 'BUY' else -1
+                position = positions.setdefault(transfer.token.symbol, {"amount": 0.0, "value": 0.0})
+                position["amount"] += sign * transfer.amount
+                if transfer.total_value is not None:
+                    position["value"] += sign * transfer.total_value
+        return positions
+
+    @property
+    def total_value(self) -> float:
+        """Traded USD volume over all transfers"""
+        return sum(
+            transfer.total_value
+            for event in self.events
+            for transfer in event.transfers
+            if transfer.total_value is not None
+        )
+
+    @property
+    def net_value(self) -> Optional[float]:
+        """Net USD value of all transactions (positive when value came in)"""
+        values = [event.net_value for event in self.events if event.net_value is not None]
+        return sum(values) if values else None
+
+    def format_brief(self) -> str:
+        """Format brief digest info"""
+        start = datetime.fromtimestamp(min(event.timestamp for event in self.events))
+        end = datetime.fromtimestamp(max(event.timestamp for event in self.events))
+        result = [
+            f"{len(self.events)} transactions between {start} and {end}:",
+            f"Wallet: {self.wallet_address}",
+            f"Tokens: {', '.join(self.tokens) or 'ETH'}",
+            f"Total Volume: ${self.total_value:,.2f}"
+        ]
+        if self.net_value is not None:
+            result.append(f"Net Value: ${self.net_value:,.2f}")
+
+        positions = self.positions
+        if positions:
+            result.append("")
+            result.append("Net Positions:")
+            for symbol, position in positions.items():
+                emoji = "🟢" if position["amount"] >= 0 else "🔴"
+                result.append(f"{emoji} {symbol}: {position['amount']:+,.4f} (${position['value']:+,.2f})")
+
+        return "\n".join(result)
@@ -7,6 +7,7 @@ from dataclasses import dataclass
 from web3 import Web3
 from onchain_parser.config import config
 from onchain_parser.wallet_monitor import analyze_transaction, get_token_info, print_transaction_info
+from clients.http import get_web3
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,8 +19,8 @@ class WalletSubscription:
     active: bool = True
 
 class MonitorService:
-    def __init__(self):
-        self.web3 = Web3(Web3.HTTPProvider(config.provider_url))
+    def __init__(self, web3: Optional[Web3] = None):
+        self.web3 = web3 or get_web3(config.provider_url, timeout=config.rpc_timeout, pool_size=config.http_pool_size)
         self._subscriptions: Dict[str, WalletSubscription] = {}
         self._monitor_thread: Optional[threading.Thread] = None
         self._running = False
@@ -62,6 +63,11 @@ class MonitorService:
 
             return True
 
+    def is_subscribed(self, wallet_address: str) -> bool:
+        """Check whether a wallet is already monitored"""
+        with self._lock:
+            return wallet_address.lower() in self._subscriptions
+
     def unsubscribe(self, wallet_address: str) -> bool:
         """Unsubscribe from a wallet's transactions"""
         with self._lock:
@@ -162,7 +168,7 @@ class MonitorService:
 
                                         if receipt:
                                             # Analyze and notify
-                                            tx_event = analyze_transaction(tx, receipt)
+                                            tx_event = analyze_transaction(tx, receipt, wallet_address)
                                             if tx_event:
                                                 try:
                                                     # Call the callback directly - it's now sync
@@ -0,0 +1,332 @@
+from typing import Dict, Optional, Callable, Any
+from collections import OrderedDict
+import threading
+import json
+import time
+from dataclasses import dataclass
+from eth_abi import decode
+from web3 import Web3
+from websockets.sync.client import connect
+from onchain_parser.config import config
+from onchain_parser.models import PendingTransaction
+from clients.http import get_web3
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Selectors of the calls we can name before the transaction is mined
+KNOWN_METHODS = {
+    '0x7ff36ab5': 'swapExactETHForTokens',
+    '0xb6f9de95': 'swapExactETHForTokensSupportingFeeOnTransferTokens',
+    '0xfb3bdb41': 'swapETHForExactTokens',
+    '0x18cbafe5': 'swapExactTokensForETH',
+    '0x791ac947': 'swapExactTokensForETHSupportingFeeOnTransferTokens',
+    '0x4a25d94a': 'swapTokensForExactETH',
+    '0x38ed1739': 'swapExactTokensForTokens',
+    '0x5c11d795': 'swapExactTokensForTokensSupportingFeeOnTransferTokens',
+    '0x8803dbee': 'swapTokensForExactTokens',
+    '0x04e45aaf': 'exactInputSingle',
+    '0xb858183f': 'exactInput',
+    '0x3593564c': 'execute',
+    '0x24856bc3': 'execute',
+    '0xa9059cbb': 'transfer',
+    '0x23b872dd': 'transferFrom',
+    '0x095ea7b3': 'approve',
+}
+
+# Argument types of router swaps whose path names the token, with the operation they perform
+PATH_SWAPS = {
+    'swapExactETHForTokens': (['uint256', 'address[]', 'address', 'uint256'], 'BUY'),
+    'swapExactETHForTokensSupportingFeeOnTransferTokens': (['uint256', 'address[]', 'address', 'uint256'], 'BUY'),
+    'swapETHForExactTokens': (['uint256', 'address[]', 'address', 'uint256'], 'BUY'),
+    'swapExactTokensForETH': (['uint256', 'uint256', 'address[]', 'address', 'uint256'], 'SELL'),
+    'swapExactTokensForETHSupportingFeeOnTransferTokens': (['uint256', 'uint256', 'address[]', 'address', 'uint256'], 'SELL'),
+    'swapTokensForExactETH': (['uint256', 'uint256', 'address[]', 'address', 'uint256'], 'SELL'),
+}
+
+# How many recently seen hashes to remember to avoid duplicate notifications
+SEEN_CACHE_SIZE = 10000
+
+
+def _to_int(value) -> int:
+    """Convert RPC quantity (hex string or int) to int"""
+    if isinstance(value, str):
+        return int(value, 16)
+    return int(value or 0)
+
+
+def _to_hex(value) -> str:
+    """Convert RPC data (hex string or bytes) to 0x-prefixed hex string"""
+    if isinstance(value, (bytes, bytearray)):
+        value = value.hex()
+    if not value.startswith('0x'):
+        value = '0x' + value
+    return value
+
+
+def decode_swap_token(method_name: str, call_data: str) -> Optional[str]:
+    """Get the token a router swap buys or sells from its path, None for other calls"""
+    swap = PATH_SWAPS.get(method_name)
+    if not swap:
+        return None
+    types, operation = swap
+    try:
+        arguments = decode(types, bytes.fromhex(call_data[10:]))
+    except Exception as e:
+        logger.debug(f"Could not decode {method_name} call: {e}")
+        return None
+    path = arguments[types.index('address[]')]
+    if not path:
+        return None
+    # ETH goes in first when buying and comes out last when selling
+    return (path[-1] if operation == 'BUY' else path[0]).lower()
+
+
+def decode_pending_transaction(tx: Any) -> PendingTransaction:
+    """Pre-decode a pending transaction from either a web3 object or raw JSON-RPC dict"""
+    call_data = _to_hex(tx.get('input', '0x'))
+    method_id = call_data[:10] if len(call_data) >= 10 else None
+    method_name = KNOWN_METHODS.get(method_id, method_id) if method_id else 'ETH transfer'
+
+    return PendingTransaction(
+        hash=_to_hex(tx['hash']),
+        from_address=tx['from'],
+        to_address=tx.get('to'),
+        value=float(Web3.from_wei(_to_int(tx.get('value', 0)), 'ether')),
+        nonce=_to_int(tx.get('nonce', 0)),
+        method_id=method_id,
+        method_name=method_name,
+        first_seen=time.time(),
+        token_address=decode_swap_token(method_name, call_data)
+    )
+
+
+@dataclass
+class PendingSubscription:
+    address: str
+    callback: Callable
+    active: bool = True
+
+
+class PendingMonitor:
+    """Tracks pending transactions of subscribed senders until they are mined or dropped.
+
+    Transactions come either from an `eth_subscribe("newPendingTransactions")`
+    websocket stream or from polling the pending block. Each tracked transaction
+    is reported to the subscription callback twice: when first seen (status
+    PENDING) and once it is MINED or DROPPED.
+    """
+
+    def __init__(self, web3: Optional[Web3] = None, ws_url: Optional[str] = None,
+                 mode: Optional[str] = None, poll_interval: Optional[float] = None,
+                 drop_timeout: Optional[float] = None):
+        self.web3 = web3 or get_web3(config.provider_url, timeout=config.rpc_timeout, pool_size=config.http_pool_size)
+        self.ws_url = ws_url or config.pending_ws_url
+        self.mode = mode or config.pending_mode
+        self.poll_interval = poll_interval or config.pending_poll_interval
+        self.drop_timeout = drop_timeout or config.pending_drop_timeout
+        self._subscriptions: Dict[str, PendingSubscription] = {}
+        self._tracked: Dict[str, PendingTransaction] = {}
+        self._seen: OrderedDict = OrderedDict()
+        self._monitor_thread: Optional[threading.Thread] = None
+        self._running = False
+        self._lock = threading.Lock()
+
+    def subscribe(self, wallet_address: str, callback: Callable) -> bool:
+        """Subscribe to pending transactions sent by a wallet"""
+        with self._lock:
+            wallet_address = wallet_address.lower()
+            if wallet_address in self._subscriptions:
+                return False
+
+            self._subscriptions[wallet_address] = PendingSubscription(
+                address=wallet_address,
+                callback=callback
+            )
+
+            if not self._running:
+                self._start_monitor()
+
+            return True
+
+    def unsubscribe(self, wallet_address: str) -> bool:
+        """Unsubscribe from a wallet's pending transactions"""
+        with self._lock:
+            wallet_address = wallet_address.lower()
+            if wallet_address not in self._subscriptions:
+                return False
+
+            del self._subscriptions[wallet_address]
+            for tx_hash, pending in list(self._tracked.items()):
+                if pending.from_address.lower() == wallet_address:
+                    del self._tracked[tx_hash]
+
+            thread = None
+            if not self._subscriptions and self._running:
+                thread = self._stop_monitor()
+
+        # Joined outside the lock, the watcher may be waiting for it in _notify
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout=5.0)
+        return True
+
+    def stop(self):
+        """Drop all subscriptions and stop the watcher thread"""
+        with self._lock:
+            self._subscriptions.clear()
+            self._tracked.clear()
+            thread = self._stop_monitor() if self._running else None
+        if thread and thread is not threading.current_thread():
+            thread.join(timeout=5.0)
+
+    def _start_monitor(self):
+        """Start the background watcher thread"""
+        if self._monitor_thread is None or not self._monitor_thread.is_alive():
+            self._running = True
+            target = self._ws_loop if self.mode == 'ws' else self._poll_loop
+            self._monitor_thread = threading.Thread(target=target)
+            self._monitor_thread.daemon = True
+            self._monitor_thread.start()
+
+    def _stop_monitor(self) -> Optional[threading.Thread]:
+        """Tell the watcher thread to stop (caller holds the lock), return it for joining"""
+        self._running = False
+        thread, self._monitor_thread = self._monitor_thread, None
+        return thread
+
+    def _notify(self, pending: PendingTransaction):
+        """Call the subscriber of the transaction sender"""
+        with self._lock:
+            subscription = self._subscriptions.get(pending.from_address.lower())
+        if not subscription or not subscription.active:
+            return
+        try:
+            subscription.callback(pending)
+        except Exception as e:
+            logger.error(f"Pending callback error for {subscription.address}: {e}", exc_info=True)
+
+    def _handle_transaction(self, tx: Any):
+        """Start tracking a pending transaction if its sender is subscribed"""
+        sender = tx.get('from')
+        if not sender:
+            return
+
+        with self._lock:
+            if sender.lower() not in self._subscriptions:
+                return
+
+        pending = decode_pending_transaction(tx)
+        with self._lock:
+            if pending.hash in self._seen:
+                return
+            self._seen[pending.hash] = None
+            if len(self._seen) > SEEN_CACHE_SIZE:
+                self._seen.popitem(last=False)
+            self._tracked[pending.hash] = pending
+
+        logger.info(f"Pending transaction {pending.hash} from {pending.from_address}: {pending.method_name}")
+        self._notify(pending)
+
+    def _handle_hash(self, tx_hash: str):
+        """Fetch and handle a pending transaction announced by hash only"""
+        if tx_hash in self._seen:
+            return
+        try:
+            tx = self.web3.eth.get_transaction(tx_hash)
+        except Exception:
+            return  # Already gone from the mempool
+        if tx:
+            self._handle_transaction(tx)
+
+    def _get_receipt(self, tx_hash: str):
+        """Get the receipt of a transaction, None while it is not mined"""
+        try:
+            return self.web3.eth.get_transaction_receipt(tx_hash)
+        except Exception:
+            return None
+
+    def _reconcile(self):
+        """Resolve tracked transactions that were mined or dropped"""
+        with self._lock:
+            tracked = list(self._tracked.values())
+
+        for pending in tracked:
+            try:
+                receipt = self._get_receipt(pending.hash)
+                nonce_used = not receipt and self.web3.eth.get_transaction_count(
+                    Web3.to_checksum_address(pending.from_address)
+                ) > pending.nonce
+                if nonce_used:
+                    # Mined since the first lookup, otherwise the nonce went to a replacement
+                    receipt = self._get_receipt(pending.hash)
+
+                if receipt:
+                    pending.status = 'MINED'
+                    pending.block_number = receipt['blockNumber']
+                elif nonce_used or time.time() - pending.first_seen > self.drop_timeout:
+                    pending.status = 'DROPPED'
+                else:
+                    continue
+
+                with self._lock:
+                    self._tracked.pop(pending.hash, None)
+
+                logger.info(f"Pending transaction {pending.hash} {pending.status.lower()}")
+                self._notify(pending)
+
+            except Exception as e:
+                logger.error(f"Error reconciling pending transaction {pending.hash}: {e}")
+
+    def _ws_loop(self):
+        """Stream pending transactions over an eth_subscribe websocket"""
+        while self._running:
+            try:
+                with connect(self.ws_url) as ws:
+                    # Ask for full transaction objects; nodes that don't support it send hashes
+                    ws.send(json.dumps({
+                        "jsonrpc": "2.0",
+                        "id": 1,
+                        "method": "eth_subscribe",
+                        "params": ["newPendingTransactions", True]
+                    }))
+                    response = json.loads(ws.recv(timeout=10))
+                    if 'error' in response:
+                        raise Exception(f"eth_subscribe failed: {response['error']}")
+                    logger.info(f"Subscribed to pending transactions at {self.ws_url}")
+
+                    last_reconcile = time.time()
+                    while self._running:
+                        try:
+                            message = json.loads(ws.recv(timeout=self.poll_interval))
+                        except TimeoutError:
+                            message = None
+
+                        if message and message.get('method') == 'eth_subscription':
+                            result = message['params']['result']
+                            if isinstance(result, str):
+                                self._handle_hash(result)
+                            else:
+                                self._handle_transaction(result)
+
+                        if time.time() - last_reconcile >= self.poll_interval:
+                            self._reconcile()
+                            last_reconcile = time.time()
+
+            except Exception as e:
+                logger.error(f"Pending websocket error: {e}")
+                time.sleep(config.retry_delay)
+
+    def _poll_loop(self):
+        """Poll the pending block for transactions of subscribed senders"""
+        while self._running:
+            try:
+                block = self.web3.eth.get_block('pending', full_transactions=True)
+                for tx in block.transactions:
+                    self._handle_transaction(tx)
+                self._reconcile()
+            except Exception as e:
+                logger.error(f"Pending poll error: {e}")
+                time.sleep(config.retry_delay)
+                continue
+
+            time.sleep(self.poll_interval)
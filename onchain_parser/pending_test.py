@@ -0,0 +1,120 @@
+from onchain_parser.pending_monitor import PendingMonitor
+from onchain_parser.models import PendingTransaction
+from websockets.sync.server import serve
+import json
+import threading
+import time
+
+# Test configuration
+HOST = "127.0.0.1"
+PORT = 8546
+WALLET = "0xf4Aa85656D9350DaE3D8006D8Fb45c33415E6B21"
+OTHER_WALLET = "0x1111111111111111111111111111111111111111"
+POLL_INTERVAL = 0.2
+
+# Scripted mempool: what the stand-in node announces and what later happens to it
+MINED = "0x" + "a1" * 32  # Mined, the receipt shows up right after the nonce moved
+REPLACED = "0x" + "b2" * 32  # Its nonce is taken by another transaction
+BY_HASH = "0x" + "c3" * 32  # Announced by hash only, mined later
+IGNORED = "0x" + "d4" * 32  # Sent by a wallet nobody subscribed to
+
+TRANSACTIONS = {
+    MINED: {"hash": MINED, "from": WALLET, "to": OTHER_WALLET, "value": hex(10 ** 17), "nonce": "0x5", "input": "0x"},
+    REPLACED: {"hash": REPLACED, "from": WALLET, "to": OTHER_WALLET, "value": "0x0", "nonce": "0x6",
+               "input": "0x3593564c" + "00" * 64},
+    BY_HASH: {"hash": BY_HASH, "from": WALLET, "to": OTHER_WALLET, "value": "0x0", "nonce": "0x7",
+              "input": "0xa9059cbb" + "00" * 64},
+    IGNORED: {"hash": IGNORED, "from": OTHER_WALLET, "to": WALLET, "value": "0x1", "nonce": "0x1", "input": "0x"},
+}
+
+EXPECTED = {MINED: 'MINED', REPLACED: 'DROPPED', BY_HASH: 'MINED'}
+
+
+class FakeEth:
+    """Answers the RPC calls PendingMonitor makes, following the script above"""
+
+    def __init__(self):
+        self.started = time.time()
+        self.stale_receipt_lookups = {MINED: 1}  # The node lags once: receipt missing although the nonce moved
+
+    def _elapsed(self) -> float:
+        return time.time() - self.started
+
+    def get_transaction(self, tx_hash):
+        return TRANSACTIONS[tx_hash]
+
+    def get_transaction_count(self, address):
+        if self._elapsed() > 3:
+            return 8
+        if self._elapsed() > 2:
+            return 7
+        if self._elapsed() > 1:
+            return 6
+        return 5
+
+    def get_transaction_receipt(self, tx_hash):
+        mined_after = {MINED: 1, BY_HASH: 3}.get(tx_hash)
+        if mined_after is None or self._elapsed() <= mined_after:
+            raise Exception("Transaction not found")
+        if self.stale_receipt_lookups.get(tx_hash):
+            self.stale_receipt_lookups[tx_hash] -= 1
+            raise Exception("Transaction not found")
+        return {"blockNumber": 100 + mined_after}
+
+
+class FakeWeb3:
+    def __init__(self):
+        self.eth = FakeEth()
+
+
+def node_stand_in(ws):
+    """Local stand-in for eth_subscribe('newPendingTransactions') of a node"""
+    request = json.loads(ws.recv())
+    ws.send(json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": "0xsubscription"}))
+    for result in [TRANSACTIONS[MINED], TRANSACTIONS[REPLACED], BY_HASH, TRANSACTIONS[IGNORED], TRANSACTIONS[MINED]]:
+        ws.send(json.dumps({
+            "jsonrpc": "2.0",
+            "method": "eth_subscription",
+            "params": {"subscription": "0xsubscription", "result": result}
+        }))
+    try:
+        ws.recv()  # Keep the connection open until the monitor closes it
+    except Exception:
+        pass
+
+
+def main():
+    server = serve(node_stand_in, HOST, PORT)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    events = []
+
+    def callback(pending: PendingTransaction):
+        print(f"{pending.status}: {pending.hash[:10]}... {pending.method_name}")
+        events.append((pending.hash, pending.status))
+
+    monitor = PendingMonitor(
+        web3=FakeWeb3(), ws_url=f"ws://{HOST}:{PORT}", mode='ws',
+        poll_interval=POLL_INTERVAL, drop_timeout=30
+    )
+    monitor.subscribe(WALLET, callback)
+    try:
+        deadline = time.time() + 10
+        while time.time() < deadline and len(events) < 2 * len(EXPECTED):
+            time.sleep(POLL_INTERVAL)
+    finally:
+        started = time.time()
+        monitor.unsubscribe(WALLET)
+        server.shutdown()
+        print(f"Unsubscribed in {time.time() - started:.2f}s")
+
+    statuses = {}
+    for tx_hash, status in events:
+        statuses.setdefault(tx_hash, []).append(status)
+    ok = all(statuses.get(tx_hash) == ['PENDING', expected] for tx_hash, expected in EXPECTED.items())
+    ok = ok and IGNORED not in statuses
+    print("All checks passed" if ok else f"Unexpected notifications: {statuses}")
+
+
+if __name__ == "__main__":
+    main()
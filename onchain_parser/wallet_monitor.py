@@ -1,23 +1,33 @@
 from web3 import Web3
-import requests
 import json
 from datetime import datetime
 import time
 from onchain_parser.config import config
 from onchain_parser.models import TransactionEvent, TokenTransfer, TokenInfo
-from typing import Optional
+from typing import Dict, Optional
+from collections import defaultdict
 import logging
+from clients.http import get_session, get_web3
 
-# Connection to Base Mainnet using config
-web3 = Web3(Web3.HTTPProvider(config.provider_url))
+# Connection to Base Mainnet using config, shared with the monitors
+web3 = get_web3(config.provider_url, timeout=config.rpc_timeout, pool_size=config.http_pool_size)
 
 # Address to monitor from config
 WALLET_ADDRESS = config.wallet_address
 IGNORED_CONTRACTS = config.ignored_contracts
 
+# keccak256("Transfer(address,address,uint256)")
+TRANSFER_TOPIC = 'ddf252ad1be2c89b69c2b068fc378daa952ba7f163c4a11628f55a4df523b3ef'
+
 # Configure logger
 logger = logging.getLogger(__name__)
 
+def _topic_hex(topic) -> str:
+    """Get log topic as lowercase hex without 0x prefix"""
+    topic = topic.hex() if isinstance(topic, (bytes, bytearray)) else topic
+    topic = topic.lower()
+    return topic[2:] if topic.startswith('0x') else topic
+
 def get_token_info(token_address) -> Optional[TokenInfo]:
     """Get token information from Dexscreener"""
     try:
@@ -26,7 +36,8 @@ def get_token_info(token_address) -> Optional[TokenInfo]:
             token_address = '0x4200000000000000000000000000000000000006'  # Base WETH
 
         url = f"https://api.dexscreener.com/latest/dex/tokens/{token_address}"
-        response = requests.get(url)
+        session = get_session("dexscreener", timeout=config.dexscreener_timeout, pool_size=config.http_pool_size)
+        response = session.get(url)
         data = response.json()
 
         if data.get('pairs'):
@@ -44,8 +55,71 @@ def get_token_info(token_address) -> Optional[TokenInfo]:
         print(f"Error getting token info: {e}")
         return None
 
-def analyze_transaction(transaction, tx_receipt) -> Optional[TransactionEvent]:
-    """Detailed transaction analysis"""
+def compute_net_flows(logs) -> Dict[str, Dict[str, int]]:
+    """
+    Sum all ERC20 Transfer logs of a receipt into net raw token deltas
+
+    Returns:
+        Mapping of lowercased wallet -> lowercased token address -> raw delta.
+        Tokens that only passed through a wallet are omitted.
+    """
+    flows: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    for log in logs:
+        try:
+            topics = log['topics']
+            if len(topics) != 3 or _topic_hex(topics[0]) != TRANSFER_TOPIC:
+                continue
+
+            token_address = log['address'].lower()
+            from_addr = '0x' + _topic_hex(topics[1])[-40:]
+            to_addr = '0x' + _topic_hex(topics[2])[-40:]
+
+            amount_hex = log['data']
+            if isinstance(amount_hex, bytes):
+                amount = int.from_bytes(amount_hex, 'big')
+            else:
+                amount = int(amount_hex, 16)
+
+            flows[from_addr][token_address] -= amount
+            flows[to_addr][token_address] += amount
+        except Exception as e:
+            logger.error(f"Error processing log entry: {e}")
+            continue
+
+    return {
+        wallet: {token: delta for token, delta in deltas.items() if delta != 0}
+        for wallet, deltas in flows.items()
+    }
+
+def get_token_decimals(token_address: str) -> int:
+    """Get token decimals from the contract (default to 18 if not available)"""
+    try:
+        contract = web3.eth.contract(
+            address=Web3.to_checksum_address(token_address),
+            abi=[{
+                "constant": True,
+                "inputs": [],
+                "name": "decimals",
+                "outputs": [{"name": "", "type": "uint8"}],
+                "type": "function"
+            }]
+        )
+        return contract.functions.decimals().call()
+    except Exception as e:
+        logger.warning(f"Could not get token decimals, using default 18: {e}")
+        return 18
+
+def analyze_transaction(transaction, tx_receipt, wallet_address: Optional[str] = None) -> Optional[TransactionEvent]:
+    """
+    Detailed transaction analysis
+
+    Args:
+        transaction: Transaction object
+        tx_receipt: Transaction receipt with logs
+        wallet_address: Wallet whose net token flows are reported,
+                        defaults to the transaction sender
+    """
     try:
         # Get block with retries
         block = None
@@ -73,90 +147,45 @@ def analyze_transaction(transaction, tx_receipt) -> Optional[TransactionEvent]:
         gas_cost_wei = tx_receipt['gasUsed'] * transaction['gasPrice']
         gas_cost_eth = web3.from_wei(gas_cost_wei, 'ether')
 
-        # Analyze logs for Transfer events
+        # Aggregate all Transfer logs into net token deltas per wallet, so hops
+        # through routers and aggregators cancel out before any lookups are made
+        wallet = (wallet_address or transaction['from']).lower()
+        net_flows = compute_net_flows(tx_receipt['logs'])
         transfers = []
-        processed_tokens = set()
 
-        for log in tx_receipt['logs']:
+        for token_address, delta in net_flows.get(wallet, {}).items():
             try:
-                if len(log['topics']) == 3:  # Standard ERC20 Transfer event
-                    token_address = log['address']
-
-                    # Skip if already processed
-                    if token_address.lower() in processed_tokens:
-                        continue
-
-                    from_addr = '0x' + log['topics'][1].hex()[-40:]
-                    to_addr = '0x' + log['topics'][2].hex()[-40:]
-
-                    # Log transfer details for debugging
-                    logger.debug(f"Found transfer: {from_addr} -> {to_addr}")
-
-                    # Check if sender or receiver matches transaction sender
-                    if from_addr.lower() != transaction['from'].lower() and to_addr.lower() != transaction['from'].lower():
-                        continue
-
-                    # Get token info with retries
-                    token_info = None
-                    for attempt in range(3):
-                        try:
-                            token_info = get_token_info(token_address)
-                            if token_info:
-                                break
-                        except Exception as e:
-                            if attempt == 2:
-                                logger.error(f"Failed to get token info for {token_address}: {e}")
-                            time.sleep(1)
-
-                    if not token_info:
-                        continue
-
-                    # Process amount with better error handling
+                # Get token info with retries
+                token_info = None
+                for attempt in range(3):
                     try:
-                        amount_hex = log['data']
-                        if isinstance(amount_hex, bytes):
-                            amount = int.from_bytes(amount_hex, 'big')
-                        else:
-                            amount = int(amount_hex, 16)
-
-                        # Get token decimals (default to 18 if not available)
-                        token_decimals = 18  # Most ERC20 tokens use 18 decimals
-                        try:
-                            # Create contract instance to get decimals
-                            contract = web3.eth.contract(
-                                address=token_address,
-                                abi=[{
-                                    "constant": True,
-                                    "inputs": [],
-                                    "name": "decimals",
-                                    "outputs": [{"name": "", "type": "uint8"}],
-                                    "type": "function"
-                                }]
-                            )
-                            token_decimals = contract.functions.decimals().call()
-                        except Exception as e:
-                            logger.warning(f"Could not get token decimals, using default 18: {e}")
-
-                        # Convert raw amount to actual amount using decimals
-                        actual_amount = amount / (10 ** token_decimals)
-
-                        # Log successful transfer processing
-                        logger.info(f"Processed transfer of {token_info.symbol}: {actual_amount} (raw: {amount}, decimals: {token_decimals})")
-
-                        transfers.append(TokenTransfer(
-                            token=token_info,
-                            from_address=from_addr,
-                            to_address=to_addr,
-                            amount=actual_amount,  # Use the converted amount
-                            operation='SELL' if from_addr.lower() == transaction['from'].lower() else 'BUY'
-                        ))
-                        processed_tokens.add(token_address.lower())
+                        token_info = get_token_info(token_address)
+                        if token_info:
+                            break
                     except Exception as e:
-                        logger.error(f"Error processing transfer amount: {e}")
-                        continue
-
+                        if attempt == 2:
+                            logger.error(f"Failed to get token info for {token_address}: {e}")
+                        time.sleep(1)
+
+                if not token_info:
+                    continue
+
+                # Convert raw delta to actual amount using decimals
+                token_decimals = get_token_decimals(token_address)
+                actual_amount = abs(delta) / (10 ** token_decimals)
+                operation = 'BUY' if delta > 0 else 'SELL'
+
+                logger.info(f"Net {operation} of {token_info.symbol}: {actual_amount} (raw: {delta}, decimals: {token_decimals})")
+
+                transfers.append(TokenTransfer(
+                    token=token_info,
+                    from_address=transaction['to'] if operation == 'BUY' else wallet,
+                    to_address=wallet if operation == 'BUY' else transaction['to'],
+                    amount=actual_amount,
+                    operation=operation
+                ))
             except Exception as e:
-                logger.error(f"Error processing log entry: {e}")
+                logger.error(f"Error processing net flow of {token_address}: {e}")
                 continue
 
         # Create and return transaction event
@@ -1,4 +1,5 @@
-from .character_template import CharacterAnalyzer, Personality
+from .character_template import AnalysisStats, AsyncCharacterAnalyzer, CharacterAnalyzer, Personality
+from .llm_cache import LLMCache
 from .config import load_config
 
-__all__ = ['CharacterAnalyzer', 'Personality', 'load_config']
\ No newline at end of file
+__all__ = ['AnalysisStats', 'AsyncCharacterAnalyzer', 'CharacterAnalyzer', 'LLMCache', 'Personality', 'load_config']
\ No newline at end of file
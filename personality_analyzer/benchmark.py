@@ -0,0 +1,180 @@
+import asyncio
+import json
+import random
+import statistics
+import sys
+import threading
+import time
+from aiohttp import web
+from personality_analyzer.character_template import AnalysisStats, AsyncCharacterAnalyzer, CharacterAnalyzer
+from personality_analyzer.config import load_config
+from personality_analyzer.sampling import sample_posts
+
+# Benchmark configuration
+HOST = "127.0.0.1"
+PORT = 8182
+CONCURRENT_ANALYSES = 20
+COMPLETION_DELAY = 1.0  # Simulated OpenAI response time in seconds
+HANDLER_INTERVAL = 0.05  # A handler runs this often while analyses are in flight
+
+POSTS = [f"Post number {i} about coding, coffee and open source ☕" for i in range(20)]
+LARGE_CHANNEL = [f"Post number {i}: " + "long thoughts about markets and code " * 20 for i in range(1000)]
+CHUNK_TOKENS = 6000
+SAMPLE_TOKENS = 12000
+
+ANALYSIS = json.dumps({
+    "name": "Anonymous",
+    "traits": ["curious"],
+    "interests": ["coding"],
+    "communication_style": "casual",
+    "changes_noted": []
+})
+
+async def fake_completion(request: web.Request) -> web.Response:
+    """Answer like the chat completions endpoint, after a delay"""
+    await asyncio.sleep(COMPLETION_DELAY)
+    return web.json_response({
+        "id": "chatcmpl-benchmark",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": "gpt-3.5-turbo",
+        "choices": [{
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": ANALYSIS}
+        }]
+    })
+
+def start_fake_openai() -> None:
+    """Serve the fake endpoint from its own thread and loop, the sync analyzer blocks the main loop"""
+    ready = threading.Event()
+
+    def serve_forever():
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        app = web.Application()
+        app.router.add_post("/v1/chat/completions", fake_completion)
+        runner = web.AppRunner(app)
+        loop.run_until_complete(runner.setup())
+        loop.run_until_complete(web.TCPSite(runner, HOST, PORT).start())
+        ready.set()
+        loop.run_forever()
+
+    threading.Thread(target=serve_forever, daemon=True).start()
+    ready.wait()
+
+async def measure_handlers(done: asyncio.Event) -> list:
+    """Run a trivial handler periodically and record how late it starts"""
+    latencies = []
+    while not done.is_set():
+        scheduled = time.monotonic()
+        await asyncio.sleep(HANDLER_INTERVAL)
+        latencies.append(time.monotonic() - scheduled - HANDLER_INTERVAL)
+    return latencies
+
+async def run(name: str, analyze) -> None:
+    done = asyncio.Event()
+    handlers = asyncio.create_task(measure_handlers(done))
+    started = time.monotonic()
+    await asyncio.gather(*(analyze() for _ in range(CONCURRENT_ANALYSES)))
+    elapsed = time.monotonic() - started
+    done.set()
+    latencies = await handlers
+
+    print(f"{name}: {CONCURRENT_ANALYSES} analyses in {elapsed:.1f}s")
+    if latencies:
+        print(
+            f"  Handler delay: mean {statistics.mean(latencies) * 1000:.1f} ms, "
+            f"max {max(latencies) * 1000:.1f} ms over {len(latencies)} runs"
+        )
+
+def synthetic_channel(size: int = 10000) -> list:
+    """Posts on a few recurring topics, a third of them near-duplicate announcements"""
+    rng = random.Random(0)
+    topics = [
+        ["bitcoin", "etf", "halving", "miners", "hashrate", "btc", "cycle", "supply"],
+        ["python", "asyncio", "refactoring", "tests", "bugfix", "release", "typing", "profiling"],
+        ["coffee", "morning", "espresso", "beans", "roast", "cafe", "latte", "brew"],
+        ["base", "onchain", "swap", "liquidity", "memecoin", "airdrop", "wallet", "gas"],
+        ["running", "marathon", "pace", "training", "shoes", "recovery", "intervals", "hills"]
+    ]
+    posts = []
+    for i in range(size):
+        if i % 3 == 0:
+            posts.append(f"📢 Join our AMA tomorrow at 5pm UTC! Giveaway #{i % 7} for all subscribers")
+        else:
+            words = topics[i % len(topics)]
+            posts.append(" ".join(rng.choice(words) for _ in range(rng.randint(15, 60))))
+    return posts
+
+def overlap(first, second) -> float:
+    """Share of traits and interests two profiles have in common"""
+    first_items = {item.lower() for item in first.traits + first.interests}
+    second_items = {item.lower() for item in second.traits + second.interests}
+    return len(first_items & second_items) / max(len(first_items | second_items), 1)
+
+async def compare_sampling(analyzer: AsyncCharacterAnalyzer, posts: list) -> None:
+    """Analyze all posts and a sample of them, report tokens, latency and profile overlap"""
+    started = time.monotonic()
+    sample = sample_posts(posts, SAMPLE_TOKENS, analyzer.model)
+    print(f"Sampling {len(posts)} posts: {len(sample)} selected in {(time.monotonic() - started) * 1000:.0f} ms")
+
+    full_stats, sampled_stats = AnalysisStats(), AnalysisStats()
+    full = await analyzer.analyze_posts(posts, stats=full_stats)
+    analyzer.sample_tokens = SAMPLE_TOKENS
+    sampled = await analyzer.analyze_posts(posts, stats=sampled_stats)
+    analyzer.sample_tokens = 0
+
+    print(f"  Full:    {full_stats.format()}")
+    print(f"  Sampled: {sampled_stats.format()}")
+    print(f"  Trait and interest overlap: {overlap(full, sampled):.0%}")
+
+async def main():
+    start_fake_openai()
+    base_url = f"http://{HOST}:{PORT}/v1"
+
+    sync_analyzer = CharacterAnalyzer(api_key="benchmark")
+    sync_analyzer.client.base_url = base_url
+    async_analyzer = AsyncCharacterAnalyzer(api_key="benchmark", max_concurrent=CONCURRENT_ANALYSES)
+    async_analyzer.client.base_url = base_url
+
+    async def analyze_sync():
+        # What handlers did before: the blocking call runs on the event loop
+        sync_analyzer.analyze_posts(POSTS)
+
+    async def analyze_async():
+        await async_analyzer.analyze_posts(POSTS)
+
+    await run("Sync analyzer", analyze_sync)
+    await run("Async analyzer", analyze_async)
+
+    # Map-reduce over a channel that does not fit into one request
+    chunked_analyzer = AsyncCharacterAnalyzer(api_key="benchmark", chunk_tokens=CHUNK_TOKENS)
+    chunked_analyzer.client.base_url = base_url
+    stats = AnalysisStats()
+    await chunked_analyzer.analyze_posts(LARGE_CHANNEL, stats=stats)
+    print(f"Map-reduce over {len(LARGE_CHANNEL)} posts: {stats.format()}")
+
+    # Token usage of a representative sample against the full channel (the mock profiles are all equal)
+    await compare_sampling(chunked_analyzer, synthetic_channel())
+    await chunked_analyzer.close()
+
+    if len(sys.argv) > 2 and sys.argv[1] == "--live":
+        # Profile quality needs the real model: python -m personality_analyzer.benchmark --live <channel>_posts.jsonl
+        with open(sys.argv[2], 'r', encoding='utf-8') as f:
+            posts = [json.loads(line)["text"] for line in f if line.strip()]
+        config = load_config()
+        live_analyzer = AsyncCharacterAnalyzer(
+            api_key=config["openai"]["api_key"],
+            model=config["openai"]["model"],
+            temperature=0,
+            chunk_tokens=CHUNK_TOKENS
+        )
+        await compare_sampling(live_analyzer, posts)
+        await live_analyzer.close()
+
+    await async_analyzer.close()
+
+if __name__ == "__main__":
+    # Run from the repository root: python -m personality_analyzer.benchmark
+    asyncio.run(main())
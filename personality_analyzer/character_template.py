@@ -1,8 +1,14 @@
-from dataclasses import dataclass
-from typing import List, Optional
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 import json
+import time
 from datetime import datetime
-from openai import OpenAI
+import asyncio
+import httpx
+from openai import AsyncOpenAI, OpenAI
+from .llm_cache import LLMCache, cache_key
+from .sampling import sample_posts
+from .tokens import count_tokens, split_by_tokens
 import logging
 
 logger = logging.getLogger(__name__)
@@ -30,26 +36,53 @@ class Personality:
         data = json.loads(json_str)
         return cls(**data)
 
-class CharacterAnalyzer:
-    """Class for analyzing text content and generating personality profiles"""
+@dataclass
+class StageStats:
+    """Token usage and latency of one analysis stage"""
+    calls: int = 0
+    cached: int = 0  # Calls answered from the response cache, not counted in tokens
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    seconds: float = 0.0  # Wall time of the stage, concurrent calls overlap
 
-    def __init__(self, api_key: str, model: str = "gpt-3.5-turbo", temperature: float = 0.7):
-        """Initialize with OpenAI API key and optional parameters"""
-        self.client = OpenAI(api_key=api_key)
-        self.model = model
-        self.temperature = temperature
+@dataclass
+class AnalysisStats:
+    """Per-stage report of a map-reduce analysis"""
+    posts: int = 0
+    sampled: int = 0  # Posts left after sampling
+    chunks: int = 0
+    map: StageStats = field(default_factory=StageStats)
+    reduce: StageStats = field(default_factory=StageStats)
 
-    def analyze_posts(self, posts: List[str], previous_personality: Optional[Personality] = None) -> Personality:
-        """
-        Analyze array of posts and generate or update a personality profile
+    def format(self) -> str:
+        return (
+            f"{self.sampled} of {self.posts} posts in {self.chunks} chunks; "
+            f"map: {self.map.calls} calls ({self.map.cached} cached), {self.map.prompt_tokens}+{self.map.completion_tokens} tokens, {self.map.seconds:.1f}s; "
+            f"reduce: {self.reduce.calls} calls ({self.reduce.cached} cached), {self.reduce.prompt_tokens}+{self.reduce.completion_tokens} tokens, {self.reduce.seconds:.1f}s"
+        )
 
-        Args:
-            posts: List of text posts to analyze
-            previous_personality: Optional existing personality to update
+PROFILE_FORMAT = """{{
+                "name": "{name}",
+                "traits": ["trait1", "trait2", ...],
+                "interests": ["interest1", "interest2", ...],
+                "communication_style": "detailed description",
+                "changes_noted": [{changes}]
+            }}"""
 
-        Returns:
-            Updated or new Personality object
+POST_SYSTEM_MESSAGE = """You are a social media content creator. Generate a post that matches the given personality traits,
+            interests, and communication style. The post should be authentic, engaging, and include relevant emojis."""
+
+class _AnalyzerPrompts:
+    """Prompt building and response parsing shared by the sync and async analyzers"""
+
+    def _analysis_request(self, posts: List[str], previous_personality: Optional[Personality],
+                          total_posts: Optional[int] = None) -> Tuple[list, tuple]:
+        """
+        Build chat messages for an analysis, return them with (post_count, created_at, current_time)
+
+        `total_posts` counts the posts the messages stand for when `posts` is a sample of them.
         """
+        total_posts = len(posts) if total_posts is None else total_posts
         combined_text = "\n".join(posts)
         current_time = datetime.utcnow().isoformat()
 
@@ -75,7 +108,7 @@ class CharacterAnalyzer:
                 "changes_noted": ["change1", "change2", ...]
             }}"""
 
-            post_count = previous_personality.post_count + len(posts)
+            post_count = previous_personality.post_count + total_posts
             created_at = previous_personality.created_at
         else:
             system_message = """You are a personality analyzer. Analyze the social media posts and create a detailed personality profile."""
@@ -92,19 +125,18 @@ class CharacterAnalyzer:
                 "changes_noted": []
             }}"""
 
-            post_count = len(posts)
+            post_count = total_posts
             created_at = current_time
 
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": system_message},
-                {"role": "user", "content": user_message}
-            ],
-            temperature=self.temperature
-        )
+        messages = [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": user_message}
+        ]
+        return messages, (post_count, created_at, current_time)
 
-        analysis = json.loads(response.choices[0].message.content.strip())
+    def _parse_analysis(self, content: str, previous_personality: Optional[Personality], context: tuple) -> Personality:
+        post_count, created_at, current_time = context
+        analysis = json.loads(content.strip())
 
         # Store any noted changes in raw_analysis
         raw_analysis = {
@@ -125,18 +157,77 @@ class CharacterAnalyzer:
             raw_analysis=raw_analysis
         )
 
+    def _merge_request(self, partials: List[dict], previous_personality: Optional[Personality]) -> list:
+        """Build chat messages that merge partial profiles of one channel into one"""
+        profiles = "\n".join(json.dumps(partial, ensure_ascii=False) for partial in partials)
+        system_message = """You are a personality analyzer. You will be given partial personality profiles, each made from a
+            different slice of the same channel's posts. Merge them into one profile: keep traits and interests that recur,
+            drop one-off details and describe the overall communication style."""
+
+        if previous_personality:
+            user_message = f"""Previous personality analysis:
+            Traits: {', '.join(previous_personality.traits)}
+            Interests: {', '.join(previous_personality.interests)}
+            Communication Style: {previous_personality.communication_style}
+
+            Partial profiles from new posts:
+            {profiles}
+
+            Update the previous analysis with the partial profiles and provide it in valid JSON format with the following structure:
+            {PROFILE_FORMAT.format(name=previous_personality.name, changes='"change1", "change2", ...')}"""
+        else:
+            user_message = f"""Partial profiles:
+            {profiles}
+
+            Provide the merged analysis in valid JSON format with the following structure:
+            {PROFILE_FORMAT.format(name="Anonymous", changes="")}"""
+
+        return [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": user_message}
+        ]
+
+    def _post_messages(self, prompt: str) -> list:
+        return [
+            {"role": "system", "content": POST_SYSTEM_MESSAGE},
+            {"role": "user", "content": prompt}
+        ]
+
+class CharacterAnalyzer(_AnalyzerPrompts):
+    """Class for analyzing text content and generating personality profiles"""
+
+    def __init__(self, api_key: str, model: str = "gpt-3.5-turbo", temperature: float = 0.7,
+                 http_client: Optional[httpx.Client] = None):
+        """Initialize with OpenAI API key and optional parameters, pass `http_client` to share a connection pool"""
+        self.client = OpenAI(api_key=api_key, http_client=http_client)
+        self.model = model
+        self.temperature = temperature
+
+    def analyze_posts(self, posts: List[str], previous_personality: Optional[Personality] = None) -> Personality:
+        """
+        Analyze array of posts and generate or update a personality profile
+
+        Args:
+            posts: List of text posts to analyze
+            previous_personality: Optional existing personality to update
+
+        Returns:
+            Updated or new Personality object
+        """
+        messages, context = self._analysis_request(posts, previous_personality)
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=self.temperature
+        )
+        return self._parse_analysis(response.choices[0].message.content, previous_personality, context)
+
     def generate_post(self, prompt: str) -> Optional[str]:
         """Generate a post based on the given prompt"""
         try:
-            system_message = """You are a social media content creator. Generate a post that matches the given personality traits,
-            interests, and communication style. The post should be authentic, engaging, and include relevant emojis."""
-
             response = self.client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {"role": "system", "content": system_message},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=self._post_messages(prompt),
                 temperature=self.temperature,
                 max_tokens=150
             )
@@ -147,4 +238,294 @@ class CharacterAnalyzer:
 
         except Exception as e:
             logger.error(f"Error generating post: {e}", exc_info=True)
-            raise ValueError("Failed to generate post")
\ No newline at end of file
+            raise ValueError("Failed to generate post")
+
+class AsyncCharacterAnalyzer(_AnalyzerPrompts):
+    """Non-blocking analyzer for use inside the bot's event loop
+
+    Requests go through one pooled AsyncOpenAI client, each with its own
+    timeout. At most `max_concurrent` requests run at a time, the rest wait
+    for a slot. Cancelling the awaiting task aborts the request.
+
+    With `sample_tokens`, larger inputs are first reduced to a representative
+    sample of that size. Posts that do not fit into `chunk_tokens` are
+    analyzed map-reduce style:
+    every chunk gets its own partial profile (concurrently), then partial
+    profiles are merged, at most `reduce_fan_in` per request, until one is
+    left.
+
+    With a `cache`, identical requests (same model, temperature and
+    messages) are answered from it, and concurrent identical requests share
+    one call. Pass `use_cache=False` to get a fresh answer, it replaces the
+    cached one.
+    """
+
+    def __init__(self, api_key: str, model: str = "gpt-3.5-turbo", temperature: float = 0.7,
+                 http_client: Optional[httpx.AsyncClient] = None, timeout: float = 60.0,
+                 max_concurrent: int = 8, chunk_tokens: int = 6000, reduce_fan_in: int = 8,
+                 sample_tokens: int = 0, cache: Optional[LLMCache] = None):
+        self.client = AsyncOpenAI(api_key=api_key, http_client=http_client)
+        self.model = model
+        self.temperature = temperature
+        self.timeout = timeout
+        self.chunk_tokens = chunk_tokens
+        self.reduce_fan_in = max(2, reduce_fan_in)
+        self.sample_tokens = sample_tokens
+        self.cache = cache
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._pending: Dict[str, asyncio.Future] = {}  # cache key -> in-flight request
+
+    async def _request_choices(self, messages: list, stage: StageStats, timeout: Optional[float], **params) -> List[str]:
+        """Run one chat completion, return the content of every choice and add token usage to the stage"""
+        async with self._semaphore:
+            response = await self.client.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                temperature=self.temperature,
+                timeout=timeout or self.timeout,
+                **params
+            )
+        contents = [choice.message.content for choice in response.choices if choice.message.content]
+        stage.calls += 1
+        if response.usage:
+            stage.prompt_tokens += response.usage.prompt_tokens
+            stage.completion_tokens += response.usage.completion_tokens
+        else:
+            stage.prompt_tokens += sum(count_tokens(message["content"], self.model) for message in messages)
+            stage.completion_tokens += sum(count_tokens(content, self.model) for content in contents)
+        return contents
+
+    async def _request(self, messages: list, stage: StageStats, timeout: Optional[float], **params) -> Optional[str]:
+        contents = await self._request_choices(messages, stage, timeout, **params)
+        return contents[0] if contents else None
+
+    async def _complete(self, messages: list, stage: StageStats, timeout: Optional[float],
+                        use_cache: bool = True, **params) -> Optional[str]:
+        """Get a chat completion, from the cache when allowed"""
+        if not self.cache:
+            return await self._request(messages, stage, timeout, **params)
+
+        key = cache_key(self.model, self.temperature, messages, **params)
+        if use_cache and key in self._pending:
+            stage.calls += 1
+            stage.cached += 1
+            return await asyncio.shield(self._pending[key])
+
+        # Registered before the cache lookup, so identical requests arriving meanwhile wait for this one
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            content = await self.cache.get(key) if use_cache else None
+            if content is not None:
+                stage.calls += 1
+                stage.cached += 1
+            else:
+                content = await self._request(messages, stage, timeout, **params)
+                if content:
+                    await self.cache.put(key, content)
+            future.set_result(content)
+            return content
+        except BaseException as e:
+            # Waiters see the same failure, a cancelled request cancels them too
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # Mark retrieved, there may be no waiters
+            raise
+        finally:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+    @staticmethod
+    def _parse_partial(content: Optional[str], stage: str) -> Optional[dict]:
+        """Parse a partial profile, None (logged) when the response is empty or not a JSON object"""
+        if not content:
+            logger.warning(f"Skipping empty {stage} response")
+            return None
+        try:
+            partial = json.loads(content.strip())
+        except json.JSONDecodeError as e:
+            logger.warning(f"Skipping invalid {stage} response: {e}")
+            return None
+        if not isinstance(partial, dict):
+            logger.warning(f"Skipping {stage} response without a profile: {content!r:.100}")
+            return None
+        return partial
+
+    async def _map(self, chunks: List[List[str]], stats: AnalysisStats, timeout: Optional[float],
+                   use_cache: bool) -> List[dict]:
+        """Get a partial profile per chunk, chunks whose response can't be parsed are left out"""
+        started = time.monotonic()
+
+        async def analyze_chunk(chunk: List[str]) -> Optional[dict]:
+            messages, _ = self._analysis_request(chunk, None)
+            return self._parse_partial(await self._complete(messages, stats.map, timeout, use_cache), "map")
+
+        try:
+            partials = [partial for partial in await asyncio.gather(*(analyze_chunk(chunk) for chunk in chunks)) if partial]
+        finally:
+            stats.map.seconds += time.monotonic() - started
+        if not partials:
+            raise ValueError(f"None of {len(chunks)} chunks could be analyzed")
+        return partials
+
+    async def _reduce(self, partials: List[dict], previous_personality: Optional[Personality],
+                      stats: AnalysisStats, timeout: Optional[float], use_cache: bool) -> str:
+        """Merge partial profiles level by level, return the final response content"""
+        started = time.monotonic()
+        try:
+            while len(partials) > self.reduce_fan_in:
+                groups = [partials[i:i + self.reduce_fan_in] for i in range(0, len(partials), self.reduce_fan_in)]
+                merged = await asyncio.gather(*(
+                    self._complete(self._merge_request(group, None), stats.reduce, timeout, use_cache)
+                    for group in groups
+                ))
+                partials = [partial for partial in (self._parse_partial(content, "reduce") for content in merged) if partial]
+                if not partials:
+                    raise ValueError(f"None of {len(groups)} merges returned a profile")
+            return await self._complete(
+                self._merge_request(partials, previous_personality), stats.reduce, timeout, use_cache
+            )
+        finally:
+            stats.reduce.seconds += time.monotonic() - started
+
+    async def analyze_posts(
+        self,
+        posts: List[str],
+        previous_personality: Optional[Personality] = None,
+        timeout: Optional[float] = None,
+        stats: Optional[AnalysisStats] = None,
+        use_cache: bool = True
+    ) -> Personality:
+        """
+        Analyze posts and generate or update a personality profile
+
+        Args:
+            posts: List of text posts to analyze
+            previous_personality: Optional existing personality to update
+            timeout: Seconds per OpenAI request, defaults to the analyzer timeout
+            stats: Filled with token usage and latency per stage
+            use_cache: Reuse cached responses, False requests fresh ones
+
+        Returns:
+            Updated or new Personality object
+        """
+        stats = stats if stats is not None else AnalysisStats()
+        stats.posts = len(posts)
+        sample = posts
+        if self.sample_tokens:
+            # Vectorizing thousands of posts takes a moment of CPU, keep it off the event loop
+            sample = await asyncio.to_thread(sample_posts, posts, self.sample_tokens, self.model)
+        stats.sampled = len(sample)
+
+        messages, context = self._analysis_request(sample, previous_personality, total_posts=len(posts))
+        chunks = split_by_tokens(sample, self.chunk_tokens, self.model)
+        stats.chunks = len(chunks)
+
+        if len(chunks) <= 1:
+            # Fits into one request, no merge needed
+            started = time.monotonic()
+            content = await self._complete(messages, stats.map, timeout, use_cache)
+            stats.map.seconds += time.monotonic() - started
+        else:
+            partials = await self._map(chunks, stats, timeout, use_cache)
+            content = await self._reduce(partials, previous_personality, stats, timeout, use_cache)
+
+        logger.info(f"Analyzed {len(posts)} posts: {stats.format()}")
+        return self._parse_analysis(content, previous_personality, context)
+
+    async def generate_post(self, prompt: str, timeout: Optional[float] = None, use_cache: bool = True) -> Optional[str]:
+        """Generate a post based on the given prompt, `use_cache=False` forces a new one"""
+        try:
+            content = await self._complete(
+                self._post_messages(prompt), StageStats(), timeout, use_cache=use_cache, max_tokens=150
+            )
+            return content.strip() if content else None
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error generating post: {e}", exc_info=True)
+            raise ValueError("Failed to generate post")
+
+    async def stream_post(self, prompt: str, timeout: Optional[float] = None, use_cache: bool = True) -> AsyncIterator[str]:
+        """Generate a post, yielding the text so far each time a chunk arrives
+
+        Shares cache entries with generate_post, a cached post is yielded at once.
+        """
+        messages = self._post_messages(prompt)
+        key = cache_key(self.model, self.temperature, messages, max_tokens=150) if self.cache else None
+        if key and use_cache:
+            content = await self.cache.get(key)
+            if content is not None:
+                yield content.strip()
+                return
+
+        # The response is read by its own task, so a slow consumer does not hold a request slot
+        deltas: asyncio.Queue = asyncio.Queue()
+        reader = asyncio.create_task(self._read_stream(messages, timeout, deltas))
+        reader.add_done_callback(lambda task: task.cancelled() or task.exception())  # Also when the consumer stopped early
+        text, shown = "", ""
+        try:
+            while True:
+                received = [await deltas.get()]
+                while not deltas.empty():  # Chunks that arrived meanwhile are yielded together
+                    received.append(deltas.get_nowait())
+                text += "".join(delta for delta in received if delta)
+                if text.strip() != shown:
+                    shown = text.strip()
+                    yield shown
+                if received[-1] is None:
+                    break
+            await reader  # Raises the error the request failed with
+        except (asyncio.CancelledError, GeneratorExit):
+            raise
+        except Exception as e:
+            logger.error(f"Error streaming post: {e}", exc_info=True)
+            raise ValueError("Failed to generate post")
+        finally:
+            if not reader.done():
+                reader.cancel()  # Consumer stopped early, close the response
+
+        if key and text:
+            await self.cache.put(key, text)
+
+    async def _read_stream(self, messages: list, timeout: Optional[float], deltas: asyncio.Queue) -> None:
+        """Put the text chunks of a streamed completion into deltas, then None"""
+        try:
+            async with self._semaphore:
+                stream = await self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages,
+                    temperature=self.temperature,
+                    max_tokens=150,
+                    timeout=timeout or self.timeout,
+                    stream=True
+                )
+                async with stream:
+                    async for chunk in stream:
+                        delta = chunk.choices[0].delta.content if chunk.choices else None
+                        if delta:
+                            deltas.put_nowait(delta)
+        finally:
+            deltas.put_nowait(None)
+
+    async def generate_posts(self, prompt: str, n: int, timeout: Optional[float] = None) -> List[str]:
+        """Generate up to n alternative posts for the prompt in one request, never cached"""
+        try:
+            contents = await self._request_choices(
+                self._post_messages(prompt), StageStats(), timeout, max_tokens=150, n=n
+            )
+            return [content.strip() for content in contents if content.strip()]
+
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error generating posts: {e}", exc_info=True)
+            raise ValueError("Failed to generate posts")
+
+    async def close(self) -> None:
+        if self.cache:
+            self.cache.close()
+        await self.client.close()
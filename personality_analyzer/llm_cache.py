@@ -0,0 +1,96 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+def cache_key(model: str, temperature: float, messages: list, **params) -> str:
+    """Content address of a completion request: hash of everything that shapes the answer"""
+    payload = json.dumps(
+        {"model": model, "temperature": temperature, "messages": messages, **params},
+        ensure_ascii=False, sort_keys=True, separators=(',', ':')
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class LLMCache:
+    """Completion responses keyed by cache_key, shared by all users of the analyzer
+
+    Responses are kept in an LRU of at most `max_entries` and expire after
+    `ttl` seconds. With a `path`, they are also written to SQLite, so they
+    survive restarts and entries evicted from memory are still found.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 86400, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (created_at, content)
+        self._db_lock = threading.Lock()
+        self._db = None
+        self.stats = {"hits": 0, "misses": 0}
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, created_at REAL NOT NULL, content TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    def _remember(self, key: str, entry: tuple) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _db_put(self, key: str, entry: tuple) -> None:
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, created_at, content) VALUES (?1, ?2, ?3)",
+                (key, *entry)
+            )
+            # Expired rows are dropped on write, so the file stays bounded by the TTL
+            self._db.execute("DELETE FROM responses WHERE created_at < ?1", (time.time() - self.ttl,))
+            self._db.commit()
+
+    def _db_get(self, key: str) -> Optional[tuple]:
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT created_at, content FROM responses WHERE key = ?1", (key,)
+            ).fetchone()
+
+    async def get(self, key: str) -> Optional[str]:
+        """Get cached response, None when unknown or expired"""
+        entry = self._entries.get(key)
+        if entry is None and self._db:
+            entry = await asyncio.to_thread(self._db_get, key)
+        if entry is None or time.time() - entry[0] > self.ttl:
+            self._entries.pop(key, None)
+            self.stats["misses"] += 1
+            return None
+
+        self._remember(key, tuple(entry))
+        self.stats["hits"] += 1
+        return entry[1]
+
+    async def put(self, key: str, content: str) -> None:
+        entry = (time.time(), content)
+        self._remember(key, entry)
+        if self._db:
+            try:
+                await asyncio.to_thread(self._db_put, key, entry)
+            except sqlite3.Error as e:
+                logger.error(f"Could not persist LLM response: {e}")
+
+    def close(self) -> None:
+        if self._db:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
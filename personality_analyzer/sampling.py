@@ -0,0 +1,179 @@
+import logging
+import re
+import time
+import zlib
+from functools import lru_cache
+from itertools import chain
+from typing import Dict, List, Tuple
+import numpy as np
+from .tokens import count_tokens, truncate_to_tokens
+
+logger = logging.getLogger(__name__)
+
+WORD_PATTERN = re.compile(r"\w+")
+N_FEATURES = 2 ** 20  # Hashed unigram and bigram ids, document frequencies are counted per id
+HASHED_DIMENSIONS = 256  # Signed buckets the weighted n-grams are summed into
+N_COMPONENTS = 64  # Random projection size, also the SimHash signature length
+SEED = 0  # Fixed, so the same posts always give the same sample
+
+@lru_cache(maxsize=1)
+def _projection(dimensions: int, n_components: int) -> np.ndarray:
+    rng = np.random.default_rng(SEED)
+    return rng.standard_normal((dimensions, n_components)).astype(np.float32) / np.sqrt(n_components)
+
+def _hashed_ngrams(posts: List[str], n_features: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Post index and hashed feature of every word unigram and bigram"""
+    words_per_post = [WORD_PATTERN.findall(post.lower()) for post in posts]
+    lengths = np.fromiter(map(len, words_per_post), dtype=np.int64, count=len(posts))
+
+    # Each distinct word is hashed once, words are mapped to their hash by id (loops stay in C)
+    words = list(chain.from_iterable(words_per_post))
+    vocabulary: Dict[str, int] = {word: i for i, word in enumerate(dict.fromkeys(words))}
+    word_ids = np.fromiter(map(vocabulary.__getitem__, words), dtype=np.int64, count=len(words))
+    word_hashes = np.fromiter(
+        (zlib.crc32(word.encode()) for word in vocabulary), dtype=np.uint64, count=len(vocabulary)
+    )
+
+    rows = np.repeat(np.arange(len(posts), dtype=np.int64), lengths)
+    unigrams = word_hashes[word_ids]
+    # Bigrams combine the hashes of neighbouring words of the same post
+    same_post = rows[1:] == rows[:-1]
+    bigrams = (unigrams[:-1][same_post] * np.uint64(1000003)) ^ unigrams[1:][same_post]
+    features = np.concatenate([unigrams, bigrams]) % np.uint64(n_features)
+    return np.concatenate([rows, rows[:-1][same_post]]), features.astype(np.int64)
+
+def post_vectors(posts: List[str], n_features: int = N_FEATURES) -> np.ndarray:
+    """
+    Unit vectors of the posts' TF-IDF weighted hashed n-grams
+
+    The sparse TF-IDF matrix is never built: weights are summed into signed
+    hash buckets (the hashing trick) and reduced further by a random
+    projection, both preserve distances well enough for sampling.
+    """
+    rows, features = _hashed_ngrams(posts, n_features)
+    keys, counts = np.unique(rows * n_features + features, return_counts=True)
+    rows, features = keys // n_features, keys % n_features
+
+    document_frequency = np.bincount(features, minlength=n_features)
+    idf = np.log((1 + len(posts)) / (1 + document_frequency))
+    weights = np.log1p(counts) * idf[features]
+
+    # Low bits pick the bucket, a higher bit the sign, so colliding features tend to cancel out
+    buckets = features % HASHED_DIMENSIONS
+    signs = np.where((features // HASHED_DIMENSIONS) % 2, 1.0, -1.0)
+    hashed = np.bincount(
+        rows * HASHED_DIMENSIONS + buckets,
+        weights=weights * signs,
+        minlength=len(posts) * HASHED_DIMENSIONS
+    ).reshape(len(posts), HASHED_DIMENSIONS).astype(np.float32)
+
+    vectors = hashed @ _projection(HASHED_DIMENSIONS, N_COMPONENTS)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+def near_duplicate_groups(vectors: np.ndarray) -> np.ndarray:
+    """Group id per post, posts with the same SimHash signature (signs of the projection) share a group"""
+    signatures = np.packbits(vectors > 0, axis=1)
+    _, groups = np.unique(signatures, axis=0, return_inverse=True)
+    return groups.reshape(-1)
+
+def _cluster(points: np.ndarray, weights: np.ndarray, k: int, iterations: int = 5) -> np.ndarray:
+    """Weighted k-means with k-means++ seeding, return the cluster of every point"""
+    rng = np.random.default_rng(SEED)
+    k = min(k, len(points))
+    squared_norms = (points ** 2).sum(axis=1)
+
+    def squared_distances(center: np.ndarray) -> np.ndarray:
+        # Expanded form, a matrix-vector product instead of an n x dimensions temporary
+        return np.maximum(squared_norms - 2 * (points @ center) + center @ center, 0)
+
+    centers = np.empty((k, points.shape[1]), dtype=points.dtype)
+    centers[0] = points[rng.choice(len(points), p=weights / weights.sum())]
+    distances = squared_distances(centers[0])
+    # One uniform draw per seed, mapped onto the cumulative scores
+    draws = rng.random(k)
+    for i in range(1, k):
+        cumulative = np.cumsum(distances * weights)
+        if cumulative[-1] <= 0:
+            centers = centers[:i]  # Fewer distinct points than clusters
+            break
+        chosen = min(int(np.searchsorted(cumulative, draws[i] * cumulative[-1], side="right")), len(points) - 1)
+        centers[i] = points[chosen]
+        np.minimum(distances, squared_distances(centers[i]), out=distances)
+
+    dimensions = points.shape[1]
+    weighted_points = (points * weights[:, None]).ravel()
+    for _ in range(iterations):
+        clusters = np.argmin((centers ** 2).sum(axis=1)[None, :] - 2 * points @ centers.T, axis=1)
+        cluster_weights = np.bincount(clusters, weights=weights, minlength=len(centers))
+        # Per-cluster sums of every dimension in one bincount
+        sums = np.bincount(
+            (clusters[:, None] * dimensions + np.arange(dimensions)).ravel(),
+            weights=weighted_points,
+            minlength=len(centers) * dimensions
+        ).reshape(len(centers), dimensions)
+        occupied = cluster_weights > 0
+        centers[occupied] = (sums[occupied] / cluster_weights[occupied, None]).astype(points.dtype)
+    return np.argmin((centers ** 2).sum(axis=1)[None, :] - 2 * points @ centers.T, axis=1)
+
+def sample_posts(posts: List[str], max_tokens: int, model: str = "gpt-3.5-turbo") -> List[str]:
+    """
+    Pick a diverse, representative sample of posts that fits into max_tokens
+
+    Near-duplicates (same SimHash of the post vector) are collapsed first.
+    The remaining posts are clustered with k-means, weighted by how many
+    duplicates each one stands for. The post closest to the middle of a
+    cluster represents it, and the largest clusters are taken first until
+    the budget is used. The sample keeps the original post order.
+
+    Args:
+        posts: Posts to sample from
+        max_tokens: Token budget of the sample
+        model: Model whose tokenizer measures the budget
+
+    Returns:
+        Sampled posts, all posts when they already fit, one truncated post
+        when none does
+    """
+    tokens = np.array([count_tokens(post, model) + 1 for post in posts])
+    if tokens.sum() <= max_tokens:
+        return list(posts)
+
+    started = time.monotonic()
+    vectors = post_vectors(posts)
+
+    # Collapse near-duplicates into their first post, weighted by group size
+    groups = near_duplicate_groups(vectors)
+    _, unique_index, group_sizes = np.unique(groups, return_index=True, return_counts=True)
+    weights = group_sizes.astype(np.float32)
+    points = vectors[unique_index]
+
+    # Enough clusters to fill the budget with posts of typical length
+    k = max(1, int(max_tokens / max(float(np.median(tokens[unique_index])), 1.0)))
+    clusters = _cluster(points, weights, k)
+    cluster_weights = np.bincount(clusters, weights=weights)
+
+    selected, used, largest = [], 0, None
+    for cluster in np.argsort(-cluster_weights, kind="stable"):
+        members = np.flatnonzero(clusters == cluster)
+        if not len(members):
+            continue
+        mean = (points[members] * weights[members, None]).sum(axis=0) / weights[members].sum()
+        representative = int(unique_index[members[np.argmin(np.linalg.norm(points[members] - mean, axis=1))]])
+        if largest is None:
+            largest = representative
+        if used + tokens[representative] > max_tokens:
+            continue
+        selected.append(representative)
+        used += int(tokens[representative])
+
+    if not selected:
+        # Every representative is larger than the budget, keep the largest cluster's one cut down to it
+        logger.info(f"No post fits into {max_tokens} tokens, truncating one")
+        return [truncate_to_tokens(posts[largest], max(max_tokens - 1, 1), model)]
+
+    logger.info(
+        f"Sampled {len(selected)} of {len(posts)} posts ({len(unique_index)} after deduplication), "
+        f"{used} of {int(tokens.sum())} tokens in {time.monotonic() - started:.2f}s"
+    )
+    return [posts[i] for i in sorted(selected)]
@@ -0,0 +1,59 @@
+import logging
+import math
+from functools import lru_cache
+from typing import List
+
+logger = logging.getLogger(__name__)
+
+# Rough size of a token in characters, used when tiktoken is not installed
+CHARS_PER_TOKEN = 4
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    """tiktoken encoding of the model, None when tiktoken is unavailable"""
+    try:
+        import tiktoken
+    except ImportError:
+        logger.info("tiktoken not installed, estimating token counts from text length")
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("cl100k_base")
+
+def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    """Count tokens of text as the model sees them (estimated without tiktoken)"""
+    encoding = _encoding(model)
+    if encoding is None:
+        return math.ceil(len(text) / CHARS_PER_TOKEN)
+    return len(encoding.encode(text))
+
+def truncate_to_tokens(text: str, max_tokens: int, model: str = "gpt-3.5-turbo") -> str:
+    encoding = _encoding(model)
+    if encoding is None:
+        return text[:max_tokens * CHARS_PER_TOKEN]
+    return encoding.decode(encoding.encode(text)[:max_tokens])
+
+def split_by_tokens(posts: List[str], max_tokens: int, model: str = "gpt-3.5-turbo") -> List[List[str]]:
+    """
+    Split posts into consecutive chunks of at most max_tokens each
+
+    Posts keep their order and are never split between chunks, a post that
+    alone exceeds the budget is truncated.
+    """
+    chunks: List[List[str]] = []
+    chunk: List[str] = []
+    chunk_tokens = 0
+    for post in posts:
+        tokens = count_tokens(post, model) + 1  # Posts are joined with newlines
+        if tokens > max_tokens:
+            post = truncate_to_tokens(post, max_tokens - 1, model)
+            tokens = max_tokens
+        if chunk and chunk_tokens + tokens > max_tokens:
+            chunks.append(chunk)
+            chunk, chunk_tokens = [], 0
+        chunk.append(post)
+        chunk_tokens += tokens
+    if chunk:
+        chunks.append(chunk)
+    return chunks
@@ -11,9 +11,29 @@ from ..bot.states import AddChannel, AddWallet
 from ..bot.responses import AIPersonality
 from ..bot.callbacks import ChannelAction
 from ..services.wallet_service import WalletService
+from ..services.analysis_job_service import AnalysisJobService, AnalysisJob
+from ..services.outbound_queue import USER
 
 logger = logging.getLogger(__name__)
 
+def channel_post_prompt(channel) -> str:
+    """Prompt for a post in the channel's voice, not tied to a transaction"""
+    return f"""Generate a Telegram post with the following characteristics:
+
+Personality Traits: {', '.join(channel.personality.traits[:3])}
+Main Interests: {', '.join(channel.personality.interests[:3])}
+Communication Style: {channel.personality.communication_style}
+
+Requirements:
+1. Match the communication style exactly
+2. Focus on the main interests
+3. Express the personality traits naturally
+4. Be concise and engaging
+5. Include relevant emojis
+6. Format appropriately for Telegram
+
+Generate a single post:"""
+
 def setup_handlers(
     router: Router,
     channel_storage,
@@ -22,47 +42,108 @@ def setup_handlers(
     personality_analyzer,
     log_service,
     wallet_service: WalletService,
-    config: dict
+    config: dict,
+    analysis_job_service: AnalysisJobService
 ) -> None:
     """Setup all bot command handlers"""
 
     # Get bot instance from wallet service since it's already initialized there
     bot = wallet_service.bot
+    outbound_queue = wallet_service.outbound_queue
+
+    async def send_debug_welcome(job: AnalysisJob, personality):
+        """Replace the debug progress message with the welcome message"""
+        await outbound_queue.delete_message(job.chat_id, job.message_id, priority=USER)
+        await outbound_queue.send_message(
+            job.chat_id,
+            AIPersonality.WELCOME_MESSAGE +
+            f"\n\n🔧 Debug Mode: Default channel @{job.channel_username} has been added!\n\n"
+            f"Channel Profile:\n"
+            f"👤 Personality Traits:\n"
+            f"{' • '.join([''] + personality.traits[:3])}\n\n"
+            f"🎯 Main Interests:\n"
+            f"{' • '.join([''] + personality.interests[:3])}\n\n"
+            f"💬 Communication Style:\n"
+            f"{personality.communication_style}\n\n"
+            f"📊 Analysis based on {personality.post_count} messages",
+            priority=USER
+        )
+        logger.info(f"Debug channel added and analyzed: {job.channel_username}")
+
+    async def send_debug_failure(job: AnalysisJob, error: Exception):
+        await outbound_queue.send_message(
+            job.chat_id,
+            AIPersonality.WELCOME_MESSAGE +
+            f"\n\n❌ Debug Mode: Failed to add default channel @{job.channel_username}.",
+            priority=USER
+        )
 
-    async def parse_channel_messages(message: types.Message, channel_username: str):
-        """Parse and analyze channel messages"""
-        try:
-            parsed_messages = await parser_service.parse_channel(channel_username)
+    async def send_channel_profile(job: AnalysisJob, personality):
+        """Replace the progress message with the analyzed channel profile"""
+        await outbound_queue.delete_message(job.chat_id, job.message_id, priority=USER)
+        await outbound_queue.send_message(
+            job.chat_id,
+            f"""✨ Analysis complete!
+
+Channel Profile for {job.channel_username}:
+
+👤 Personality Traits:
+{' • '.join([''] + personality.traits[:3])}
 
-            # Analyze personality
-            personality = personality_analyzer.analyze_posts(parsed_messages)
+🎯 Main Interests:
+{' • '.join([''] + personality.interests[:3])}
 
-            # Update storage with personality
-            channel_storage.update_channel_personality(channel_username, personality)
+💬 Communication Style:
+{personality.communication_style}
 
-            # Save personality to logs
-            log_service.save_personality(channel_username, personality)
+📊 Analysis based on {personality.post_count} messages
 
-            # Log analysis results
-            logger.info(
-                f"Personality analysis for {channel_username}:\n"
-                f"Traits: {', '.join(personality.traits)}\n"
-                f"Interests: {', '.join(personality.interests)}\n"
-                f"Communication Style: {personality.communication_style}"
-            )
+Use /list_channels to see all your channels
+Use /add_wallet to link a wallet to this channel
+            """,
+            priority=USER,
+            reply_to_message_id=job.reply_to_message_id
+        )
 
-            await message.answer(
-                f"""✨ Analysis complete! I've processed {len(parsed_messages)} posts from {channel_username}.
+    async def send_channel_failure(job: AnalysisJob, error: Exception):
+        await outbound_queue.send_message(
+            job.chat_id,
+            "❌ Sorry! I couldn't analyze that channel. Please try again later.",
+            priority=USER,
+            reply_to_message_id=job.reply_to_message_id
+        )
+
+    async def send_analysis_summary(job: AnalysisJob, personality):
+        await outbound_queue.send_message(
+            job.chat_id,
+            f"""✨ Analysis complete! I've processed {job.posts_analyzed} posts from {job.channel_username}.
 
 Personality Profile:
 - Traits: {', '.join(personality.traits[:3])}
 - Main Interests: {', '.join(personality.interests[:3])}
 
 The complete data has been saved!
-                """
-            )
+            """,
+            priority=USER
+        )
+
+    async def send_analysis_failure(job: AnalysisJob, error: Exception):
+        await outbound_queue.send_message(
+            job.chat_id,
+            "Sorry! I encountered an issue while analyzing the channel. Please try again later.",
+            priority=USER
+        )
+
+    analysis_job_service.register_handler("debug", send_debug_welcome, send_debug_failure)
+    analysis_job_service.register_handler("add_channel", send_channel_profile, send_channel_failure)
+    analysis_job_service.register_handler("analyze", send_analysis_summary, send_analysis_failure)
+
+    async def parse_channel_messages(message: types.Message, channel_username: str):
+        """Queue parsing and analysis of channel messages"""
+        try:
+            await analysis_job_service.submit("analyze", channel_username, chat_id=message.chat.id)
         except Exception as e:
-            logger.error(f"Error analyzing messages: {str(e)}", exc_info=True)
+            logger.error(f"Error queueing channel analysis: {str(e)}", exc_info=True)
             await message.answer("Sorry! I encountered an issue while analyzing the channel. Please try again later.")
 
     @router.message(Command("start"))
@@ -79,56 +160,25 @@ The complete data has been saved!
                 )
 
                 # Add default debug channel
-                stored_channel = channel_storage.add_channel(
+                await channel_storage.add_channel(
                     user_id=message.from_user.id,
                     username=debug_channel,
                     title=f"{debug_channel} [Debug Channel]"
                 )
 
-                await processing_msg.edit_text(
-                    f"🔧 Debug Mode: Setting up default channel...\n"
-                    f"1. ✅ Channel added\n"
-                    f"2. Starting personality analysis..."
-                )
-
-                # Parse and analyze channel messages
-                parsed_messages = await parser_service.parse_channel(f"@{debug_channel}")
-
-                await processing_msg.edit_text(
-                    f"🔧 Debug Mode: Setting up default channel...\n"
-                    f"1. ✅ Channel added\n"
-                    f"2. ✅ Messages collected\n"
-                    f"3. Generating personality profile..."
-                )
-
-                # Analyze personality
-                personality = personality_analyzer.analyze_posts(parsed_messages)
-
-                # Update storage with personality
-                channel_storage.update_channel_personality(debug_channel, personality)
-
-                # Save personality to logs
-                log_service.save_personality(debug_channel, personality)
-
-                # Delete processing message
-                await processing_msg.delete()
-
-                # Send welcome message with debug info
-                await message.answer(
-                    AIPersonality.WELCOME_MESSAGE +
-                    f"\n\n🔧 Debug Mode: Default channel @{debug_channel} has been added!\n\n"
-                    f"Channel Profile:\n"
-                    f"👤 Personality Traits:\n"
-                    f"{' • '.join([''] + personality.traits[:3])}\n\n"
-                    f"🎯 Main Interests:\n"
-                    f"{' • '.join([''] + personality.interests[:3])}\n\n"
-                    f"💬 Communication Style:\n"
-                    f"{personality.communication_style}\n\n"
-                    f"📊 Analysis based on {len(parsed_messages)} messages"
+                # Parse and analyze channel messages in the background
+                await analysis_job_service.submit(
+                    "debug",
+                    debug_channel,
+                    chat_id=message.chat.id,
+                    message_id=processing_msg.message_id,
+                    status_text=(
+                        f"🔧 Debug Mode: Setting up default channel...\n"
+                        f"1. ✅ Channel added\n"
+                        f"2. Starting personality analysis..."
+                    )
                 )
 
-                logger.info(f"Debug channel added and analyzed: {stored_channel}")
-
             except Exception as e:
                 logger.error(f"Error adding debug channel: {e}")
                 await message.answer(
@@ -142,6 +192,7 @@ The complete data has been saved!
                 "/add_channel - Add a new channel\n"
                 "/list_channels - View your channels\n"
                 "/add_wallet - Add Base wallet to channel\n"
+                "/remove_wallet - Remove wallet from channel\n"
                 "/generate_post - Generate test post for channel\n"
                 "/help - Show this help message"
             )
@@ -181,73 +232,28 @@ The complete data has been saved!
                 )
 
                 # Store channel information
-                stored_channel = channel_storage.add_channel(
+                stored_channel = await channel_storage.add_channel(
                     user_id=message.from_user.id,
                     username=channel_username[1:],
                     title=channel.title
                 )
+                await channel_storage.set_channel_entity(stored_channel.username, channel.id, channel.access_hash)
                 logger.info(f"Channel stored: {stored_channel}")
 
-                await processing_msg.edit_text(
-                    "⏳ Processing your request...\n"
-                    "1. ✅ Channel verified\n"
-                    "2. ✅ Channel added to database\n"
-                    "3. Starting personality analysis...\n\n"
-                    "🔄 This may take a few minutes. Please wait while I analyze the channel content..."
-                )
-
-                # Parse channel messages and analyze personality
-                parsed_messages = await parser_service.parse_channel(channel_username)
-
-                await processing_msg.edit_text(
-                    "⏳ Processing your request...\n"
-                    "1. ✅ Channel verified\n"
-                    "2. ✅ Channel added to database\n"
-                    "3. ✅ Messages collected\n"
-                    "4. Generating personality profile...\n\n"
-                    f"📊 Analyzing {len(parsed_messages)} messages..."
-                )
-
-                # Analyze personality
-                personality = personality_analyzer.analyze_posts(parsed_messages)
-
-                # Update storage with personality
-                channel_storage.update_channel_personality(channel_username, personality)
-
-                # Save personality to logs
-                log_service.save_personality(channel_username, personality)
-
-                # Log analysis results
-                logger.info(
-                    f"Personality analysis for {channel_username}:\n"
-                    f"Traits: {', '.join(personality.traits)}\n"
-                    f"Interests: {', '.join(personality.interests)}\n"
-                    f"Communication Style: {personality.communication_style}"
-                )
-
-                # Delete processing message
-                await processing_msg.delete()
-
-                # Send final success message
-                await message.reply(
-                    f"""✨ Analysis complete!
-
-Channel Profile for {channel_username}:
-
-👤 Personality Traits:
-{' • '.join([''] + personality.traits[:3])}
-
-🎯 Main Interests:
-{' • '.join([''] + personality.interests[:3])}
-
-💬 Communication Style:
-{personality.communication_style}
-
-📊 Analysis based on {len(parsed_messages)} messages
-
-Use /list_channels to see all your channels
-Use /add_wallet to link a wallet to this channel
-                    """
+                # Parse channel messages and analyze personality in the background
+                await analysis_job_service.submit(
+                    "add_channel",
+                    channel_username,
+                    chat_id=message.chat.id,
+                    message_id=processing_msg.message_id,
+                    reply_to_message_id=message.message_id,
+                    status_text=(
+                        "⏳ Processing your request...\n"
+                        "1. ✅ Channel verified\n"
+                        "2. ✅ Channel added to database\n"
+                        "3. Analyzing channel content...\n\n"
+                        "🔄 This may take a few minutes. I'll send the profile here when it's ready."
+                    )
                 )
 
             except ValueError:
@@ -271,7 +277,7 @@ Use /add_wallet to link a wallet to this channel
     @router.message(Command("add_wallet"))
     async def add_wallet(message: types.Message, state: FSMContext):
         # Get user's channels first
-        channels = channel_storage.get_user_channels(message.from_user.id)
+        channels = await channel_storage.get_user_channels(message.from_user.id)
         logger.info(f"Retrieved channels for user {message.from_user.id}: {channels}")
 
         if not channels:
@@ -361,7 +367,9 @@ Use /add_wallet to link a wallet to this channel
                 return
 
             # Add wallet to storage
-            wallet = channel_storage.add_wallet(channel_username, wallet_address, chain="Base")
+            wallet = await channel_storage.add_wallet(
+                channel_username, wallet_address, chain="Base", user_id=message.from_user.id
+            )
             if wallet:
                 # Subscribe to wallet updates
                 if wallet_service.subscribe_wallet(wallet_address):
@@ -395,6 +403,75 @@ Please try removing and adding the wallet again."""
         finally:
             await state.clear()
 
+    def own_wallets(channel, user_id: int) -> list:
+        """Wallets of a channel the user added (older records belong to the channel's owner)"""
+        return [
+            wallet for wallet in channel.wallets or []
+            if (wallet.user_id if wallet.user_id is not None else channel.user_id) == user_id
+        ]
+
+    @router.message(Command("remove_wallet"))
+    async def remove_wallet(message: types.Message, state: FSMContext):
+        channels = await channel_storage.get_user_channels(message.from_user.id)
+        channels = [channel for channel in channels if own_wallets(channel, message.from_user.id)]
+        if not channels:
+            await message.reply("❌ You haven't added any wallets yet!\n\nUse /add_wallet to link one")
+            return
+
+        builder = InlineKeyboardBuilder()
+        for channel in channels:
+            builder.button(text=f"@{channel.username}", callback_data=f"remove_from:{channel.username}")
+        builder.adjust(1)
+        await message.reply("🔗 Select a channel to remove a wallet from:", reply_markup=builder.as_markup())
+
+    @router.callback_query(lambda c: c.data and c.data.startswith("remove_from:"))
+    async def remove_wallet_channel_selected(callback: types.CallbackQuery, state: FSMContext):
+        try:
+            channel_username = callback.data.split(":", 1)[1]
+            channel = await channel_storage.get_channel(channel_username)
+            wallets = own_wallets(channel, callback.from_user.id) if channel else []
+            if not wallets:
+                await callback.answer("❌ No wallets of yours in this channel", show_alert=True)
+                return
+
+            # The channel stays in the state, a wallet address fills the callback data limit on its own
+            await state.update_data(remove_from=channel.username)
+            builder = InlineKeyboardBuilder()
+            for wallet in wallets:
+                builder.button(text=wallet.address, callback_data=f"remove_wallet:{wallet.address}")
+            builder.adjust(1)
+            await callback.answer()
+            await callback.message.edit_text(
+                f"Selected channel: @{channel.username}\n\n💼 Select the wallet to remove:",
+                reply_markup=builder.as_markup()
+            )
+        except Exception as e:
+            logger.error(f"Error selecting channel for wallet removal: {e}", exc_info=True)
+            await callback.answer("❌ Error processing selection", show_alert=True)
+
+    @router.callback_query(lambda c: c.data and c.data.startswith("remove_wallet:"))
+    async def remove_wallet_selected(callback: types.CallbackQuery, state: FSMContext):
+        try:
+            wallet_address = callback.data.split(":", 1)[1]
+            channel_username = (await state.get_data()).get("remove_from")
+            if not channel_username or not await channel_storage.remove_wallet(
+                channel_username, wallet_address, user_id=callback.from_user.id
+            ):
+                await callback.answer("❌ Wallet not found, try /remove_wallet again", show_alert=True)
+                return
+
+            # Monitoring (mined and pending) stops once no channel follows the wallet anymore
+            await wallet_service.unsubscribe_wallet(wallet_address)
+            await callback.answer("Wallet removed!")
+            await callback.message.edit_text(
+                f"✅ Wallet removed from @{channel_username}\n\n💼 `{wallet_address}`"
+            )
+        except Exception as e:
+            logger.error(f"Error removing wallet: {e}", exc_info=True)
+            await callback.answer("❌ Error removing wallet", show_alert=True)
+        finally:
+            await state.update_data(remove_from=None)
+
     @router.message(Command("cancel"))
     async def cancel_operation(message: types.Message, state: FSMContext):
         current_state = await state.get_state()
@@ -405,9 +482,15 @@ Please try removing and adding the wallet again."""
                 "Use /help to see available commands"
             )
 
+    @router.my_chat_member()
+    async def bot_membership_changed(update: types.ChatMemberUpdated):
+        """Forget cached rights when the bot is added, promoted or removed"""
+        logger.info(f"Bot membership changed in chat {update.chat.id}: {update.new_chat_member.status}")
+        channel_service.invalidate_permissions(chat_id=update.chat.id, channel_username=update.chat.username)
+
     @router.message(Command("list_channels"))
     async def list_channels(message: types.Message):
-        channels = channel_storage.get_user_channels(message.from_user.id)
+        channels = await channel_storage.get_user_channels(message.from_user.id)
 
         if not channels:
             await message.reply(
@@ -416,6 +499,9 @@ Please try removing and adding the wallet again."""
             )
             return
 
+        # Look up rights of all channels at once instead of one after another
+        permissions = await channel_service.get_permissions_info_many([channel.username for channel in channels])
+
         response = "📊 Your Channels:\n\n"
         for channel in channels:
             response += f"📢 Channel: @{channel.username}\n"
@@ -423,8 +509,7 @@ Please try removing and adding the wallet again."""
 
             # Add bot permissions info
             response += "\n🤖 Bot Permissions:\n"
-            permissions_info = await channel_service.get_permissions_info(channel.username)
-            response += f"{permissions_info}\n"
+            response += f"{permissions[channel.username]}\n"
 
             if channel.personality:
                 response += "\n🧠 Personality:\n"
@@ -447,6 +532,7 @@ Please try removing and adding the wallet again."""
             "Commands:\n"
             "/add_channel - Add new channel\n"
             "/add_wallet - Add Base wallet to channel\n"
+            "/remove_wallet - Remove wallet from channel\n"
             "/generate_post - Generate test post for channel"
         )
 
@@ -456,7 +542,7 @@ Please try removing and adding the wallet again."""
     async def cmd_generate_post(message: types.Message, state: FSMContext):
         """Start generate post flow"""
         user_id = message.from_user.id
-        channels = channel_storage.get_user_channels(user_id)
+        channels = await channel_storage.get_user_channels(user_id)
 
         if not channels:
             await message.answer(
@@ -484,7 +570,7 @@ Please try removing and adding the wallet again."""
         """Handle channel selection for post generation"""
         try:
             channel_username = callback_query.data.split(":")[1]
-            channel = channel_storage.get_channel(channel_username)
+            channel = await channel_storage.get_channel(channel_username)
 
             if not channel or not channel.personality:
                 await callback_query.message.edit_text(
@@ -494,62 +580,60 @@ Please try removing and adding the wallet again."""
                 return
 
             # Format prompt for post generation
-            prompt = f"""Generate a Telegram post with the following characteristics:
-
-Personality Traits: {', '.join(channel.personality.traits[:3])}
-Main Interests: {', '.join(channel.personality.interests[:3])}
-Communication Style: {channel.personality.communication_style}
-
-Requirements:
-1. Match the communication style exactly
-2. Focus on the main interests
-3. Express the personality traits naturally
-4. Be concise and engaging
-5. Include relevant emojis
-6. Format appropriately for Telegram
-
-Generate a single post:"""
-
-            # Generate post
-            post = personality_analyzer.generate_post(prompt)
+            prompt = channel_post_prompt(channel)
+
+            # Stream the post into this message, the keyboard is attached once it is complete
+            post = await wallet_service.stream_post_to_message(
+                callback_query.message.chat.id,
+                callback_query.message.message_id,
+                f"📝 Generated post for @{channel_username}:\n\n",
+                prompt,
+                reply_markup=wallet_service._create_post_keyboard(channel_username)
+            )
 
             if post:
-                await callback_query.message.edit_text(
-                    f"📝 Generated post for @{channel_username}:\n\n{post}",
-                    reply_markup=wallet_service._create_post_keyboard(channel_username, is_transaction=False)
-                )
+                # Alternatives for Regenerate are generated while the user reads this one
+                wallet_service.candidate_pool.prefetch(f"channel:{channel_username}", prompt)
             else:
-                await callback_query.message.edit_text(
-                    "❌ Failed to generate post. Please try again."
+                # Queued like the streamed edits, so a late partial edit cannot overwrite it
+                await outbound_queue.edit_message_text(
+                    callback_query.message.chat.id,
+                    callback_query.message.message_id,
+                    "❌ Failed to generate post. Please try again.",
+                    priority=USER
                 )
 
         except Exception as e:
             logger.error(f"Error generating post: {e}", exc_info=True)
-            await callback_query.message.edit_text(
-                "❌ An error occurred while generating the post. Please try again."
+            await outbound_queue.edit_message_text(
+                callback_query.message.chat.id,
+                callback_query.message.message_id,
+                "❌ An error occurred while generating the post. Please try again.",
+                priority=USER
             )
 
     @router.callback_query(lambda c: c.data.startswith("regenerate_tx_post:"))
     async def regenerate_tx_post(callback_query: types.CallbackQuery, state: FSMContext):
         """Handle regeneration of transaction post"""
         try:
-            channel_username = callback_query.data.split(":")[1]
+            proposal_id = callback_query.data.split(":")[1]
 
-            # Get the transaction event from state
-            data = await state.get_data()
-            tx_event = data.get('current_tx_event')
+            # Get the transaction this proposal was made for
+            proposal = await wallet_service.proposal_store.get(proposal_id)
 
-            if not tx_event:
-                await callback_query.answer("Transaction data not found", show_alert=True)
+            if not proposal:
+                await callback_query.answer("Transaction data not found or expired", show_alert=True)
                 return
 
-            # Generate new post proposal
-            post_proposal = await wallet_service.generate_post_proposal(tx_event, channel_username)
+            channel_username = proposal.channel_username
+
+            # Take the next pre-generated alternative for this proposal
+            post_proposal = await wallet_service.regenerate_post_proposal(proposal_id, proposal.event, channel_username)
 
             # Update the message with new proposal
             await callback_query.message.edit_text(
                 f"📝 Suggested post for @{channel_username}:\n\n{post_proposal}",
-                reply_markup=wallet_service._create_post_keyboard(channel_username)
+                reply_markup=wallet_service._create_post_keyboard(channel_username, proposal_id)
             )
 
             await callback_query.answer("Generated new post proposal!")
@@ -561,46 +645,58 @@ Generate a single post:"""
     @router.callback_query(lambda c: c.data.startswith("regenerate_post:"))
     async def regenerate_post(callback_query: types.CallbackQuery, state: FSMContext):
         """Handle regeneration of regular post"""
+        answered = False  # Telegram accepts only one answer per callback query
         try:
             channel_username = callback_query.data.split(":")[1]
-            channel = channel_storage.get_channel(channel_username)
+            channel = await channel_storage.get_channel(channel_username)
 
             if not channel or not channel.personality:
                 await callback_query.answer("Channel not found", show_alert=True)
                 return
 
             # Format prompt for post generation
-            prompt = f"""Generate a Telegram post with the following characteristics:
-
-Personality Traits: {', '.join(channel.personality.traits[:3])}
-Main Interests: {', '.join(channel.personality.interests[:3])}
-Communication Style: {channel.personality.communication_style}
-
-Requirements:
-1. Match the communication style exactly
-2. Focus on the main interests
-3. Express the personality traits naturally
-4. Be concise and engaging
-5. Include relevant emojis
-6. Format appropriately for Telegram
-
-Generate a single post:"""
-
-            # Generate new post
-            post = personality_analyzer.generate_post(prompt)
+            prompt = channel_post_prompt(channel)
 
+            # Take a pre-generated alternative, a new one is only requested when none is left
+            post = await wallet_service.candidate_pool.next(f"channel:{channel_username}", prompt)
             if post:
                 await callback_query.message.edit_text(
                     f"📝 Generated post for @{channel_username}:\n\n{post}",
-                    reply_markup=wallet_service._create_post_keyboard(channel_username, is_transaction=False)
+                    reply_markup=wallet_service._create_post_keyboard(channel_username)
                 )
                 await callback_query.answer("Generated new post!")
-            else:
-                await callback_query.answer("Failed to generate post", show_alert=True)
+                return
+
+            # Nothing pre-generated: stop the button spinner now, the new post streams into the message
+            await callback_query.answer("Generating new post...")
+            answered = True
+            post = await wallet_service.stream_post_to_message(
+                callback_query.message.chat.id,
+                callback_query.message.message_id,
+                f"📝 Generated post for @{channel_username}:\n\n",
+                prompt,
+                reply_markup=wallet_service._create_post_keyboard(channel_username),
+                use_cache=False
+            )
+            if not post:
+                await outbound_queue.edit_message_text(
+                    callback_query.message.chat.id,
+                    callback_query.message.message_id,
+                    "❌ Failed to generate post. Please try again.",
+                    priority=USER
+                )
 
         except Exception as e:
             logger.error(f"Error regenerating post: {e}", exc_info=True)
-            await callback_query.answer("Failed to regenerate post", show_alert=True)
+            if answered:
+                await outbound_queue.edit_message_text(
+                    callback_query.message.chat.id,
+                    callback_query.message.message_id,
+                    "❌ Failed to regenerate post. Please try again.",
+                    priority=USER
+                )
+            else:
+                await callback_query.answer("Failed to regenerate post", show_alert=True)
 
     @router.message(Command("help"))
     async def cmd_help(message: types.Message):
@@ -611,7 +707,8 @@ Generate a single post:"""
             "/list_channels - View your channels\n"
             "/generate_post - Generate test post for channel\n\n"
             "💼 Wallet Management:\n"
-            "/add_wallet - Add Base wallet to channel\n\n"
+            "/add_wallet - Add Base wallet to channel\n"
+            "/remove_wallet - Remove wallet from channel\n\n"
             "ℹ️ Other:\n"
             "/help - Show this help message\n"
             "/cancel - Cancel current operation"
@@ -626,8 +723,7 @@ Generate a single post:"""
             post_text = callback_query.message.text.split("\n\n", 1)[1]  # Get post content without header
 
             # Check channel permissions
-            permissions = await channel_service.get_permissions_info(channel_username)
-            if "❌ Can't post messages" in permissions:
+            if not await channel_service.can_post(channel_username):
                 await callback_query.answer(
                     "Bot doesn't have permission to post in this channel. "
                     "Please make sure the bot is an admin with posting rights.",
@@ -637,7 +733,7 @@ Generate a single post:"""
 
             # Post to channel
             try:
-                await bot.send_message(f"@{channel_username}", post_text)
+                await outbound_queue.send_message(f"@{channel_username}", post_text, priority=USER)
 
                 # Update original message
                 await callback_query.message.edit_text(
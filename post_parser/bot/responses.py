@@ -13,6 +13,7 @@ Here's what I can do for you:
 Commands:
 /add_channel - Add a Telegram channel
 /add_wallet - Link a Base wallet to your channel
+/remove_wallet - Unlink a wallet from your channel
 /list_channels - Show your channels and wallets
 /generate_post - Create AI-generated posts for your channel
 
@@ -12,13 +12,69 @@ class OpenAIConfig(TypedDict):
     model: str
     temperature: float
 
+class StorageConfig(TypedDict):
+    backend: str  # "memory", "sqlite", "mongo" or "log"
+    path: str  # SQLite database file or log backend directory
+    mongo_uri: str
+    mongo_database: str
+    flush_interval: float  # seconds between write-behind flushes
+    batch_size: int  # pending writes that trigger an early flush
+    pool_size: int  # database connections
+    compact_threshold: int  # log backend size in bytes that triggers a snapshot
+    fsync: bool  # log backend fsyncs every batch
+
+class WebhookConfig(TypedDict):
+    enabled: bool  # receive updates via webhook instead of long polling
+    url: str  # public base URL Telegram sends updates to
+    path: str
+    host: str
+    port: int
+    secret_token: str  # checked against X-Telegram-Bot-Api-Secret-Token
+    max_connections: int  # parallel connections Telegram opens
+    max_concurrent_updates: int  # updates handled at the same time
+    max_pending_updates: int  # accepted updates before new ones get 503
+    drain_timeout: float  # seconds to finish accepted updates on shutdown
+
+class ClientsConfig(TypedDict):
+    telegram_timeout: float  # seconds per Bot API request
+    telegram_connections: int  # pooled connections to the Bot API
+    openai_timeout: float  # seconds per OpenAI request
+    openai_connections: int  # pooled connections to OpenAI
+    openai_max_concurrent: int  # OpenAI requests in flight, others wait
+
 class Config(TypedDict):
     telegram: TelegramConfig
     max_messages_per_parse: int  # e.g., 1000
+    parse_buffer_size: int  # messages downloaded ahead of processing
+    parse_concurrency: int  # channels parsed at the same time
+    parse_requests_per_second: float  # shared history request budget
+    analysis_concurrency: int  # channel analyses running at the same time
+    analysis_chunk_tokens: int  # post tokens per analysis request, larger inputs are analyzed map-reduce
+    analysis_reduce_fan_in: int  # partial profiles merged per request
+    analysis_sample_tokens: int  # token budget of the representative post sample, 0 analyzes all posts
+    analysis_corpus_posts: int  # newest stored posts a first analysis reads from the corpus
+    personality_history_versions: int  # personality versions kept per channel
+    llm_cache_size: int  # OpenAI responses kept in memory
+    llm_cache_ttl: float  # seconds a cached response is reused
+    llm_cache_path: str  # SQLite file for cached responses, empty keeps them in memory only
+    post_candidates: int  # alternative posts generated per request for Regenerate
+    candidate_pools: int  # proposals whose alternatives are kept
+    candidate_ttl: float  # seconds alternatives of a proposal are kept
+    stream_edit_interval: float  # seconds between edits while a post streams into a message
+    outbound_messages_per_second: float  # bot messages over all chats
+    outbound_messages_per_chat_second: float  # bot messages per chat
+    outbound_metrics_interval: float  # seconds between outbound queue metrics log lines
+    transaction_digest_window: float  # seconds a wallet's transactions are merged into one proposal, 0 disables
+    proposal_cache_size: int  # post proposals whose transaction context is kept in memory
+    proposal_ttl: float  # seconds a proposal can be regenerated
+    proposal_store_path: str  # SQLite file for proposals, empty keeps them in memory only
     debug_mode: bool
     debug_channel: str
     openai: OpenAIConfig
     max_posts_per_batch: int
+    storage: StorageConfig
+    webhook: WebhookConfig
+    clients: ClientsConfig
 
 DEFAULT_CONFIG: Config = {
     "telegram": {
@@ -27,6 +83,29 @@ DEFAULT_CONFIG: Config = {
         "api_hash": ""    # Will be overridden by actual hash
     },
     "max_messages_per_parse": 1000,
+    "parse_buffer_size": 200,
+    "parse_concurrency": 4,
+    "parse_requests_per_second": 2.0,
+    "analysis_concurrency": 2,
+    "analysis_chunk_tokens": 6000,
+    "analysis_reduce_fan_in": 8,
+    "analysis_sample_tokens": 12000,
+    "analysis_corpus_posts": 5000,
+    "personality_history_versions": 50,
+    "llm_cache_size": 1000,
+    "llm_cache_ttl": 86400,
+    "llm_cache_path": "data/llm_cache.db",
+    "post_candidates": 3,
+    "candidate_pools": 1000,
+    "candidate_ttl": 3600,
+    "stream_edit_interval": 1.0,
+    "outbound_messages_per_second": 25.0,
+    "outbound_messages_per_chat_second": 1.0,
+    "outbound_metrics_interval": 60.0,
+    "transaction_digest_window": 60.0,
+    "proposal_cache_size": 1000,
+    "proposal_ttl": 86400,
+    "proposal_store_path": "",
     "debug_mode": False,
     "debug_channel": "UkraineNow",  # Default debug channel
     "openai": {
@@ -34,7 +113,37 @@ DEFAULT_CONFIG: Config = {
         "model": "gpt-3.5-turbo",
         "temperature": 0.7
     },
-    "max_posts_per_batch": 10
+    "max_posts_per_batch": 10,
+    "storage": {
+        "backend": "memory",
+        "path": "data/storage.db",
+        "mongo_uri": "mongodb://localhost:27017",
+        "mongo_database": "influencer_ai",
+        "flush_interval": 1.0,
+        "batch_size": 500,
+        "pool_size": 4,
+        "compact_threshold": 16777216,
+        "fsync": True
+    },
+    "webhook": {
+        "enabled": False,
+        "url": "",
+        "path": "/webhook",
+        "host": "0.0.0.0",
+        "port": 8080,
+        "secret_token": "",
+        "max_connections": 40,
+        "max_concurrent_updates": 64,
+        "max_pending_updates": 1000,
+        "drain_timeout": 30.0
+    },
+    "clients": {
+        "telegram_timeout": 60.0,
+        "telegram_connections": 100,
+        "openai_timeout": 60.0,
+        "openai_connections": 20,
+        "openai_max_concurrent": 8
+    }
 }
 
 def validate_config(config: dict) -> tuple[bool, Optional[str]]:
@@ -63,6 +172,72 @@ def validate_config(config: dict) -> tuple[bool, Optional[str]]:
         if not isinstance(config.get("max_messages_per_parse", 1000), int):
             return False, "max_messages_per_parse must be an integer"
 
+        if not isinstance(config.get("parse_buffer_size", 200), int) or config.get("parse_buffer_size", 200) < 1:
+            return False, "parse_buffer_size must be a positive integer"
+
+        if not isinstance(config.get("parse_concurrency", 4), int) or config.get("parse_concurrency", 4) < 1:
+            return False, "parse_concurrency must be a positive integer"
+
+        requests_per_second = config.get("parse_requests_per_second", 2.0)
+        if not isinstance(requests_per_second, (int, float)) or requests_per_second <= 0:
+            return False, "parse_requests_per_second must be a positive number"
+
+        if not isinstance(config.get("analysis_concurrency", 2), int) or config.get("analysis_concurrency", 2) < 1:
+            return False, "analysis_concurrency must be a positive integer"
+
+        if not isinstance(config.get("analysis_chunk_tokens", 6000), int) or config.get("analysis_chunk_tokens", 6000) < 100:
+            return False, "analysis_chunk_tokens must be an integer of at least 100"
+
+        if not isinstance(config.get("analysis_reduce_fan_in", 8), int) or config.get("analysis_reduce_fan_in", 8) < 2:
+            return False, "analysis_reduce_fan_in must be an integer of at least 2"
+
+        if not isinstance(config.get("analysis_sample_tokens", 0), int) or config.get("analysis_sample_tokens", 0) < 0:
+            return False, "analysis_sample_tokens must be a non-negative integer"
+
+        if not isinstance(config.get("analysis_corpus_posts", 5000), int) or config.get("analysis_corpus_posts", 5000) < 1:
+            return False, "analysis_corpus_posts must be a positive integer"
+
+        if not isinstance(config.get("personality_history_versions", 50), int) or config.get("personality_history_versions", 50) < 1:
+            return False, "personality_history_versions must be a positive integer"
+
+        for field in ("outbound_messages_per_second", "outbound_messages_per_chat_second", "outbound_metrics_interval"):
+            rate = config.get(field, 1.0)
+            if not isinstance(rate, (int, float)) or rate <= 0:
+                return False, f"{field} must be a positive number"
+
+        digest_window = config.get("transaction_digest_window", 60.0)
+        if not isinstance(digest_window, (int, float)) or digest_window < 0:
+            return False, "transaction_digest_window must be a non-negative number"
+
+        if not isinstance(config.get("proposal_cache_size", 1000), int) or config.get("proposal_cache_size", 1000) < 1:
+            return False, "proposal_cache_size must be a positive integer"
+
+        if not isinstance(config.get("proposal_ttl", 86400), (int, float)):
+            return False, "proposal_ttl must be a number"
+
+        if not isinstance(config.get("proposal_store_path", ""), str):
+            return False, "proposal_store_path must be a string"
+
+        if not isinstance(config.get("llm_cache_size", 1000), int) or config.get("llm_cache_size", 1000) < 1:
+            return False, "llm_cache_size must be a positive integer"
+
+        if not isinstance(config.get("llm_cache_ttl", 86400), (int, float)):
+            return False, "llm_cache_ttl must be a number"
+
+        if not isinstance(config.get("llm_cache_path", ""), str):
+            return False, "llm_cache_path must be a string"
+
+        for field in ("post_candidates", "candidate_pools"):
+            if not isinstance(config.get(field, 1), int) or config.get(field, 1) < 1:
+                return False, f"{field} must be a positive integer"
+
+        if not isinstance(config.get("candidate_ttl", 3600), (int, float)):
+            return False, "candidate_ttl must be a number"
+
+        stream_edit_interval = config.get("stream_edit_interval", 1.0)
+        if not isinstance(stream_edit_interval, (int, float)) or stream_edit_interval < 0:
+            return False, "stream_edit_interval must be a non-negative number"
+
         if not isinstance(config.get("debug_mode", False), bool):
             return False, "debug_mode must be a boolean"
 
@@ -86,6 +261,50 @@ def validate_config(config: dict) -> tuple[bool, Optional[str]]:
         if not isinstance(config.get("max_posts_per_batch", 10), int):
             return False, "max_posts_per_batch must be an integer"
 
+        storage_config = config.get("storage", {})
+        if not isinstance(storage_config, dict):
+            return False, "storage must be a dictionary"
+
+        if storage_config.get("backend", "memory") not in ("memory", "sqlite", "mongo", "log"):
+            return False, "storage backend must be one of: memory, sqlite, mongo, log"
+
+        if not isinstance(storage_config.get("flush_interval", 1.0), (int, float)):
+            return False, "storage flush_interval must be a number"
+
+        if not isinstance(storage_config.get("batch_size", 500), int):
+            return False, "storage batch_size must be an integer"
+
+        if not isinstance(storage_config.get("pool_size", 4), int):
+            return False, "storage pool_size must be an integer"
+
+        webhook_config = config.get("webhook", {})
+        if not isinstance(webhook_config, dict):
+            return False, "webhook must be a dictionary"
+
+        if webhook_config.get("enabled", False):
+            if not webhook_config.get("url", "").startswith("https://"):
+                return False, "webhook url must be an https:// URL"
+
+            secret_token = webhook_config.get("secret_token", "")
+            if not secret_token or len(secret_token) > 256 or not all(c.isalnum() or c in "_-" for c in secret_token):
+                return False, "webhook secret_token must be 1-256 characters of A-Z, a-z, 0-9, _ and -"
+
+            for field in ("port", "max_connections", "max_concurrent_updates", "max_pending_updates"):
+                if not isinstance(webhook_config.get(field), int) or webhook_config.get(field) < 1:
+                    return False, f"webhook {field} must be a positive integer"
+
+        clients_config = config.get("clients", {})
+        if not isinstance(clients_config, dict):
+            return False, "clients must be a dictionary"
+
+        for field in ("telegram_timeout", "openai_timeout"):
+            if not isinstance(clients_config.get(field, 60.0), (int, float)) or clients_config.get(field, 60.0) <= 0:
+                return False, f"clients {field} must be a positive number"
+
+        for field in ("telegram_connections", "openai_connections", "openai_max_concurrent"):
+            if not isinstance(clients_config.get(field, 1), int) or clients_config.get(field, 1) < 1:
+                return False, f"clients {field} must be a positive integer"
+
         return True, None
 
     except Exception as e:
@@ -110,6 +329,18 @@ def load_config() -> Config:
         config['telegram'] = DEFAULT_CONFIG['telegram'].copy()
         config['telegram'].update(user_config['telegram'])
 
+    # Ensure storage section is fully populated
+    config['storage'] = DEFAULT_CONFIG['storage'].copy()
+    config['storage'].update(user_config.get('storage', {}))
+
+    # Ensure webhook section is fully populated
+    config['webhook'] = DEFAULT_CONFIG['webhook'].copy()
+    config['webhook'].update(user_config.get('webhook', {}))
+
+    # Ensure clients section is fully populated
+    config['clients'] = DEFAULT_CONFIG['clients'].copy()
+    config['clients'].update(user_config.get('clients', {}))
+
     # Validate config
     is_valid, error_message = validate_config(config)
     if not is_valid:
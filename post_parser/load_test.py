@@ -0,0 +1,104 @@
+import asyncio
+import random
+import statistics
+import time
+import aiohttp
+from aiogram import Bot, Dispatcher, Router, types
+from .webhook import WebhookServer, SECRET_HEADER
+
+# Test configuration
+HOST = "127.0.0.1"
+PORT = 8181
+SECRET_TOKEN = "load-test-secret"
+TOTAL_UPDATES = 5000
+CONCURRENT_REQUESTS = 100  # Parallel connections, like Telegram's max_connections
+HANDLER_DELAY = 0.01  # Simulated handler work in seconds
+MAX_CONCURRENT_UPDATES = 64
+
+handler_latencies = []
+
+def synthetic_update(update_id: int) -> dict:
+    """Build a message update as Telegram would send it"""
+    chat_id = random.randint(1, 10000)
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": chat_id, "type": "private"},
+            "from": {"id": chat_id, "is_bot": False, "first_name": "Load"},
+            "text": f"load test {update_id}"
+        }
+    }
+
+def create_dispatcher() -> Dispatcher:
+    """Dispatcher with a handler that only records how long it took"""
+    router = Router()
+
+    @router.message()
+    async def handle(message: types.Message):
+        started = time.monotonic()
+        await asyncio.sleep(HANDLER_DELAY)
+        handler_latencies.append(time.monotonic() - started)
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    return dp
+
+async def post_updates(session: aiohttp.ClientSession, update_ids: asyncio.Queue, request_latencies: list, statuses: dict):
+    url = f"http://{HOST}:{PORT}/webhook"
+    while not update_ids.empty():
+        update_id = update_ids.get_nowait()
+        started = time.monotonic()
+        async with session.post(url, json=synthetic_update(update_id), headers={SECRET_HEADER: SECRET_TOKEN}) as response:
+            statuses[response.status] = statuses.get(response.status, 0) + 1
+        request_latencies.append(time.monotonic() - started)
+
+def percentile(values: list, share: float) -> float:
+    return sorted(values)[int(len(values) * share) - 1] * 1000 if values else 0.0
+
+async def main():
+    bot = Bot(token="123456:LOAD-TEST")  # Never used for API calls
+    server = WebhookServer(
+        create_dispatcher(),
+        bot,
+        secret_token=SECRET_TOKEN,
+        max_concurrent_updates=MAX_CONCURRENT_UPDATES,
+        max_pending_updates=TOTAL_UPDATES
+    )
+    await server.start(HOST, PORT)
+
+    update_ids = asyncio.Queue()
+    for update_id in range(1, TOTAL_UPDATES + 1):
+        update_ids.put_nowait(update_id)
+    request_latencies = []
+    statuses = {}
+
+    print(f"Posting {TOTAL_UPDATES} updates over {CONCURRENT_REQUESTS} connections...")
+    started = time.monotonic()
+    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=CONCURRENT_REQUESTS)) as session:
+        await asyncio.gather(*(
+            post_updates(session, update_ids, request_latencies, statuses)
+            for _ in range(CONCURRENT_REQUESTS)
+        ))
+    accepted = time.monotonic() - started
+
+    await server.stop()  # Drains all accepted updates
+    handled = time.monotonic() - started
+    await bot.session.close()
+
+    stats = server.stats
+    print(f"HTTP statuses: {statuses}")
+    print(f"Accepted: {TOTAL_UPDATES / accepted:,.0f} updates/sec")
+    print(f"Handled: {stats['handled'] / handled:,.0f} updates/sec ({stats['failed']} failed)")
+    print(f"Request latency: p50 {percentile(request_latencies, 0.5):.1f} ms, p99 {percentile(request_latencies, 0.99):.1f} ms")
+    if stats["handled"]:
+        print(f"Handler latency: mean {statistics.mean(handler_latencies) * 1000:.1f} ms")
+        print(
+            f"Receive-to-done latency: mean {stats['total_latency'] / stats['handled'] * 1000:.1f} ms, "
+            f"max {stats['max_latency'] * 1000:.1f} ms"
+        )
+
+if __name__ == "__main__":
+    # Run from the repository root: python -m post_parser.load_test
+    asyncio.run(main())
@@ -1,17 +1,32 @@
 import logging
-from aiogram import Bot, Dispatcher, Router
+from aiogram import Dispatcher, Router
 from aiogram.fsm.storage.memory import MemoryStorage
 from telethon.sync import TelegramClient
 import os
 from onchain_parser.monitor_service import monitor_service  # Import the singleton instance
+from onchain_parser.api import set_pending_monitor
+from onchain_parser.config import config as onchain_config
+from onchain_parser.pending_monitor import PendingMonitor
 import asyncio
 
 from .bot.handlers import setup_handlers
+from .webhook import run_webhook
 from .config import load_config
-from storage.storage import Storage
+from storage.storage import Storage, create_storage
+from clients.http import close_sessions, create_async_openai_http_client
+from clients.telegram import create_bot
+from storage.async_storage import AsyncStorage
 from .services.channel_service import ChannelService
+from .services.entity_cache import EntityCache
+from .services.outbound_queue import OutboundQueue
+from .services.proposal_store import ProposalStore
+from .services.candidate_pool import CandidatePool
 from .services.parser_service import ParserService
-from personality_analyzer import CharacterAnalyzer
+from .services.corpus_service import CorpusService
+from .services.parse_scheduler import ParseScheduler
+from .services.analysis_job_service import AnalysisJobService
+from .services.rate_limiter import TokenBucket
+from personality_analyzer import AsyncCharacterAnalyzer, LLMCache
 from .services.log_service import LogService
 from .services.wallet_service import WalletService
 
@@ -26,44 +41,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-# Load configuration
-logger.info("Loading configuration...")
-config = load_config()
-logger.info("Configuration loaded successfully")
-
-# Initialize storages
-channel_storage = Storage()
-fsm_storage = MemoryStorage()
-
-# Initialize the bot and dispatcher
-logger.info("Initializing bot...")
-bot = Bot(token=config["telegram"]["api_token"])
-dp = Dispatcher(storage=fsm_storage)
-router = Router(name="main_router")
-dp.include_router(router)
-logger.info("Bot initialized successfully")
-
-# Initialize Telethon client
-telegram_client = None
-
-async def init_telegram_client():
-	global telegram_client
-	if telegram_client is None:
-		logger.info("Connecting to Telegram client...")
-		telegram_client = TelegramClient(
-			'session_name',
-			config["telegram"]["api_id"],
-			config["telegram"]["api_hash"]
-		)
-		if not telegram_client.is_connected():
-			await telegram_client.connect()
-			logger.info("Telethon client connected successfully")
-
-async def setup_bot(config: dict, storage, analyzer: CharacterAnalyzer):
+async def setup_bot(config: dict, storage: Storage, analyzer: AsyncCharacterAnalyzer):
 	"""Setup and run the bot with all dependencies"""
 
-	# Initialize bot and dispatcher first
-	bot = Bot(token=config["telegram"]["api_token"])
+	# Handlers and services use the async storage interface
+	async_storage = AsyncStorage(storage)
+
+	# Initialize bot and dispatcher first, every service shares this bot and its session
+	bot = create_bot(
+		config["telegram"]["api_token"],
+		timeout=config["clients"]["telegram_timeout"],
+		connection_limit=config["clients"]["telegram_connections"]
+	)
 	dp = Dispatcher(storage=MemoryStorage())
 	router = Router(name="main_router")
 	dp.include_router(router)
@@ -85,17 +74,63 @@ async def setup_bot(config: dict, storage, analyzer: CharacterAnalyzer):
 	# Initialize services
 	channel_service = ChannelService(
 		client=telegram_client,
-		bot_token=config["telegram"]["api_token"]
+		bot=bot,
+		entity_cache=EntityCache(os.path.join(DATA_DIR, "entity_cache.json")),
+		storage=async_storage
+	)
+	corpus_service = CorpusService(DATA_DIR)
+	# History requests of all parses share one budget to stay clear of flood waits
+	request_limiter = TokenBucket(config["parse_requests_per_second"], capacity=config["parse_requests_per_second"])
+	parser_service = ParserService(telegram_client, DATA_DIR, config, corpus_service, request_limiter)
+	parse_scheduler = ParseScheduler(parser_service, concurrency=config["parse_concurrency"])
+	parse_scheduler.start()
+	log_service = LogService(SCRIPT_DIR, max_versions=config["personality_history_versions"])
+
+	# All outgoing notifications share Telegram's global and per-chat send limits
+	outbound_queue = OutboundQueue(
+		bot,
+		global_rate=config["outbound_messages_per_second"],
+		per_chat_rate=config["outbound_messages_per_chat_second"],
+		metrics_interval=config["outbound_metrics_interval"]
+	)
+	outbound_queue.start()
+	analysis_job_service = AnalysisJobService(
+		outbound_queue=outbound_queue,
+		storage=async_storage,
+		parse_scheduler=parse_scheduler,
+		personality_analyzer=analyzer,
+		log_service=log_service,
+		corpus_service=corpus_service,
+		data_dir=DATA_DIR,
+		concurrency=config["analysis_concurrency"],
+		corpus_posts=config["analysis_corpus_posts"]
+	)
+
+	# Transaction context of post proposals, optionally kept on disk
+	proposal_store = ProposalStore(
+		max_entries=config["proposal_cache_size"],
+		ttl=config["proposal_ttl"],
+		path=os.path.join(SCRIPT_DIR, config["proposal_store_path"]) if config["proposal_store_path"] else None
+	)
+
+	# Alternatives for Regenerate, generated ahead of the click
+	candidate_pool = CandidatePool(
+		analyzer,
+		candidates=config["post_candidates"],
+		max_pools=config["candidate_pools"],
+		ttl=config["candidate_ttl"]
 	)
-	parser_service = ParserService(telegram_client, DATA_DIR, config)
-	log_service = LogService(SCRIPT_DIR)
 
 	# Initialize wallet service with all required dependencies
 	wallet_service = WalletService(
 		bot=bot,
-		storage=storage,
+		storage=async_storage,
 		personality_analyzer=analyzer,
-		fsm_storage=dp.storage  # Pass the dispatcher's FSM storage
+		proposal_store=proposal_store,
+		outbound_queue=outbound_queue,
+		candidate_pool=candidate_pool,
+		digest_window=config["transaction_digest_window"],
+		stream_edit_interval=config["stream_edit_interval"]
 	)
 	wallet_service._loop = loop  # Ensure the service has access to the main event loop
 
@@ -104,9 +139,13 @@ async def setup_bot(config: dict, storage, analyzer: CharacterAnalyzer):
 	monitor_service._start_monitor()
 	logger.info("Onchain monitor service started successfully")
 
+	# Pending transactions are only watched when enabled, the watcher thread starts with the first subscription
+	pending_monitor = PendingMonitor() if onchain_config.pending_enabled else None
+	set_pending_monitor(pending_monitor)
+
 	# Restore existing wallet subscriptions from storage
 	logger.info("Restoring wallet subscriptions...")
-	for channel in storage.channels.values():
+	for channel in await async_storage.snapshot_channels():
 		if channel.wallets:
 			for wallet in channel.wallets:
 				if wallet_service.subscribe_wallet(wallet.address):
@@ -117,19 +156,43 @@ async def setup_bot(config: dict, storage, analyzer: CharacterAnalyzer):
 	# Setup handlers with all dependencies
 	setup_handlers(
 		router=router,
-		channel_storage=storage,
+		channel_storage=async_storage,
 		channel_service=channel_service,
 		parser_service=parser_service,
 		personality_analyzer=analyzer,
 		log_service=log_service,
 		wallet_service=wallet_service,
-		config=config
+		config=config,
+		analysis_job_service=analysis_job_service
 	)
 
-	# Start polling with allowed updates for callback queries
-	await dp.start_polling(bot, allowed_updates=["message", "callback_query"])
+	# Job handlers are registered by setup_handlers, restored jobs can run now
+	analysis_job_service.start()
+
+	# Receive messages, callback queries and bot membership changes
+	allowed_updates = ["message", "callback_query", "my_chat_member"]
+	try:
+		if config["webhook"]["enabled"]:
+			await run_webhook(dp, bot, config["webhook"], allowed_updates)
+		else:
+			# Telegram keeps sending to a registered webhook until it is removed
+			await bot.delete_webhook()
+			await dp.start_polling(bot, allowed_updates=allowed_updates)
+	finally:
+		await analysis_job_service.stop()
+		await parse_scheduler.stop()
+		await candidate_pool.stop()
+		await outbound_queue.stop()
+		proposal_store.close()
+		await bot.session.close()
+		await analyzer.close()
+		if pending_monitor:
+			pending_monitor.stop()
+			set_pending_monitor(None)
+		close_sessions()
 
 async def main() -> None:
+	storage = None
 	try:
 		# Load configurations
 		logger.info("Loading configurations...")
@@ -138,14 +201,29 @@ async def main() -> None:
 
 		# Initialize storage
 		logger.info("Initializing storage...")
-		storage = Storage()
+		storage = create_storage(telegram_config.get("storage"), SCRIPT_DIR)
 
 		# Initialize personality analyzer
 		logger.info("Initializing personality analyzer...")
-		analyzer = CharacterAnalyzer(
+		analyzer = AsyncCharacterAnalyzer(
 			api_key=analyzer_config["openai"]["api_key"],
 			model=analyzer_config["openai"]["model"],
-			temperature=analyzer_config["openai"]["temperature"]
+			temperature=analyzer_config["openai"]["temperature"],
+			http_client=create_async_openai_http_client(
+				timeout=analyzer_config["clients"]["openai_timeout"],
+				max_connections=analyzer_config["clients"]["openai_connections"]
+			),
+			timeout=analyzer_config["clients"]["openai_timeout"],
+			max_concurrent=analyzer_config["clients"]["openai_max_concurrent"],
+			chunk_tokens=analyzer_config["analysis_chunk_tokens"],
+			reduce_fan_in=analyzer_config["analysis_reduce_fan_in"],
+			sample_tokens=analyzer_config["analysis_sample_tokens"],
+			# Responses are shared by all users, e.g. two users adding the same channel
+			cache=LLMCache(
+				max_entries=analyzer_config["llm_cache_size"],
+				ttl=analyzer_config["llm_cache_ttl"],
+				path=os.path.join(SCRIPT_DIR, analyzer_config["llm_cache_path"]) if analyzer_config["llm_cache_path"] else None
+			)
 		)
 
 		# Setup and run bot
@@ -155,6 +233,9 @@ async def main() -> None:
 	except Exception as e:
 		logger.error(f"Error in main: {str(e)}", exc_info=True)
 		raise
+	finally:
+		if storage:
+			storage.close()
 
 if __name__ == "__main__":
 	try:
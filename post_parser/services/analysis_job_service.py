@@ -0,0 +1,261 @@
+import asyncio
+import json
+import os
+import logging
+import time
+import uuid
+from dataclasses import dataclass, asdict, field
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+from personality_analyzer import Personality
+from .corpus_service import CorpusService
+from .parse_scheduler import ParseScheduler, INTERACTIVE
+from .log_service import LogService
+from .outbound_queue import OutboundQueue, USER
+
+logger = logging.getLogger(__name__)
+
+# Kept in the personality's raw_analysis: newest corpus message id the analysis covers
+ANALYZED_UP_TO = "last_message_id"
+
+@dataclass
+class AnalysisJob:
+    """Channel analysis requested from the bot"""
+    job_id: str
+    kind: str  # Selects the completion handler, e.g. "add_channel" or "debug"
+    channel_username: str
+    chat_id: int
+    message_id: Optional[int] = None  # Progress message that is edited while the job runs
+    reply_to_message_id: Optional[int] = None
+    status_text: str = ""  # Progress message header, job progress is appended below it
+    status: str = "queued"  # queued, parsing, analyzing, done, failed
+    created_at: float = field(default_factory=time.time)
+    posts_analyzed: int = 0
+    error: Optional[str] = None
+
+SuccessHandler = Callable[[AnalysisJob, Personality], Awaitable[None]]
+FailureHandler = Callable[[AnalysisJob, Exception], Awaitable[None]]
+
+class AnalysisJobService:
+    """Runs channel parsing and personality analysis as background jobs
+
+    Handlers submit a job and return right away. A bounded pool of workers
+    parses the channel through the parse scheduler, runs the async analyzer
+    and keeps the job's progress message up to date. A first analysis reads
+    the newest posts of the local corpus, which also holds posts of earlier
+    parses, and lets the analyzer sample from them. Later analyses read the
+    corpus from the last message the previous one covered, so posts that
+    background parses stored meanwhile are included. Unfinished jobs are
+    persisted to a JSON file and re-queued on start, so they survive
+    restarts. Results are delivered by the handler registered
+    for the job kind.
+    """
+
+    def __init__(
+        self,
+        outbound_queue: OutboundQueue,
+        storage,
+        parse_scheduler: ParseScheduler,
+        personality_analyzer,
+        log_service: LogService,
+        corpus_service: CorpusService,
+        data_dir: str,
+        concurrency: int = 2,
+        corpus_posts: int = 5000
+    ):
+        self.outbound_queue = outbound_queue
+        self.storage = storage
+        self.parse_scheduler = parse_scheduler
+        self.personality_analyzer = personality_analyzer
+        self.log_service = log_service
+        self.corpus = corpus_service
+        self.concurrency = concurrency
+        self.corpus_posts = corpus_posts
+        self.state_path = os.path.join(data_dir, "analysis_jobs.json")
+        self._jobs: Dict[str, AnalysisJob] = {}  # job_id -> unfinished job
+        self._handlers: Dict[str, tuple] = {}  # kind -> (on_success, on_failure)
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        os.makedirs(data_dir, exist_ok=True)
+
+    def register_handler(self, kind: str, on_success: SuccessHandler, on_failure: Optional[FailureHandler] = None) -> None:
+        """Set result handlers for a job kind (register before start so restored jobs find them)"""
+        self._handlers[kind] = (on_success, on_failure)
+
+    def start(self) -> None:
+        """Re-queue persisted jobs and start worker tasks"""
+        if self._workers:
+            return
+        for job in self._load_jobs():
+            job.status = "queued"
+            self._jobs[job.job_id] = job
+            self._queue.put_nowait(job)
+        if self._jobs:
+            logger.info(f"Restored {len(self._jobs)} unfinished analysis jobs")
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self) -> None:
+        """Cancel worker tasks, unfinished jobs stay persisted"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def submit(
+        self,
+        kind: str,
+        channel_username: str,
+        chat_id: int,
+        message_id: Optional[int] = None,
+        reply_to_message_id: Optional[int] = None,
+        status_text: str = ""
+    ) -> AnalysisJob:
+        """Queue a channel analysis and return immediately"""
+        job = AnalysisJob(
+            job_id=uuid.uuid4().hex,
+            kind=kind,
+            channel_username=channel_username,
+            chat_id=chat_id,
+            message_id=message_id,
+            reply_to_message_id=reply_to_message_id,
+            status_text=status_text
+        )
+        self._jobs[job.job_id] = job
+        await self._save_jobs()
+        self._queue.put_nowait(job)
+
+        await self._show_progress(job, f"🕒 Queued, {self._queue.qsize()} analyses waiting...")
+        return job
+
+    def _load_jobs(self) -> List[AnalysisJob]:
+        if not os.path.exists(self.state_path):
+            return []
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as f:
+                return [AnalysisJob(**data) for data in json.load(f)]
+        except (json.JSONDecodeError, TypeError) as e:
+            logger.error(f"Could not load analysis jobs from {self.state_path}: {e}")
+            return []
+
+    def _write_jobs(self, jobs: List[dict]) -> None:
+        tmp_path = self.state_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(jobs, f, ensure_ascii=False)
+        os.replace(tmp_path, self.state_path)
+
+    async def _save_jobs(self) -> None:
+        """Persist unfinished jobs"""
+        jobs = [asdict(job) for job in self._jobs.values()]
+        try:
+            await asyncio.to_thread(self._write_jobs, jobs)
+        except OSError as e:
+            logger.error(f"Could not persist analysis jobs: {e}")
+
+    async def _show_progress(self, job: AnalysisJob, line: str) -> None:
+        if job.message_id is None:
+            return
+        text = f"{job.status_text}\n\n{line}" if job.status_text else line
+        # Not awaited: queued edits of the same message are merged, only the latest one is sent
+        self.outbound_queue.submit("edit_message_text", job.chat_id, USER, message_id=job.message_id, text=text)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Unexpected analysis job error: {e}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    async def _collect_posts(self, job: AnalysisJob, stored_channel) -> Tuple[List[str], int]:
+        """Parse the channel and get posts to analyze with the newest message id they cover
+
+        With a personality, those are the corpus posts after the last analyzed
+        message, otherwise the newest posts of the corpus the parse just updated.
+        """
+        last_edit = 0.0
+
+        async def on_progress(channel: str, status: str, parsed: int):
+            nonlocal last_edit
+            if status in ("done", "failed"):
+                return
+            # Status changes are always shown, message counts at most every 3 seconds
+            if status == "running" and parsed and time.monotonic() - last_edit < 3:
+                return
+            last_edit = time.monotonic()
+            if status == "flood_wait":
+                line = "⏸ Telegram rate limit reached, parsing resumes automatically..."
+            elif status == "queued":
+                line = "🕒 Waiting for a free parser..."
+            else:
+                line = f"📥 Collected {parsed} messages..."
+            await self._show_progress(job, line)
+
+        incremental = bool(stored_channel and stored_channel.personality)
+        analyzed_up_to = None
+        if incremental:
+            analyzed_up_to = (stored_channel.personality.raw_analysis or {}).get(ANALYZED_UP_TO)
+            if analyzed_up_to is None:
+                # Analyzed before the cursor was kept: everything stored so far is covered
+                analyzed_up_to = await asyncio.to_thread(self.corpus.max_id, job.channel_username)
+
+        posts = await self.parse_scheduler.parse(
+            job.channel_username,
+            priority=INTERACTIVE,
+            incremental=incremental,
+            progress=on_progress
+        )
+        last_id = await asyncio.to_thread(self.corpus.max_id, job.channel_username)
+        if incremental:
+            records = await asyncio.to_thread(self.corpus.read_since, job.channel_username, analyzed_up_to)
+            return [record["text"] for record in records[-self.corpus_posts:]], last_id
+        stored = await asyncio.to_thread(self.corpus.latest_texts, job.channel_username, self.corpus_posts)
+        return stored or posts, last_id
+
+    async def _run(self, job: AnalysisJob) -> None:
+        on_success, on_failure = self._handlers.get(job.kind, (None, None))
+        try:
+            job.status = "parsing"
+            stored_channel = await self.storage.get_channel(job.channel_username)
+            posts, last_id = await self._collect_posts(job, stored_channel)
+
+            job.status = "analyzing"
+            job.posts_analyzed = len(posts)
+            await self._show_progress(job, f"🧠 Generating personality profile from {len(posts)} messages...")
+
+            previous_personality = stored_channel.personality if stored_channel else None
+            if previous_personality and not posts:
+                personality = previous_personality  # Nothing new since the last analysis
+            else:
+                personality = await self.personality_analyzer.analyze_posts(posts, previous_personality=previous_personality)
+            personality.raw_analysis = {**(personality.raw_analysis or {}), ANALYZED_UP_TO: last_id}
+
+            await self.storage.update_channel_personality(job.channel_username, personality)
+            await asyncio.to_thread(self.log_service.save_personality, job.channel_username, personality)
+
+            logger.info(
+                f"Personality analysis for {job.channel_username}:\n"
+                f"Traits: {', '.join(personality.traits)}\n"
+                f"Interests: {', '.join(personality.interests)}\n"
+                f"Communication Style: {personality.communication_style}"
+            )
+
+            job.status = "done"
+            if on_success:
+                await on_success(job, personality)
+
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.error(f"Analysis job {job.job_id} for {job.channel_username} failed: {e}", exc_info=True)
+            if on_failure:
+                try:
+                    await on_failure(job, e)
+                except Exception as handler_error:
+                    logger.error(f"Failure handler of job {job.job_id} failed: {handler_error}")
+        finally:
+            if job.status in ("done", "failed"):
+                self._jobs.pop(job.job_id, None)
+                await self._save_jobs()
@@ -0,0 +1,89 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Deque, Optional
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class _Pool:
+    prompt: str
+    created_at: float
+    candidates: Deque[str] = field(default_factory=deque)
+    refill: Optional[asyncio.Task] = None
+
+class CandidatePool:
+    """Pre-generated alternative posts per proposal, so Regenerate does not wait for the model
+
+    Each pool (keyed by proposal id, or channel for plain posts) is filled
+    with `candidates` posts from one request using the `n` parameter. Taking
+    a candidate refills the pool in the background once it runs low. Pools
+    are dropped after `ttl` seconds, when their prompt changes (e.g. a new
+    personality) and, least recently used first, beyond `max_pools`.
+    """
+
+    def __init__(self, personality_analyzer, candidates: int = 3, max_pools: int = 1000, ttl: float = 3600):
+        self.personality_analyzer = personality_analyzer
+        self.candidates = candidates
+        self.max_pools = max_pools
+        self.ttl = ttl
+        self._pools: "OrderedDict[str, _Pool]" = OrderedDict()
+
+    def _get_pool(self, key: str, prompt: str) -> _Pool:
+        pool = self._pools.get(key)
+        if pool and (pool.prompt != prompt or time.time() - pool.created_at > self.ttl):
+            self._drop(key)
+            pool = None
+        if pool is None:
+            pool = _Pool(prompt=prompt, created_at=time.time())
+            self._pools[key] = pool
+            while len(self._pools) > self.max_pools:
+                self._drop(next(iter(self._pools)))
+        self._pools.move_to_end(key)
+        return pool
+
+    def _drop(self, key: str) -> None:
+        pool = self._pools.pop(key, None)
+        if pool and pool.refill and not pool.refill.done():
+            pool.refill.cancel()
+
+    async def _refill(self, pool: _Pool) -> None:
+        try:
+            pool.candidates.extend(await self.personality_analyzer.generate_posts(pool.prompt, self.candidates))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Could not refill post candidates: {e}")
+
+    def _start_refill(self, pool: _Pool) -> asyncio.Task:
+        if pool.refill is None or pool.refill.done():
+            pool.refill = asyncio.create_task(self._refill(pool))
+        return pool.refill
+
+    def prefetch(self, key: str, prompt: str) -> None:
+        """Start generating candidates for a proposal that was just shown"""
+        pool = self._get_pool(key, prompt)
+        if not pool.candidates:
+            self._start_refill(pool)
+
+    async def next(self, key: str, prompt: str) -> Optional[str]:
+        """Take the next candidate, waiting for generation only when the pool is empty"""
+        pool = self._get_pool(key, prompt)
+        if not pool.candidates:
+            await asyncio.shield(self._start_refill(pool))
+        if not pool.candidates:
+            return None
+
+        candidate = pool.candidates.popleft()
+        if len(pool.candidates) <= 1:
+            self._start_refill(pool)
+        return candidate
+
+    async def stop(self) -> None:
+        """Cancel running refills"""
+        tasks = [pool.refill for pool in self._pools.values() if pool.refill and not pool.refill.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
@@ -1,17 +1,42 @@
+import asyncio
 import logging
+import time
+from typing import Dict, List, Optional, Tuple
 from telethon.sync import TelegramClient
 from telethon.tl.types import Channel
-from telethon.errors import ChatAdminRequiredError, ChannelPrivateError
+from telethon.errors import ChatAdminRequiredError, ChannelPrivateError, UsernameInvalidError, UsernameNotOccupiedError
 from telethon.tl.types import ChannelParticipantsSearch
 from telethon.tl.functions.channels import JoinChannelRequest
 from aiogram import Bot
 from aiogram.types import ChatMemberAdministrator
+from .entity_cache import EntityCache, CachedEntity
+
+# Lifetime of cached lookups that failed (channel not accessible, network error)
+PERMISSIONS_ERROR_TTL = 30
 
 class ChannelService:
-    def __init__(self, client: TelegramClient, bot_token: str):
+    def __init__(
+        self,
+        client: TelegramClient,
+        bot: Bot,
+        entity_cache: Optional[EntityCache] = None,
+        storage=None,
+        permissions_ttl: float = 300,
+        max_concurrent_checks: int = 8
+    ):
         self.client = client
-        self.bot = Bot(token=bot_token)  # Create bot instance for permission checks
+        self.bot = bot  # Shared bot instance, used for permission checks
         self.logger = logging.getLogger(__name__)
+        # Resolved usernames, saves ResolveUsername requests on hot paths
+        self.entity_cache = entity_cache
+        self.storage = storage  # Async storage, resolved ids are kept on the channel records
+        self._pending_resolves: Dict[str, asyncio.Future] = {}  # username -> in-flight resolve or refresh
+        # Bot rights per channel, invalidated on my_chat_member updates
+        self.permissions_ttl = permissions_ttl
+        self._permissions: Dict[str, Tuple[float, Optional[Dict[str, bool]]]] = {}  # username -> (expires_at, rights)
+        self._chat_ids: Dict[int, str] = {}  # chat id -> username, to invalidate by update chat
+        self._pending_checks: Dict[str, asyncio.Future] = {}  # username -> in-flight lookup
+        self._check_semaphore = asyncio.Semaphore(max_concurrent_checks)
 
     async def cleanup_username(self, username: str) -> str:
         if username.startswith('@'):
@@ -69,15 +94,95 @@ class ChannelService:
             return False
 
     async def get_channel_entity(self, channel_username: str) -> Channel:
+        """Fetch full channel entity from Telegram and remember its id"""
+        cached = self.entity_cache.get(channel_username) if self.entity_cache else None
+        if cached and cached.missing:
+            raise ValueError(f"Channel {channel_username} not found")
+
         try:
             channel = await self.client.get_entity(channel_username)
             if not isinstance(channel, Channel):
                 raise ValueError("Not a valid channel")
-            return channel
+        except (ValueError, UsernameInvalidError, UsernameNotOccupiedError) as e:
+            self.logger.error(f"Error getting channel entity: {e}")
+            if self.entity_cache:
+                self.entity_cache.put_missing(channel_username)
+                await self._save_entity_cache()
+            raise ValueError(str(e)) from e
         except Exception as e:
             self.logger.error(f"Error getting channel entity: {e}")
             raise
 
+        await self._remember_entity(channel_username, channel)
+        return channel
+
+    async def _remember_entity(self, channel_username: str, channel: Channel) -> Optional[CachedEntity]:
+        """Store resolved channel in the entity cache and on its storage record"""
+        if self.storage:
+            await self.storage.set_channel_entity(channel_username, channel.id, channel.access_hash, channel.title)
+        if not self.entity_cache:
+            return None
+        entry = self.entity_cache.put(channel_username, channel.id, channel.access_hash, channel.title)
+        await self._save_entity_cache()
+        return entry
+
+    async def _save_entity_cache(self) -> None:
+        try:
+            await asyncio.to_thread(self.entity_cache.save)
+        except OSError as e:
+            self.logger.error(f"Could not save entity cache: {e}")
+
+    async def _refresh_entity(self, channel_username: str) -> None:
+        try:
+            await self.get_channel_entity(f"@{channel_username}")
+        except Exception as e:
+            self.logger.warning(f"Background refresh of @{channel_username} failed: {e}")
+        finally:
+            self._pending_resolves.pop(channel_username, None)
+
+    async def resolve_channel(self, channel_username: str) -> CachedEntity:
+        """Get channel id, access hash and title, resolving the username only on a cache miss
+
+        Stale entries are returned right away and refreshed in the background.
+        Raises ValueError for usernames known not to be channels.
+        """
+        key = channel_username.lstrip('@').lower()
+
+        if not self.entity_cache:
+            channel = await self.get_channel_entity(f"@{key}")
+            return CachedEntity(key, channel.id, channel.access_hash, channel.title, time.time())
+
+        entry = self.entity_cache.get(key)
+        if entry is None and self.storage:
+            # Ids resolved before (e.g. when the channel was added) are kept on the channel record,
+            # records without a resolve time are treated as stale and refreshed in the background
+            stored = await self.storage.get_channel(key)
+            if stored and stored.channel_id:
+                entry = self.entity_cache.put(
+                    key, stored.channel_id, stored.access_hash, stored.title, resolved_at=stored.resolved_at or 0.0
+                )
+
+        if entry:
+            if entry.missing:
+                raise ValueError(f"Channel @{key} not found")
+            if self.entity_cache.is_stale(entry) and key not in self._pending_resolves:
+                self._pending_resolves[key] = asyncio.create_task(self._refresh_entity(key))
+            return entry
+
+        # Concurrent misses for the same username share one resolve
+        pending = self._pending_resolves.get(key)
+        if pending:
+            await pending
+            return await self.resolve_channel(key)
+
+        future = asyncio.ensure_future(self.get_channel_entity(f"@{key}"))
+        self._pending_resolves[key] = future
+        try:
+            channel = await future
+        finally:
+            self._pending_resolves.pop(key, None)
+        return self.entity_cache.get(key) or CachedEntity(key, channel.id, channel.access_hash, channel.title, time.time())
+
     async def ensure_bot_joined(self, channel) -> bool:
         """Ensure bot has joined the channel"""
         try:
@@ -88,36 +193,72 @@ class ChannelService:
             self.logger.error(f"Failed to join channel: {e}")
             return False
 
-    async def get_permissions_info(self, channel_username: str) -> str:
-        """Get formatted string of bot's permissions for a channel"""
-        try:
-            channel = await self.get_channel_entity(f"@{channel_username}")
-            channel_id = f"-100{channel.id}"
+    async def _fetch_permissions(self, channel_username: str) -> Optional[Dict[str, bool]]:
+        """Look up bot's rights in a channel, None if the channel can't be accessed"""
+        async with self._check_semaphore:
+            try:
+                channel = await self.resolve_channel(channel_username)
+                channel_id = int(f"-100{channel.channel_id}")
+                self._chat_ids[channel_id] = channel_username
 
-            bot_member = await self.bot.get_chat_member(
-                chat_id=channel_id,
-                user_id=self.bot.id
-            )
+                bot_member = await self.bot.get_chat_member(
+                    chat_id=channel_id,
+                    user_id=self.bot.id
+                )
+            except Exception as e:
+                self.logger.error(f"Error getting permissions for @{channel_username}: {e}")
+                return None
 
-            # Check key permissions
-            rights = {
-                'Admin': isinstance(bot_member, ChatMemberAdministrator),
-                'Post Messages': getattr(bot_member, 'can_post_messages', False) if isinstance(bot_member, ChatMemberAdministrator) else False,
-                'Edit Messages': getattr(bot_member, 'can_edit_messages', False) if isinstance(bot_member, ChatMemberAdministrator) else False,
-                'Delete Messages': getattr(bot_member, 'can_delete_messages', False) if isinstance(bot_member, ChatMemberAdministrator) else False,
-                'Send Messages': isinstance(bot_member, ChatMemberAdministrator)  # True if admin
-            }
+        is_admin = isinstance(bot_member, ChatMemberAdministrator)
+        return {
+            'Admin': is_admin,
+            'Post Messages': bool(getattr(bot_member, 'can_post_messages', False)) if is_admin else False,
+            'Edit Messages': bool(getattr(bot_member, 'can_edit_messages', False)) if is_admin else False,
+            'Delete Messages': bool(getattr(bot_member, 'can_delete_messages', False)) if is_admin else False,
+            'Send Messages': is_admin  # True if admin
+        }
 
-            # Format permissions string
-            rights_text = []
-            for right, has_right in rights.items():
-                icon = "✅" if has_right else "❌"
-                rights_text.append(f"{icon} {right}")
+    async def get_permissions(self, channel_username: str) -> Optional[Dict[str, bool]]:
+        """Get bot's rights in a channel from cache, looking them up when missing or expired"""
+        key = channel_username.lstrip('@').lower()
+        cached = self._permissions.get(key)
+        if cached and cached[0] > time.monotonic():
+            return cached[1]
 
-            return "\n".join(rights_text)
+        # Concurrent requests for the same channel share one lookup
+        pending = self._pending_checks.get(key)
+        if pending:
+            return await pending
 
-        except Exception as e:
-            self.logger.error(f"Error getting permissions for @{channel_username}: {e}")
+        future = asyncio.get_running_loop().create_future()
+        self._pending_checks[key] = future
+        try:
+            rights = await self._fetch_permissions(key)
+            ttl = self.permissions_ttl if rights is not None else PERMISSIONS_ERROR_TTL
+            self._permissions[key] = (time.monotonic() + ttl, rights)
+            future.set_result(rights)
+            return rights
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        finally:
+            del self._pending_checks[key]
+
+    def invalidate_permissions(self, chat_id: Optional[int] = None, channel_username: Optional[str] = None) -> None:
+        """Drop cached rights of a channel, e.g. after the bot's membership changed"""
+        if chat_id is not None and chat_id in self._chat_ids:
+            channel_username = self._chat_ids[chat_id]
+        if channel_username:
+            self._permissions.pop(channel_username.lstrip('@').lower(), None)
+
+    async def can_post(self, channel_username: str) -> bool:
+        """Check if bot is allowed to post in a channel"""
+        rights = await self.get_permissions(channel_username)
+        return bool(rights and rights['Post Messages'])
+
+    @staticmethod
+    def _format_permissions(rights: Optional[Dict[str, bool]]) -> str:
+        if rights is None:
             return (
                 "❌ Could not access channel\n"
                 "Please ensure:\n"
@@ -125,25 +266,35 @@ class ChannelService:
                 "2. Bot is an admin\n"
                 "3. Channel is accessible"
             )
+        return "\n".join(f"{'✅' if has_right else '❌'} {right}" for right, has_right in rights.items())
+
+    async def get_permissions_info(self, channel_username: str) -> str:
+        """Get formatted string of bot's permissions for a channel"""
+        return self._format_permissions(await self.get_permissions(channel_username))
+
+    async def get_permissions_info_many(self, channel_usernames: List[str]) -> Dict[str, str]:
+        """Get formatted permissions of several channels, cache misses are looked up concurrently"""
+        results = await asyncio.gather(*(self.get_permissions(username) for username in channel_usernames))
+        return {
+            username: self._format_permissions(rights)
+            for username, rights in zip(channel_usernames, results)
+        }
 
     async def send_message(self, channel_username: str, message: str) -> bool:
         """Send message to channel with admin rights check"""
         try:
             channel_username = channel_username.lstrip('@')
-            channel = await self.get_channel_entity(f"@{channel_username}")
-            channel_id = f"-100{channel.id}"
+            channel = await self.resolve_channel(channel_username)
+            channel_id = f"-100{channel.channel_id}"
 
             # Check bot's permissions
-            bot_member = await self.bot.get_chat_member(
-                chat_id=channel_id,
-                user_id=self.bot.id
-            )
+            rights = await self.get_permissions(channel_username)
 
-            if not isinstance(bot_member, ChatMemberAdministrator):
+            if not rights or not rights['Admin']:
                 raise ChatAdminRequiredError("Bot is not an admin in this channel")
 
             # Check specific permissions
-            if not bot_member.can_post_messages:
+            if not rights['Post Messages']:
                 raise ChatAdminRequiredError(
                     "Bot needs 'Post Messages' permission.\n"
                     "Please enable it in channel admin settings."
@@ -0,0 +1,138 @@
+import bisect
+import json
+import os
+import logging
+import threading
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Files shorter than this are never compacted, rewriting them saves little
+COMPACT_MIN_LINES = 1000
+
+class CorpusService:
+    """Per-channel post corpus stored as append-only JSONL keyed by message id
+
+    Each `{channel}_posts.jsonl` line is one message record
+    {"id", "date", "edit_date", "views", "text"}. Re-parsed messages are only
+    appended again when their text or edit date changed; the last line for an
+    id wins. Records are indexed by id in memory on first access, so reads of
+    messages newer than a given id are a bisect plus a slice. Once superseded
+    lines outnumber the live records, the file is compacted.
+    """
+
+    def __init__(self, data_dir: str):
+        self.data_dir = data_dir
+        self._records: Dict[str, Dict[int, dict]] = {}  # channel -> message id -> record
+        self._ids: Dict[str, List[int]] = {}  # channel -> sorted message ids
+        self._lines: Dict[str, int] = {}  # channel -> lines in the file, superseded ones included
+        self._lock = threading.Lock()
+        os.makedirs(data_dir, exist_ok=True)
+
+    def _path(self, channel: str) -> str:
+        return os.path.join(self.data_dir, f"{channel}_posts.jsonl")
+
+    def _load(self, channel: str) -> Dict[int, dict]:
+        """Load channel records into memory (caller holds the lock)"""
+        if channel in self._records:
+            return self._records[channel]
+
+        records: Dict[int, dict] = {}
+        lines = 0
+        path = self._path(channel)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        logger.warning(f"Skipping corrupt corpus line in {path}")
+                        continue
+                    records[record["id"]] = record
+
+        self._records[channel] = records
+        self._ids[channel] = sorted(records)
+        self._lines[channel] = lines
+        return records
+
+    def add_messages(self, channel: str, messages: List[dict]) -> int:
+        """Store new or edited messages, return number of records written"""
+        channel = channel.lstrip('@')
+        with self._lock:
+            records = self._load(channel)
+            ids = self._ids[channel]
+
+            new_records = []
+            for message in messages:
+                stored = records.get(message["id"])
+                if stored and stored["text"] == message["text"] and stored.get("edit_date") == message.get("edit_date"):
+                    stored["views"] = message.get("views")  # View counts alone are not worth a new line
+                    continue
+                if not stored:
+                    bisect.insort(ids, message["id"])
+                records[message["id"]] = message
+                new_records.append(message)
+
+            if new_records:
+                with open(self._path(channel), 'a', encoding='utf-8') as f:
+                    for record in new_records:
+                        f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n")
+                self._lines[channel] += len(new_records)
+                if self._lines[channel] > max(2 * len(records), COMPACT_MIN_LINES):
+                    self._compact(channel)
+
+            return len(new_records)
+
+    def max_id(self, channel: str) -> int:
+        """Get highest stored message id of a channel, 0 when empty"""
+        channel = channel.lstrip('@')
+        with self._lock:
+            self._load(channel)
+            ids = self._ids[channel]
+            return ids[-1] if ids else 0
+
+    def count(self, channel: str) -> int:
+        """Get number of stored messages of a channel"""
+        channel = channel.lstrip('@')
+        with self._lock:
+            return len(self._load(channel))
+
+    def read_since(self, channel: str, min_id: int = 0, limit: Optional[int] = None) -> List[dict]:
+        """Get records with id greater than min_id in ascending id order"""
+        channel = channel.lstrip('@')
+        with self._lock:
+            records = self._load(channel)
+            ids = self._ids[channel]
+            selected = ids[bisect.bisect_right(ids, min_id):]
+            if limit is not None:
+                selected = selected[:limit]
+            return [records[message_id] for message_id in selected]
+
+    def latest_texts(self, channel: str, limit: Optional[int] = None) -> List[str]:
+        """Get texts of the newest messages, newest first"""
+        channel = channel.lstrip('@')
+        with self._lock:
+            records = self._load(channel)
+            ids = self._ids[channel]
+            selected = ids[::-1] if limit is None else ids[:-limit - 1:-1]
+            return [records[message_id]["text"] for message_id in selected]
+
+    def compact(self, channel: str) -> None:
+        """Rewrite channel file keeping only the latest record per message id"""
+        channel = channel.lstrip('@')
+        with self._lock:
+            self._load(channel)
+            self._compact(channel)
+
+    def _compact(self, channel: str) -> None:
+        """Rewrite a loaded channel file (caller holds the lock)"""
+        records = self._records[channel]
+        path = self._path(channel)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for message_id in self._ids[channel]:
+                f.write(json.dumps(records[message_id], ensure_ascii=False, separators=(',', ':')) + "\n")
+        os.replace(tmp_path, path)
+        self._lines[channel] = len(records)
+        logger.info(f"Compacted corpus of {channel} to {len(records)} records")
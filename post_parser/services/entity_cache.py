@@ -0,0 +1,99 @@
+import json
+import os
+import logging
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+@dataclass
+class CachedEntity:
+    """Resolved channel, or a username known not to belong to a channel"""
+    username: str
+    channel_id: Optional[int]
+    access_hash: Optional[int]
+    title: Optional[str]
+    resolved_at: float
+    missing: bool = False
+
+class EntityCache:
+    """Persistent username -> channel id cache with negative entries
+
+    Entries older than `ttl` are still served but reported as stale so the
+    caller can refresh them in the background. Negative entries expire after
+    `negative_ttl`, after which the username is resolved again.
+    """
+
+    def __init__(self, path: str, ttl: float = 86400, negative_ttl: float = 600):
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: Dict[str, CachedEntity] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def _key(username: str) -> str:
+        return username.lstrip('@').lower()
+
+    def _load(self) -> None:
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._entries = {key: CachedEntity(**entry) for key, entry in json.load(f).items()}
+            logger.info(f"Loaded {len(self._entries)} cached channel entities")
+        except (json.JSONDecodeError, TypeError) as e:
+            logger.error(f"Could not load entity cache from {self.path}: {e}")
+
+    def save(self) -> None:
+        """Write cache to disk"""
+        with self._lock:
+            data = {key: asdict(entry) for key, entry in self._entries.items()}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+    def get(self, username: str) -> Optional[CachedEntity]:
+        """Get cached entry, None when unknown or an expired negative entry"""
+        with self._lock:
+            entry = self._entries.get(self._key(username))
+        if entry and entry.missing and time.time() - entry.resolved_at > self.negative_ttl:
+            return None
+        return entry
+
+    def is_stale(self, entry: CachedEntity) -> bool:
+        """Check if a resolved entry is due for a refresh"""
+        return time.time() - entry.resolved_at > self.ttl
+
+    def put(self, username: str, channel_id: int, access_hash: Optional[int], title: Optional[str],
+            resolved_at: Optional[float] = None) -> CachedEntity:
+        """Store resolved channel"""
+        entry = CachedEntity(
+            username=self._key(username),
+            channel_id=channel_id,
+            access_hash=access_hash,
+            title=title,
+            resolved_at=resolved_at if resolved_at is not None else time.time()
+        )
+        with self._lock:
+            self._entries[entry.username] = entry
+        return entry
+
+    def put_missing(self, username: str) -> None:
+        """Remember that a username does not resolve to a channel"""
+        key = self._key(username)
+        with self._lock:
+            self._entries[key] = CachedEntity(
+                username=key, channel_id=None, access_hash=None, title=None,
+                resolved_at=time.time(), missing=True
+            )
+
+    def invalidate(self, username: str) -> None:
+        """Drop entry of a username"""
+        with self._lock:
+            self._entries.pop(self._key(username), None)
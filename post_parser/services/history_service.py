@@ -0,0 +1,277 @@
+import bisect
+import json
+import os
+import logging
+import threading
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+from personality_analyzer import Personality
+
+logger = logging.getLogger(__name__)
+
+# Analysis fields that duplicate the personality itself or its previous version
+DERIVED_ANALYSIS_FIELDS = {
+    "name", "traits", "interests", "communication_style",
+    "previous_traits", "previous_interests", "previous_communication_style"
+}
+
+class PersonalityHistoryService:
+    """Versioned per-channel personality history stored as delta-encoded JSONL streams
+
+    Each channel has one `{channel}.jsonl` file. A line holds a version number,
+    its timestamp and either the full state (keyframe) or only the fields that
+    changed since the previous version. A keyframe is written every
+    `keyframe_interval` versions, so rebuilding any version replays a bounded
+    number of deltas. Line offsets are indexed in memory on first access.
+    """
+
+    def __init__(self, history_dir: str, keyframe_interval: int = 10):
+        self.history_dir = history_dir
+        self.keyframe_interval = keyframe_interval
+        self._index: Dict[str, List[dict]] = {}  # channel -> [{"v", "ts", "offset", "keyframe"}]
+        self._latest: Dict[str, dict] = {}  # channel -> state of latest version
+        self._lock = threading.Lock()
+        os.makedirs(history_dir, exist_ok=True)
+
+    def _path(self, channel: str) -> str:
+        return os.path.join(self.history_dir, f"{channel.lstrip('@')}.jsonl")
+
+    @staticmethod
+    def _to_state(personality: Personality) -> dict:
+        """Convert personality to the stored state, dropping derivable analysis fields"""
+        return {
+            "name": personality.name,
+            "traits": personality.traits,
+            "interests": personality.interests,
+            "communication_style": personality.communication_style,
+            "created_at": personality.created_at,
+            "updated_at": personality.updated_at,
+            "post_count": personality.post_count,
+            "analysis": {
+                key: value for key, value in (personality.raw_analysis or {}).items()
+                if key not in DERIVED_ANALYSIS_FIELDS
+            }
+        }
+
+    @staticmethod
+    def _from_state(state: dict, previous: Optional[dict]) -> Personality:
+        """Rebuild personality, restoring analysis fields from the state and previous version"""
+        raw_analysis = {
+            "name": state["name"],
+            "traits": state["traits"],
+            "interests": state["interests"],
+            "communication_style": state["communication_style"],
+            **state["analysis"],
+            "previous_traits": previous["traits"] if previous else None,
+            "previous_interests": previous["interests"] if previous else None,
+            "previous_communication_style": previous["communication_style"] if previous else None
+        }
+        return Personality(
+            name=state["name"],
+            traits=state["traits"],
+            interests=state["interests"],
+            communication_style=state["communication_style"],
+            created_at=state["created_at"],
+            updated_at=state["updated_at"],
+            post_count=state["post_count"],
+            raw_analysis=raw_analysis
+        )
+
+    @staticmethod
+    def _delta(old: dict, new: dict) -> dict:
+        """Encode the changes from old to new state"""
+        delta = {}
+        for key, value in new.items():
+            previous = old.get(key)
+            if previous == value:
+                continue
+            if isinstance(previous, list) and isinstance(value, list):
+                removed = [item for item in previous if item not in value]
+                added = [item for item in value if item not in previous]
+                # Additions/removals only when they reproduce the exact new order
+                if [item for item in previous if item not in removed] + added == value:
+                    delta[key] = {"remove": removed, "add": added}
+                    continue
+            if isinstance(previous, dict) and isinstance(value, dict):
+                delta[key] = {
+                    "update": {k: v for k, v in value.items() if previous.get(k) != v or k not in previous},
+                    "unset": [k for k in previous if k not in value]
+                }
+                continue
+            delta[key] = {"set": value}
+        return delta
+
+    @staticmethod
+    def _apply(state: dict, delta: dict) -> dict:
+        """Apply delta produced by _delta to a state"""
+        state = dict(state)
+        for key, change in delta.items():
+            if "set" in change:
+                state[key] = change["set"]
+            elif "add" in change:
+                state[key] = [item for item in state.get(key, []) if item not in change["remove"]] + change["add"]
+            else:
+                merged = {k: v for k, v in state.get(key, {}).items() if k not in change["unset"]}
+                merged.update(change["update"])
+                state[key] = merged
+        return state
+
+    def _load_index(self, channel: str) -> List[dict]:
+        """Build version index of a channel stream (caller holds the lock)"""
+        channel = channel.lstrip('@')
+        if channel in self._index:
+            return self._index[channel]
+
+        index = []
+        state = None
+        path = self._path(channel)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                offset = 0
+                for line in f:
+                    record = json.loads(line)
+                    state = record["full"] if "full" in record else self._apply(state, record["delta"])
+                    index.append({"v": record["v"], "ts": record["ts"], "offset": offset, "keyframe": "full" in record})
+                    offset += len(line)
+
+        self._index[channel] = index
+        if state is not None:
+            self._latest[channel] = state
+        return index
+
+    def _read_states(self, channel: str, start: int, end: int) -> List[dict]:
+        """Rebuild states of index positions start..end (caller holds the lock)"""
+        index = self._index[channel.lstrip('@')]
+        keyframe = start
+        while not index[keyframe]["keyframe"]:
+            keyframe -= 1
+
+        states = []
+        state = None
+        with open(self._path(channel), 'rb') as f:
+            f.seek(index[keyframe]["offset"])
+            for position in range(keyframe, end + 1):
+                record = json.loads(f.readline())
+                state = record["full"] if "full" in record else self._apply(state, record["delta"])
+                if position >= start:
+                    states.append(state)
+        return states
+
+    def _personality_at(self, channel: str, position: int) -> Personality:
+        """Rebuild personality at an index position (caller holds the lock)"""
+        if position > 0:
+            previous, state = self._read_states(channel, position - 1, position)
+        else:
+            previous, state = None, self._read_states(channel, 0, 0)[0]
+        return self._from_state(state, previous)
+
+    def append(self, channel: str, personality: Personality) -> int:
+        """Store personality as the next version of the channel, return the version number"""
+        channel = channel.lstrip('@')
+        state = self._to_state(personality)
+
+        with self._lock:
+            index = self._load_index(channel)
+            version = index[-1]["v"] + 1 if index else 1
+            record = {"v": version, "ts": datetime.utcnow().isoformat()}
+
+            previous = self._latest.get(channel)
+            if previous is None or version % self.keyframe_interval == 1:
+                record["full"] = state
+            else:
+                record["delta"] = self._delta(previous, state)
+
+            line = (json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n").encode('utf-8')
+            path = self._path(channel)
+            offset = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(path, 'ab') as f:
+                f.write(line)
+
+            index.append({"v": version, "ts": record["ts"], "offset": offset, "keyframe": "full" in record})
+            self._latest[channel] = state
+            return version
+
+    def versions(self, channel: str) -> List[dict]:
+        """List stored versions of a channel as {"v", "ts"}"""
+        with self._lock:
+            return [{"v": entry["v"], "ts": entry["ts"]} for entry in self._load_index(channel)]
+
+    def latest(self, channel: str) -> Optional[Personality]:
+        """Get latest stored personality of a channel"""
+        with self._lock:
+            index = self._load_index(channel)
+            if not index:
+                return None
+            return self._personality_at(channel, len(index) - 1)
+
+    def get_version(self, channel: str, version: int) -> Optional[Personality]:
+        """Get personality of a channel at a version number"""
+        with self._lock:
+            index = self._load_index(channel)
+            position = bisect.bisect_left([entry["v"] for entry in index], version)
+            if position == len(index) or index[position]["v"] != version:
+                return None
+            return self._personality_at(channel, position)
+
+    @staticmethod
+    def _to_utc(moment: datetime) -> datetime:
+        """Naive UTC datetime, as version timestamps are stored; naive input is taken as UTC"""
+        if moment.tzinfo is not None:
+            return moment.astimezone(timezone.utc).replace(tzinfo=None)
+        return moment
+
+    def as_of(self, channel: str, moment: datetime) -> Optional[Personality]:
+        """Get personality of a channel as it was at a given time (naive times are UTC)"""
+        with self._lock:
+            index = self._load_index(channel)
+            timestamps = [self._to_utc(datetime.fromisoformat(entry["ts"])) for entry in index]
+            position = bisect.bisect_right(timestamps, self._to_utc(moment)) - 1
+            if position < 0:
+                return None
+            return self._personality_at(channel, position)
+
+    def diff(self, channel: str, from_version: int, to_version: int) -> Optional[dict]:
+        """Get changes between two versions in the stored delta format"""
+        with self._lock:
+            index = self._load_index(channel)
+            positions = {entry["v"]: position for position, entry in enumerate(index)}
+            if from_version not in positions or to_version not in positions:
+                return None
+            old = self._read_states(channel, positions[from_version], positions[from_version])[0]
+            new = self._read_states(channel, positions[to_version], positions[to_version])[0]
+            return self._delta(old, new)
+
+    def compact(self, channel: str, keep_versions: int = 50) -> int:
+        """Drop all but the last keep_versions versions, return number of dropped versions"""
+        channel = channel.lstrip('@')
+        with self._lock:
+            index = self._load_index(channel)
+            dropped = len(index) - keep_versions
+            if dropped <= 0:
+                return 0
+
+            states = self._read_states(channel, dropped, len(index) - 1)
+            lines = []
+            previous = None
+            for position, state in enumerate(states):
+                entry = index[dropped + position]
+                record = {"v": entry["v"], "ts": entry["ts"]}
+                if previous is None or position % self.keyframe_interval == 0:
+                    record["full"] = state
+                else:
+                    record["delta"] = self._delta(previous, state)
+                lines.append(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + "\n")
+                previous = state
+
+            path = self._path(channel)
+            tmp_path = path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                f.writelines(lines)
+            os.replace(tmp_path, path)
+
+            # Offsets changed, rebuild on next access
+            del self._index[channel]
+            self._latest.pop(channel, None)
+
+        logger.info(f"Compacted personality history of {channel}: dropped {dropped} versions")
+        return dropped
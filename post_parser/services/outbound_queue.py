@@ -0,0 +1,266 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional, Set, Union
+from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+from .rate_limiter import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# Lanes, lower is sent first
+USER = 0  # Replies to something the user just did
+NOTIFICATION = 10  # Transaction notifications, post proposals, progress updates
+
+ChatId = Union[int, str]
+
+@dataclass
+class _Request:
+    seq: int
+    priority: int
+    chat_id: ChatId
+    method: str  # Bot method name, e.g. "send_message"
+    kwargs: Dict[str, Any]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+    coalesce_key: Optional[tuple] = None
+    attempts: int = 0
+
+class OutboundQueue:
+    """Paces outgoing Bot API calls under Telegram's global and per-chat limits
+
+    Requests are queued per chat and sent in order within a chat, except that
+    user-initiated requests overtake queued notifications. Across chats the
+    most urgent ready request goes first. A TelegramRetryAfter pauses only the
+    affected chat and the request is retried. Queued edits of the same message
+    are merged, so only the latest text is sent. Every `metrics_interval`
+    seconds the queue metrics are logged (when there was traffic) and the
+    rate limits of chats that went quiet are dropped.
+    """
+
+    def __init__(self, bot: Bot, global_rate: float = 30, per_chat_rate: float = 1, max_attempts: int = 3,
+                 metrics_interval: float = 60):
+        self.bot = bot
+        self.per_chat_rate = per_chat_rate
+        self.max_attempts = max_attempts
+        self.metrics_interval = metrics_interval
+        self._global = TokenBucket(global_rate, capacity=global_rate)
+        self._chat_buckets: Dict[ChatId, TokenBucket] = {}
+        self._chats: Dict[ChatId, Deque[_Request]] = {}  # chat -> queued requests in send order
+        self._busy: Set[ChatId] = set()  # chats with a request in flight
+        self._coalesce: Dict[tuple, _Request] = {}  # edit key -> queued request
+        self._seq = itertools.count()
+        self._wakeup = asyncio.Event()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._maintainer: Optional[asyncio.Task] = None
+        self._stats = {"sent": 0, "failed": 0, "coalesced": 0, "retry_after": 0, "max_wait": 0.0, "total_wait": 0.0}
+
+    def start(self) -> None:
+        """Start the dispatcher task"""
+        if not self._dispatcher:
+            self._dispatcher = asyncio.create_task(self._dispatch())
+            self._maintainer = asyncio.create_task(self._maintain())
+
+    async def stop(self) -> None:
+        """Stop the dispatcher, queued requests are dropped"""
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            self._maintainer.cancel()
+            await asyncio.gather(self._dispatcher, self._maintainer, return_exceptions=True)
+            self._dispatcher = self._maintainer = None
+        for requests in self._chats.values():
+            for request in requests:
+                request.future.cancel()
+        self._chats.clear()
+        self._coalesce.clear()
+
+    def submit(self, method: str, chat_id: ChatId, priority: int = NOTIFICATION, **kwargs) -> asyncio.Future:
+        """Queue a Bot API call, return a future with its result"""
+        coalesce_key = None
+        if method == "edit_message_text":
+            coalesce_key = (chat_id, kwargs.get("message_id"))
+            queued = self._coalesce.get(coalesce_key)
+            if queued:
+                # Not sent yet: replace the text, both callers get the same result
+                queued.kwargs.update(kwargs)
+                if priority < queued.priority:
+                    # Move into the more urgent lane, not just relabel it where it waits
+                    requests = self._chats[queued.chat_id]
+                    del requests[next(i for i, request in enumerate(requests) if request is queued)]
+                    queued.priority = priority
+                    self._enqueue(queued)
+                    self._wakeup.set()
+                self._stats["coalesced"] += 1
+                return queued.future
+
+        request = _Request(
+            seq=next(self._seq),
+            priority=priority,
+            chat_id=chat_id,
+            method=method,
+            kwargs={"chat_id": chat_id, **kwargs},
+            future=asyncio.get_running_loop().create_future(),
+            coalesce_key=coalesce_key
+        )
+        # Callers that don't await the result should not trigger "exception never retrieved"
+        request.future.add_done_callback(lambda f: f.cancelled() or f.exception())
+
+        self._enqueue(request)
+        if coalesce_key:
+            self._coalesce[coalesce_key] = request
+        self._wakeup.set()
+        return request.future
+
+    def _enqueue(self, request: _Request, front: bool = False) -> None:
+        requests = self._chats.setdefault(request.chat_id, deque())
+        if front:
+            requests.appendleft(request)
+            return
+        # Priority lane: go behind requests of the same or a more urgent lane only
+        position = len(requests)
+        while position > 0 and requests[position - 1].priority > request.priority:
+            position -= 1
+        requests.insert(position, request)
+
+    async def send_message(self, chat_id: ChatId, text: str, priority: int = NOTIFICATION, **kwargs):
+        """Queue a message and wait until it is sent"""
+        return await self.submit("send_message", chat_id, priority, text=text, **kwargs)
+
+    async def edit_message_text(self, chat_id: ChatId, message_id: int, text: str, priority: int = NOTIFICATION, **kwargs):
+        """Queue a message edit (merged with queued edits of the same message) and wait for it"""
+        return await self.submit("edit_message_text", chat_id, priority, message_id=message_id, text=text, **kwargs)
+
+    async def delete_message(self, chat_id: ChatId, message_id: int, priority: int = NOTIFICATION):
+        """Queue a message deletion and wait for it"""
+        return await self.submit("delete_message", chat_id, priority, message_id=message_id)
+
+    def metrics(self) -> dict:
+        """Get queue length per lane, pending chats and send statistics"""
+        queued = [request for requests in self._chats.values() for request in requests]
+        now = time.monotonic()
+        return {
+            "queued_user": sum(1 for request in queued if request.priority <= USER),
+            "queued_notification": sum(1 for request in queued if request.priority > USER),
+            "chats_waiting": sum(1 for requests in self._chats.values() if requests),
+            "in_flight": len(self._busy),
+            "oldest_wait": max((now - request.enqueued_at for request in queued), default=0.0),
+            "sent": self._stats["sent"],
+            "failed": self._stats["failed"],
+            "coalesced": self._stats["coalesced"],
+            "retry_after": self._stats["retry_after"],
+            "max_wait": self._stats["max_wait"],
+            "avg_wait": self._stats["total_wait"] / self._stats["sent"] if self._stats["sent"] else 0.0
+        }
+
+    async def _maintain(self) -> None:
+        """Log metrics and drop rate limits of idle chats periodically"""
+        last_sent = last_failed = 0
+        while True:
+            await asyncio.sleep(self.metrics_interval)
+            self._prune_buckets()
+            metrics = self.metrics()
+            if (metrics["sent"], metrics["failed"]) != (last_sent, last_failed) or metrics["chats_waiting"]:
+                last_sent, last_failed = metrics["sent"], metrics["failed"]
+                logger.info(
+                    f"Outbound queue: {metrics['queued_user']} user and {metrics['queued_notification']} notification "
+                    f"requests queued in {metrics['chats_waiting']} chats, {metrics['in_flight']} in flight, "
+                    f"oldest waiting {metrics['oldest_wait']:.1f}s; {metrics['sent']} sent, {metrics['failed']} failed, "
+                    f"{metrics['coalesced']} coalesced, {metrics['retry_after']} retry-after; "
+                    f"wait avg {metrics['avg_wait']:.2f}s, max {metrics['max_wait']:.2f}s; "
+                    f"{len(self._chat_buckets)} chat limits"
+                )
+
+    def _prune_buckets(self) -> None:
+        """Forget rate limits of chats with nothing queued whose bucket refilled and retry-after passed"""
+        idle = [
+            chat_id for chat_id, bucket in self._chat_buckets.items()
+            if chat_id not in self._chats and chat_id not in self._busy and bucket.idle()
+        ]
+        for chat_id in idle:
+            del self._chat_buckets[chat_id]
+
+    def _chat_bucket(self, chat_id: ChatId) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = self._chat_buckets[chat_id] = TokenBucket(self.per_chat_rate)
+        return bucket
+
+    def _next_ready(self):
+        """Find the most urgent request whose chat may send now, or the time until one may"""
+        best = None
+        wait = None
+        for chat_id, requests in self._chats.items():
+            if not requests or chat_id in self._busy:
+                continue
+            delay = self._chat_bucket(chat_id).delay()
+            if delay > 0:
+                wait = delay if wait is None else min(wait, delay)
+                continue
+            head = requests[0]
+            if best is None or (head.priority, head.seq) < (best.priority, best.seq):
+                best = head
+        return best, wait
+
+    async def _dispatch(self) -> None:
+        while True:
+            request, wait = self._next_ready()
+            if request is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            global_wait = self._global.delay()
+            if global_wait > 0:
+                await asyncio.sleep(global_wait)
+                continue  # Pick again, the chat may have been paused or a more urgent request queued
+
+            # Both budgets were checked without yielding, so neither token is taken in vain
+            self._chat_bucket(request.chat_id).try_acquire()
+            self._global.try_acquire()
+
+            self._chats[request.chat_id].popleft()
+            if not self._chats[request.chat_id]:
+                del self._chats[request.chat_id]
+            if request.coalesce_key:
+                self._coalesce.pop(request.coalesce_key, None)
+            self._busy.add(request.chat_id)
+            asyncio.create_task(self._execute(request))
+
+    async def _execute(self, request: _Request) -> None:
+        try:
+            request.attempts += 1
+            result = await getattr(self.bot, request.method)(**request.kwargs)
+        except TelegramRetryAfter as e:
+            self._stats["retry_after"] += 1
+            self._chat_bucket(request.chat_id).block(e.retry_after)
+            if request.attempts < self.max_attempts:
+                logger.warning(f"Retry after {e.retry_after}s for chat {request.chat_id}, requeueing {request.method}")
+                self._enqueue(request, front=True)
+                if request.coalesce_key and request.coalesce_key not in self._coalesce:
+                    self._coalesce[request.coalesce_key] = request
+                return
+            self._fail(request, e)
+        except Exception as e:
+            self._fail(request, e)
+        else:
+            waited = time.monotonic() - request.enqueued_at
+            self._stats["sent"] += 1
+            self._stats["total_wait"] += waited
+            self._stats["max_wait"] = max(self._stats["max_wait"], waited)
+            if not request.future.done():
+                request.future.set_result(result)
+        finally:
+            self._busy.discard(request.chat_id)
+            self._wakeup.set()
+
+    def _fail(self, request: _Request, error: Exception) -> None:
+        self._stats["failed"] += 1
+        logger.error(f"Failed to {request.method} in chat {request.chat_id}: {error}")
+        if not request.future.done():
+            request.future.set_exception(error)
@@ -0,0 +1,186 @@
+import asyncio
+import itertools
+import logging
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+from telethon.errors import FloodWaitError
+from .parser_service import ParserService
+
+logger = logging.getLogger(__name__)
+
+# Job priorities, lower runs first
+INTERACTIVE = 0
+BACKGROUND = 10
+
+ProgressCallback = Callable[[str, str, int], Awaitable[None]]  # (channel, status, parsed_messages)
+
+@dataclass(order=True)
+class ParseJob:
+    priority: int
+    seq: int
+    channel_username: str = field(compare=False)
+    incremental: bool = field(compare=False)
+    future: asyncio.Future = field(compare=False)
+    progress: List[ProgressCallback] = field(compare=False, default_factory=list)
+    status: str = field(compare=False, default="queued")
+    parsed: int = field(compare=False, default=0)
+    attempts: int = field(compare=False, default=0)
+
+class ParseScheduler:
+    """Runs channel parses concurrently under ParserService's shared request budget
+
+    Jobs are taken from a priority queue, so interactive requests overtake
+    queued background refreshes. A FloodWaitError parks only the affected job:
+    it is re-queued once the wait is over while the workers continue with other
+    channels, and the request budget is paused for account-wide waits.
+    """
+
+    def __init__(self, parser_service: ParserService, concurrency: int = 4, max_attempts: int = 5):
+        self.parser_service = parser_service
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._jobs: Dict[str, ParseJob] = {}  # channel -> queued, parked or running job
+        self._seq = itertools.count()
+        self._workers: List[asyncio.Task] = []
+
+    def start(self) -> None:
+        """Start worker tasks"""
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+            logger.info(f"Parse scheduler started with {self.concurrency} workers")
+
+    async def stop(self) -> None:
+        """Cancel worker tasks"""
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def submit(
+        self,
+        channel_username: str,
+        priority: int = INTERACTIVE,
+        incremental: bool = False,
+        progress: Optional[ProgressCallback] = None
+    ) -> asyncio.Future:
+        """Queue a channel parse, return a future with the parsed texts
+
+        A channel that is already queued or running is not parsed twice: the
+        existing job is returned (and promoted if the new request is more urgent).
+        """
+        key = channel_username.lstrip('@').lower()
+        job = self._jobs.get(key)
+        if job:
+            if progress:
+                job.progress.append(progress)
+            if priority < job.priority and job.status == "queued":
+                # Re-queue with the higher priority, the stale entry is skipped by workers
+                job.priority = priority
+                self._queue.put_nowait(job)
+            return job.future
+
+        job = ParseJob(
+            priority=priority,
+            seq=next(self._seq),
+            channel_username=channel_username,
+            incremental=incremental,
+            future=asyncio.get_running_loop().create_future(),
+            progress=[progress] if progress else []
+        )
+        self._jobs[key] = job
+        self._queue.put_nowait(job)
+        return job.future
+
+    def submit_many(self, channel_usernames: List[str], priority: int = BACKGROUND,
+                    incremental: bool = True) -> Dict[str, asyncio.Future]:
+        """Queue several channels, e.g. for bulk onboarding or periodic refreshes"""
+        return {
+            channel_username: self.submit(channel_username, priority=priority, incremental=incremental)
+            for channel_username in channel_usernames
+        }
+
+    async def parse(self, channel_username: str, priority: int = INTERACTIVE, incremental: bool = False,
+                    progress: Optional[ProgressCallback] = None) -> List[str]:
+        """Queue a channel parse and wait for its texts"""
+        return await self.submit(channel_username, priority, incremental, progress)
+
+    def get_progress(self) -> Dict[str, dict]:
+        """Get status and parsed message count of all unfinished jobs"""
+        return {
+            job.channel_username: {"status": job.status, "parsed": job.parsed, "attempts": job.attempts}
+            for job in self._jobs.values()
+        }
+
+    async def _report(self, job: ParseJob) -> None:
+        for callback in job.progress:
+            try:
+                await callback(job.channel_username, job.status, job.parsed)
+            except Exception as e:
+                logger.warning(f"Progress callback failed for {job.channel_username}: {e}")
+
+    def _requeue(self, job: ParseJob) -> None:
+        job.status = "queued"
+        self._queue.put_nowait(job)
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                if job.status != "queued" or job.future.done():
+                    continue  # Stale entry of a promoted or finished job
+                await self._run(job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Unexpected parse scheduler error: {e}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: ParseJob) -> None:
+        job.status = "running"
+        job.attempts += 1
+        await self._report(job)
+
+        async def on_progress(parsed: int):
+            job.parsed = parsed
+            await self._report(job)
+
+        try:
+            if job.incremental:
+                texts = await self.parser_service.parse_new_messages(job.channel_username, on_progress)
+            else:
+                texts = await self.parser_service.parse_channel(job.channel_username, on_progress)
+        except FloodWaitError as e:
+            if job.attempts >= self.max_attempts:
+                self._finish(job, "failed", error=e)
+                await self._report(job)
+                return
+
+            logger.warning(f"Flood wait of {e.seconds}s while parsing {job.channel_username}, parking job")
+            if self.parser_service.request_limiter:
+                self.parser_service.request_limiter.block(e.seconds)
+            job.status = "flood_wait"
+            await self._report(job)
+            asyncio.get_running_loop().call_later(e.seconds, self._requeue, job)
+            return
+        except Exception as e:
+            self._finish(job, "failed", error=e)
+            await self._report(job)
+            return
+
+        job.parsed = len(texts)
+        self._finish(job, "done", result=texts)
+        await self._report(job)
+
+    def _finish(self, job: ParseJob, status: str, result: Optional[List[str]] = None,
+                error: Optional[Exception] = None) -> None:
+        job.status = status
+        self._jobs.pop(job.channel_username.lstrip('@').lower(), None)
+        if job.future.done():
+            return
+        if error:
+            logger.error(f"Parsing {job.channel_username} failed: {error}")
+            job.future.set_exception(error)
+        else:
+            job.future.set_result(result)
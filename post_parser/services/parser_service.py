@@ -1,46 +1,198 @@
-import json
-import os
+import asyncio
 import logging
-from typing import List
+from typing import AsyncIterator, Awaitable, Callable, List, Optional
+from .corpus_service import CorpusService
+from .rate_limiter import TokenBucket
+
+# Marks the end of the download queue
+_END = object()
+
+# Messages returned by one GetHistory request inside iter_messages
+PAGE_SIZE = 100
 
 class ParserService:
-    def __init__(self, client, data_dir: str, config: dict):
+    def __init__(self, client, data_dir: str, config: dict, corpus_service: CorpusService,
+                 request_limiter: Optional[TokenBucket] = None):
         self.client = client
         self.data_dir = data_dir
         self.config = config
+        self.corpus = corpus_service
+        # Shared budget for history requests, one token per page
+        self.request_limiter = request_limiter
+        # Messages downloaded ahead of processing; bounds memory while pages keep coming
+        self.buffer_size = config.get("parse_buffer_size", 200)
+
+    @staticmethod
+    def _to_record(msg) -> dict:
+        """Convert Telethon message to corpus record"""
+        return {
+            "id": msg.id,
+            "date": msg.date.isoformat() if msg.date else None,
+            "edit_date": msg.edit_date.isoformat() if msg.edit_date else None,
+            "views": msg.views,
+            "text": msg.text
+        }
+
+    async def _download(self, channel_username: str, limit: int, min_id: int, reverse: bool, stats: dict) -> AsyncIterator:
+        """Stream messages through a bounded queue filled by a background download task"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.buffer_size)
+
+        async def produce():
+            try:
+                if self.request_limiter:
+                    await self.request_limiter.acquire()
+                fetched = 0
+                async for msg in self.client.iter_messages(channel_username, limit=limit, min_id=min_id, reverse=reverse):
+                    fetched += 1
+                    if self.request_limiter and fetched % PAGE_SIZE == 0:
+                        await self.request_limiter.acquire()  # Next message comes from a new page
+                    await queue.put(msg)
+                await queue.put(_END)
+            except asyncio.CancelledError:
+                raise  # The consumer stopped, nobody reads the queue any more
+            except Exception as e:
+                await queue.put(e)
 
-    async def parse_channel(self, channel_username: str) -> List[str]:
+        producer = asyncio.create_task(produce())
         try:
-            max_messages = self.config.get("max_messages_per_parse", 1000)
-            logging.info(f"Starting to parse {channel_username}, max messages: {max_messages}")
+            while True:
+                item = await queue.get()
+                if item is _END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                stats["total"] += 1
+                yield item
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
 
-            messages = await self.client.get_messages(
-                channel_username,
-                limit=max_messages
-            )
+    @staticmethod
+    async def _text_filter(messages: AsyncIterator) -> AsyncIterator:
+        """Drop messages without text (media only, service messages)"""
+        async for msg in messages:
+            if msg.text:
+                yield msg
 
-            # Get all messages with text
-            parsed_messages = [msg.text for msg in messages if msg.text]
+    async def _normalize(self, messages: AsyncIterator) -> AsyncIterator[dict]:
+        """Turn messages into corpus records with normalized text"""
+        async for msg in messages:
+            record = self._to_record(msg)
+            record["text"] = record["text"].replace("\r\n", "\n").strip()
+            if record["text"]:
+                yield record
 
-            total_messages = len(messages)
-            text_messages = len(parsed_messages)
-            skipped_messages = total_messages - text_messages
+    async def _write_corpus(self, channel_username: str, records: AsyncIterator[dict], stats: dict) -> AsyncIterator[dict]:
+        """Persist records to the corpus in chunks while passing them on"""
+        pending = []
+        try:
+            async for record in records:
+                pending.append(record)
+                yield record
+                if len(pending) >= self.buffer_size:
+                    stats["written"] += await asyncio.to_thread(self.corpus.add_messages, channel_username, pending)
+                    pending = []
+        finally:
+            # Also keep what was parsed when the consumer stops early
+            if pending:
+                stats["written"] += await asyncio.to_thread(self.corpus.add_messages, channel_username, pending)
+
+    @staticmethod
+    async def _batch(records: AsyncIterator[dict], batch_size: int) -> AsyncIterator[List[dict]]:
+        """Group records into batches for the analyzer"""
+        batch = []
+        async for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def iter_post_batches(
+        self,
+        channel_username: str,
+        batch_size: Optional[int] = None,
+        min_id: int = 0,
+        reverse: bool = False
+    ) -> AsyncIterator[List[dict]]:
+        """
+        Stream channel posts as batches of corpus records, newest first unless reversed
 
-            logging.info(
-                f"Channel {channel_username} statistics:\n"
-                f"- Total messages fetched: {total_messages}\n"
-                f"- Messages with text: {text_messages}\n"
-                f"- Skipped (no text): {skipped_messages}"
-            )
+        Pipeline: iter_messages -> text filter -> normalizer -> corpus writer -> batcher.
+        Each batch is yielded as soon as it is complete, while later pages are
+        still downloading.
 
-            os.makedirs(self.data_dir, exist_ok=True)
-            file_path = os.path.join(self.data_dir, f"{channel_username}_posts.json")
+        Args:
+            channel_username: Channel to parse
+            batch_size: Records per batch, defaults to max_posts_per_batch
+            min_id: Only fetch messages newer than this id
+            reverse: Fetch oldest first, so an interrupted parse never moves
+                     the corpus cursor past messages it did not store
+        """
+        max_messages = self.config.get("max_messages_per_parse", 1000)
+        batch_size = batch_size or self.config.get("max_posts_per_batch", 10)
+        stats = {"total": 0, "written": 0, "text": 0}
 
-            with open(file_path, "w", encoding="utf-8") as json_file:
-                json.dump(parsed_messages, json_file, ensure_ascii=False, indent=4)
+        logging.info(f"Starting to parse {channel_username}, max messages: {max_messages}, min id: {min_id}")
+
+        messages = self._download(channel_username, max_messages, min_id, reverse, stats)
+        texts = self._text_filter(messages)
+        normalized = self._normalize(texts)
+        records = self._write_corpus(channel_username, normalized, stats)
+        batches = self._batch(records, batch_size)
+        try:
+            async for batch in batches:
+                stats["text"] += len(batch)
+                yield batch
+        finally:
+            # Close the stages in order when the consumer stops early: the corpus
+            # writer flushes what it holds, then the download task is stopped
+            for stage in (batches, records, normalized, texts, messages):
+                await stage.aclose()
 
+        logging.info(
+            f"Channel {channel_username} statistics:\n"
+            f"- Total messages fetched: {stats['total']}\n"
+            f"- Messages with text: {stats['text']}\n"
+            f"- Skipped (no text): {stats['total'] - stats['text']}\n"
+            f"- New or edited in corpus: {stats['written']}"
+        )
+
+    async def parse_channel(self, channel_username: str,
+                            progress: Optional[Callable[[int], Awaitable[None]]] = None) -> List[str]:
+        """Parse latest messages of a channel, return their texts newest first"""
+        try:
+            parsed_messages = []
+            async for batch in self.iter_post_batches(channel_username, batch_size=self.buffer_size):
+                parsed_messages.extend(record["text"] for record in batch)
+                if progress:
+                    await progress(len(parsed_messages))
             return parsed_messages
 
         except Exception as e:
             logging.error(f"Error parsing channel: {e}")
-            raise
\ No newline at end of file
+            raise
+
+    async def parse_new_messages(self, channel_username: str,
+                                 progress: Optional[Callable[[int], Awaitable[None]]] = None) -> List[str]:
+        """Fetch only messages newer than the corpus cursor, return their texts oldest first"""
+        try:
+            min_id = await asyncio.to_thread(self.corpus.max_id, channel_username)
+            if not min_id:
+                # Nothing stored yet, the cursor has to be established by a full parse
+                return await self.parse_channel(channel_username, progress)
+
+            parsed_messages = []
+            async for batch in self.iter_post_batches(
+                channel_username, batch_size=self.buffer_size, min_id=min_id, reverse=True
+            ):
+                parsed_messages.extend(record["text"] for record in batch)
+                if progress:
+                    await progress(len(parsed_messages))
+
+            return parsed_messages
+
+        except Exception as e:
+            logging.error(f"Error parsing new messages: {e}")
+            raise
@@ -0,0 +1,139 @@
+import asyncio
+import json
+import logging
+import os
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Union
+from onchain_parser.models import TokenInfo, TokenTransfer, TransactionEvent, TransactionDigest
+
+logger = logging.getLogger(__name__)
+
+ProposalEvent = Union[TransactionEvent, TransactionDigest]
+
+def _encode_event(event: TransactionEvent) -> list:
+    return [
+        event.hash, event.block_number, event.timestamp, event.from_address, event.to_address,
+        event.value, event.status,
+        [
+            [
+                transfer.token.address, transfer.token.symbol, transfer.token.price, transfer.token.volume24h,
+                transfer.token.liquidity, transfer.token.priceChange24h,
+                transfer.from_address, transfer.to_address, transfer.amount, transfer.operation
+            ]
+            for transfer in event.transfers
+        ]
+    ]
+
+def _decode_event(data: list) -> TransactionEvent:
+    *fields, transfers = data
+    return TransactionEvent(
+        *fields,
+        transfers=[
+            TokenTransfer(TokenInfo(*transfer[:6]), *transfer[6:])
+            for transfer in transfers
+        ]
+    )
+
+def encode_proposal_event(event: ProposalEvent) -> str:
+    """Serialize transaction or digest to compact JSON (positional fields, no keys)"""
+    if isinstance(event, TransactionDigest):
+        data = {"w": event.wallet_address, "e": [_encode_event(item) for item in event.events]}
+    else:
+        data = {"e": _encode_event(event)}
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+def decode_proposal_event(payload: str) -> ProposalEvent:
+    """Deserialize output of encode_proposal_event"""
+    data = json.loads(payload)
+    if "w" in data:
+        return TransactionDigest(data["w"], [_decode_event(item) for item in data["e"]])
+    return _decode_event(data["e"])
+
+@dataclass
+class Proposal:
+    proposal_id: str
+    channel_username: str
+    event: ProposalEvent
+    created_at: float
+
+class ProposalStore:
+    """Transaction context of sent post proposals, keyed by a short id used in callback_data
+
+    Events are kept serialized in an LRU of at most `max_entries` and expire
+    after `ttl` seconds. With a `path`, proposals are also written to SQLite,
+    so entries evicted from memory (or from before a restart) are still found.
+    """
+
+    def __init__(self, max_entries: int = 1000, ttl: float = 86400, path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.path = path
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # id -> (channel, created_at, payload)
+        self._db_lock = threading.Lock()
+        self._db = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS proposals ("
+                "id TEXT PRIMARY KEY, channel TEXT NOT NULL, created_at REAL NOT NULL, payload TEXT NOT NULL)"
+            )
+            self._db.commit()
+
+    def _remember(self, proposal_id: str, entry: tuple) -> None:
+        self._entries[proposal_id] = entry
+        self._entries.move_to_end(proposal_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _db_put(self, proposal_id: str, entry: tuple) -> None:
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO proposals (id, channel, created_at, payload) VALUES (?1, ?2, ?3, ?4)",
+                (proposal_id, *entry)
+            )
+            # Expired rows are dropped on write, so the file stays bounded by the TTL
+            self._db.execute("DELETE FROM proposals WHERE created_at < ?1", (time.time() - self.ttl,))
+            self._db.commit()
+
+    def _db_get(self, proposal_id: str) -> Optional[tuple]:
+        with self._db_lock:
+            return self._db.execute(
+                "SELECT channel, created_at, payload FROM proposals WHERE id = ?1", (proposal_id,)
+            ).fetchone()
+
+    async def put(self, channel_username: str, event: ProposalEvent) -> str:
+        """Store proposal context, return its id"""
+        proposal_id = secrets.token_urlsafe(6)
+        entry = (channel_username, time.time(), encode_proposal_event(event))
+        self._remember(proposal_id, entry)
+        if self._db:
+            await asyncio.to_thread(self._db_put, proposal_id, entry)
+        return proposal_id
+
+    async def get(self, proposal_id: str) -> Optional[Proposal]:
+        """Get proposal context, None when unknown or expired"""
+        entry = self._entries.get(proposal_id)
+        if entry is None and self._db:
+            entry = await asyncio.to_thread(self._db_get, proposal_id)
+        if entry is None:
+            return None
+
+        channel_username, created_at, payload = entry
+        if time.time() - created_at > self.ttl:
+            self._entries.pop(proposal_id, None)
+            return None
+
+        self._remember(proposal_id, tuple(entry))
+        return Proposal(proposal_id, channel_username, decode_proposal_event(payload), created_at)
+
+    def close(self) -> None:
+        if self._db:
+            with self._db_lock:
+                self._db.close()
+            self._db = None
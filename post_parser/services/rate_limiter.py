@@ -0,0 +1,56 @@
+import asyncio
+import time
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens per second with bursts of up to `capacity`
+
+    Capacity is at least one token, otherwise a rate below 1/s could never
+    accumulate a whole token.
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """Seconds until a token is available"""
+        self._refill()
+        wait = max(0.0, self._blocked_until - time.monotonic())
+        if self._tokens < 1:
+            wait = max(wait, (1 - self._tokens) / self.rate)
+        return wait
+
+    def idle(self) -> bool:
+        """Whether the bucket is full and not blocked, so a fresh bucket would behave the same"""
+        self._refill()
+        return self._tokens >= self.capacity and time.monotonic() >= self._blocked_until
+
+    def try_acquire(self) -> bool:
+        """Take a token if one is available right now"""
+        if self.delay() > 0:
+            return False
+        self._tokens -= 1
+        return True
+
+    async def acquire(self) -> None:
+        """Wait for and take a token"""
+        async with self._lock:
+            while True:
+                wait = self.delay()
+                if wait <= 0:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep(wait)
+
+    def block(self, seconds: float) -> None:
+        """Hand out no tokens for the given time (e.g. after a flood wait)"""
+        self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
@@ -1,36 +1,41 @@
 import logging
-from typing import Optional, Tuple
+import math
+import time
+from typing import Dict, Optional, Tuple, Union
 from aiogram import Bot
-from onchain_parser.api import subscribe_to_wallet, unsubscribe_from_wallet
-from onchain_parser.models import TransactionEvent
+from onchain_parser.api import subscribe_to_wallet, unsubscribe_from_wallet, subscribe_to_pending, unsubscribe_from_pending
+from onchain_parser.models import TransactionEvent, PendingTransaction, TransactionDigest
 from onchain_parser.monitor_service import monitor_service
+from onchain_parser.wallet_monitor import get_token_info
 import asyncio
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from aiogram.fsm.context import FSMContext
+from .outbound_queue import OutboundQueue, USER
+from .proposal_store import ProposalStore
+from .candidate_pool import CandidatePool
 
 logger = logging.getLogger(__name__)
 
 class WalletService:
-    def __init__(self, bot: Bot, storage, personality_analyzer, fsm_storage):
+    def __init__(self, bot: Bot, storage, personality_analyzer, proposal_store: ProposalStore, outbound_queue: OutboundQueue,
+                 candidate_pool: CandidatePool, digest_window: float = 0, stream_edit_interval: float = 1.0):
         self.bot = bot
+        self.outbound_queue = outbound_queue  # Paced sending, notifications must not trip flood limits
+        # Seconds transactions of a wallet are collected into one digest, 0 sends each one right away
+        self.digest_window = digest_window
+        self._digests: Dict[str, TransactionDigest] = {}  # wallet -> digest being collected
+        self._digest_tasks = set()
         self.storage = storage
         self.personality_analyzer = personality_analyzer
-        self.fsm_storage = fsm_storage
+        self.proposal_store = proposal_store  # Transaction context of each sent proposal
+        self.candidate_pool = candidate_pool  # Alternative posts ready for Regenerate
+        self.stream_edit_interval = stream_edit_interval  # Seconds between edits of a message a post streams into
         self._loop = asyncio.get_event_loop()
+        self._speculative_posts: Dict[str, Tuple[tuple, float, asyncio.Task]] = {}  # tx hash -> (details, started_at, task)
         logger.info("WalletService initialized")
 
-    def get_channel_for_wallet(self, wallet_address: str) -> Tuple[Optional[str], Optional[int]]:
-        """Get channel username and user_id for a wallet"""
-        for channel in self.storage.channels.values():
-            if channel.wallets:
-                for wallet in channel.wallets:
-                    if wallet.address.lower() == wallet_address.lower():
-                        return channel.username, channel.user_id
-        return None, None
-
-    def _create_post_keyboard(self, channel_username: str, is_transaction: bool = True) -> InlineKeyboardMarkup:
-        """Create keyboard for post actions"""
+    def _create_post_keyboard(self, channel_username: str, proposal_id: Optional[str] = None) -> InlineKeyboardMarkup:
+        """Create keyboard for post actions, transaction proposals regenerate from their stored context"""
         builder = InlineKeyboardBuilder()
 
         # Add post to channel button
@@ -40,10 +45,10 @@ class WalletService:
         )
 
         # Add regenerate button with transaction context if it's a transaction post
-        if is_transaction:
+        if proposal_id:
             builder.button(
                 text="🔄 Regenerate",
-                callback_data=f"regenerate_tx_post:{channel_username}"
+                callback_data=f"regenerate_tx_post:{proposal_id}"
             )
         else:
             builder.button(
@@ -54,21 +59,34 @@ class WalletService:
         builder.adjust(1)  # One button per row
         return builder.as_markup()
 
-    async def generate_post_proposal(self, tx_event: TransactionEvent, channel_username: str) -> str:
-        """Generate post proposal based on transaction and channel personality"""
-        try:
-            channel = self.storage.get_channel(channel_username)
-            if not channel or not channel.personality:
-                return self.format_default_post(tx_event)
+    def _describe_transaction(self, tx_event: TransactionEvent) -> Tuple[str, str, float, object]:
+        """Get operation, token, amount and price used to describe a transaction"""
+        tx_type = 'SELL' if tx_event.transfers and tx_event.transfers[0].operation == 'SELL' else 'BUY'
+        token = tx_event.transfers[0].token.symbol if tx_event.transfers else 'ETH'
+        amount = tx_event.transfers[0].amount if tx_event.transfers else tx_event.value
+        price = tx_event.transfers[0].token.price if tx_event.transfers else 'N/A'
+        return tx_type, token, amount, price
 
-            # Format transaction details
-            tx_type = 'SELL' if tx_event.transfers and tx_event.transfers[0].operation == 'SELL' else 'BUY'
-            token = tx_event.transfers[0].token.symbol if tx_event.transfers else 'ETH'
-            amount = tx_event.transfers[0].amount if tx_event.transfers else tx_event.value
-            price = tx_event.transfers[0].token.price if tx_event.transfers else 'N/A'
+    @staticmethod
+    def _describe_pending(pending: PendingTransaction) -> Optional[Tuple[str, Optional[str], Optional[float], object]]:
+        """
+        Describe a pending transaction as _describe_transaction will once it is mined
 
-            # Use personality to generate custom post
-            prompt = f"""Generate a Telegram post with the following characteristics:
+        Plain ETH transfers are fully known before the receipt. For swaps the
+        amount only comes from the receipt's Transfer logs, so they are
+        described without one: the operation (SWAP when the direction is
+        unknown, e.g. Universal Router execute) and the token address when the
+        router path names it. Other calls return None and are not speculated.
+        """
+        if pending.method_id is None:
+            return 'BUY', 'ETH', pending.value, 'N/A'
+        if pending.operation in ('BUY', 'SELL', 'SWAP'):
+            return pending.operation, pending.token_address, None, 'N/A'
+        return None
+
+    def _build_post_prompt(self, channel, tx_type: str, token: str, amount, price) -> str:
+        """Build the post generation prompt for a transaction"""
+        return f"""Generate a Telegram post with the following characteristics:
 
 Personality Traits: {', '.join(channel.personality.traits[:3])}
 Main Interests: {', '.join(channel.personality.interests[:3])}
@@ -92,8 +110,60 @@ Requirements:
 
 Generate a single post that explains the transaction and reasoning:"""
 
+    def _build_digest_prompt(self, channel, digest: TransactionDigest) -> str:
+        """Build the post generation prompt for several transactions"""
+        positions = "\n".join(
+            f"- {symbol}: net {'bought' if position['amount'] >= 0 else 'sold'} {abs(position['amount']):,.4f} "
+            f"(${abs(position['value']):,.2f})"
+            for symbol, position in digest.positions.items()
+        ) or "- ETH transfers only"
+        net_value = f"${digest.net_value:,.2f}" if digest.net_value is not None else "N/A"
+
+        return f"""Generate a Telegram post with the following characteristics:
+
+Personality Traits: {', '.join(channel.personality.traits[:3])}
+Main Interests: {', '.join(channel.personality.interests[:3])}
+Communication Style: {channel.personality.communication_style}
+
+Trading Session ({len(digest.events)} transactions):
+{positions}
+- Total Volume: ${digest.total_value:,.2f}
+- Net Value: {net_value}
+
+Requirements:
+1. Match the communication style exactly
+2. Summarize the session as one move, focusing on the net positions
+3. Explain WHY these trades were made together
+4. Express the personality traits naturally
+5. Be concise and engaging
+6. Include relevant emojis
+7. Format appropriately for Telegram
+
+Generate a single post that explains the trades and reasoning:"""
+
+    async def _build_proposal_prompt(self, tx_event: Union[TransactionEvent, TransactionDigest], channel_username: str) -> Optional[str]:
+        """Prompt for a transaction (or digest) post, None when the channel has no personality yet"""
+        channel = await self.storage.get_channel(channel_username)
+        if not channel or not channel.personality:
+            return None
+        if isinstance(tx_event, TransactionDigest):
+            return self._build_digest_prompt(channel, tx_event)
+        return self._build_post_prompt(channel, *self._describe_transaction(tx_event))
+
+    async def generate_post_proposal(self, tx_event: Union[TransactionEvent, TransactionDigest], channel_username: str,
+                                     use_cache: bool = True) -> str:
+        """Generate post proposal based on a transaction (or digest) and channel personality, `use_cache=False` forces a new one"""
+        if isinstance(tx_event, TransactionDigest) and len(tx_event.events) == 1:
+            tx_event = tx_event.events[0]
+
+        try:
+            # Use personality to generate custom post
+            prompt = await self._build_proposal_prompt(tx_event, channel_username)
+            if not prompt:
+                return self.format_default_post(tx_event)
+
             try:
-                response = self.personality_analyzer.generate_post(prompt)
+                response = await self.personality_analyzer.generate_post(prompt, use_cache=use_cache)
                 if response:
                     return response
             except Exception as e:
@@ -105,9 +175,116 @@ Generate a single post that explains the transaction and reasoning:"""
             logger.error(f"Error in generate_post_proposal: {e}", exc_info=True)
             return self.format_default_post(tx_event)
 
-    def format_default_post(self, tx_event: TransactionEvent) -> str:
+    async def stream_post_to_message(self, chat_id: int, message_id: int, header: str, prompt: str,
+                                     reply_markup: InlineKeyboardMarkup, use_cache: bool = True) -> Optional[str]:
+        """
+        Generate a post into an existing message, editing it while the text arrives
+
+        Edits are throttled and go through the outbound queue, which merges
+        queued edits of the message. The keyboard is only attached to the
+        final edit, so the post cannot be published half-written.
+        """
+        text, last_edit = None, 0.0
+        async for text in self.personality_analyzer.stream_post(prompt, use_cache=use_cache):
+            if time.monotonic() - last_edit >= self.stream_edit_interval:
+                last_edit = time.monotonic()
+                # Not awaited: newer text replaces a queued edit of the same message
+                self.outbound_queue.submit(
+                    "edit_message_text", chat_id, USER, message_id=message_id, text=f"{header}{text} ▌"
+                )
+
+        if text:
+            await self.outbound_queue.edit_message_text(
+                chat_id, message_id, f"{header}{text}", priority=USER, reply_markup=reply_markup
+            )
+        return text
+
+    async def prefetch_proposal_candidates(self, proposal_id: str, tx_event: Union[TransactionEvent, TransactionDigest],
+                                           channel_username: str) -> None:
+        """Start generating alternatives for a sent proposal, so its first Regenerate is instant"""
+        if isinstance(tx_event, TransactionDigest) and len(tx_event.events) == 1:
+            tx_event = tx_event.events[0]
+        try:
+            prompt = await self._build_proposal_prompt(tx_event, channel_username)
+            if prompt:
+                self.candidate_pool.prefetch(proposal_id, prompt)
+        except Exception as e:
+            logger.error(f"Error prefetching candidates for proposal {proposal_id}: {e}")
+
+    async def regenerate_post_proposal(self, proposal_id: str, tx_event: Union[TransactionEvent, TransactionDigest],
+                                       channel_username: str) -> str:
+        """Take the next pre-generated alternative of a proposal"""
+        if isinstance(tx_event, TransactionDigest) and len(tx_event.events) == 1:
+            tx_event = tx_event.events[0]
+        try:
+            prompt = await self._build_proposal_prompt(tx_event, channel_username)
+            if prompt:
+                candidate = await self.candidate_pool.next(proposal_id, prompt)
+                if candidate:
+                    return candidate
+        except Exception as e:
+            logger.error(f"Error taking candidate for proposal {proposal_id}: {e}", exc_info=True)
+        return await self.generate_post_proposal(tx_event, channel_username, use_cache=False)
+
+    async def generate_pending_post_proposal(self, pending: PendingTransaction, channel_username: str) -> Optional[str]:
+        """Speculatively generate post proposal from a pre-decoded pending transaction"""
+        try:
+            details = self._describe_pending(pending)
+            channel = await self.storage.get_channel(channel_username)
+            if not details or not channel or not channel.personality:
+                return None
+
+            tx_type, token, amount, price = details
+            if amount is None:
+                # Swap draft: amounts are only known from the receipt, name the token if the path gave it
+                token_info = await asyncio.to_thread(get_token_info, token) if token else None
+                token = token_info.symbol if token_info else 'a token'
+                price = token_info.price if token_info else price
+                amount = 'not known until the swap is mined, do not mention it'
+
+            prompt = self._build_post_prompt(channel, tx_type, token, amount, price)
+            return await self.personality_analyzer.generate_post(prompt)
+
+        except Exception as e:
+            logger.error(f"Error in generate_pending_post_proposal: {e}", exc_info=True)
+            return None
+
+    @staticmethod
+    def _tx_key(tx_hash: str) -> str:
+        """Normalize transaction hash for speculative post lookups"""
+        tx_hash = tx_hash.lower()
+        return tx_hash[2:] if tx_hash.startswith('0x') else tx_hash
+
+    async def _take_speculative_post(self, tx_event: TransactionEvent) -> Optional[str]:
+        """Reconcile speculative post with the mined transaction, if one was started"""
+        speculative = self._speculative_posts.pop(self._tx_key(tx_event.hash), None)
+        if not speculative:
+            return None
+
+        (tx_type, token, amount, _), _, task = speculative
+        mined_type, mined_token, mined_amount, _ = self._describe_transaction(tx_event)
+        if amount is None:
+            # Swap draft: written without amounts, direction and token (when decoded) have to match
+            mined_address = tx_event.transfers[0].token.address.lower() if tx_event.transfers else None
+            matches = bool(tx_event.transfers) and tx_type in ('SWAP', mined_type) and token in (None, mined_address)
+        else:
+            matches = (tx_type, token) == (mined_type, mined_token) and math.isclose(float(amount), float(mined_amount))
+        if tx_event.status != 'Success' or not matches:
+            # Pre-decoded guess was wrong, the post has to be generated from the receipt
+            task.cancel()
+            return None
+
+        try:
+            return await task
+        except Exception as e:
+            logger.error(f"Speculative post generation failed: {e}")
+            return None
+
+    def format_default_post(self, tx_event: Union[TransactionEvent, TransactionDigest]) -> str:
         """Format default post when personality-based generation fails"""
         try:
+            if isinstance(tx_event, TransactionDigest):
+                return f"🔔 New Trading Activity!\n\n{tx_event.format_brief()}"
             if tx_event.transfers:
                 transfer = tx_event.transfers[0]
                 total_value_str = f"${transfer.total_value:.2f}" if transfer.total_value else "N/A"
@@ -130,47 +307,88 @@ Generate a single post that explains the transaction and reasoning:"""
             return "Failed to format transaction post"
 
     async def handle_transaction(self, tx_event: TransactionEvent, wallet_address: str):
-        """Handle incoming transaction event"""
+        """Handle incoming transaction event, collecting bursts into one digest"""
+        if self.digest_window <= 0:
+            await self._deliver_digest(TransactionDigest(wallet_address, [tx_event]))
+            return
+
+        key = wallet_address.lower()
+        digest = self._digests.get(key)
+        if digest:
+            digest.events.append(tx_event)
+            logger.info(f"Added transaction {tx_event.hash} to digest of {wallet_address} ({len(digest.events)} so far)")
+            return
+
+        # First transaction opens the window, everything until it closes goes into one proposal
+        self._digests[key] = TransactionDigest(wallet_address, [tx_event])
+        task = asyncio.create_task(self._flush_digest(key))
+        self._digest_tasks.add(task)
+        task.add_done_callback(self._digest_tasks.discard)
+
+    async def _flush_digest(self, key: str):
+        await asyncio.sleep(self.digest_window)
+        digest = self._digests.pop(key, None)
+        if digest:
+            await self._deliver_digest(digest)
+
+    async def _take_digest_post(self, digest: TransactionDigest) -> Optional[str]:
+        """Use speculative post of a single transaction, drop those of merged ones"""
+        if len(digest.events) == 1:
+            return await self._take_speculative_post(digest.events[0])
+        for tx_hash in digest.hashes:
+            speculative = self._speculative_posts.pop(self._tx_key(tx_hash), None)
+            if speculative:
+                speculative[2].cancel()
+        return None
+
+    async def _deliver_digest(self, digest: TransactionDigest):
+        """Send one notification per user and one post proposal per channel for a digest"""
+        wallet_address = digest.wallet_address
+        # Single transactions keep their own format
+        tx_event = digest.events[0] if len(digest.events) == 1 else digest
         try:
-            # Get channel info for the wallet
-            channel_username, user_id = self.get_channel_for_wallet(wallet_address)
-            if not user_id:
+            # Get every channel the wallet is linked to
+            channels = await self.storage.get_channels_for_wallet(wallet_address)
+            if not channels:
                 logger.warning(f"No user found for wallet {wallet_address}")
                 return
 
-            logger.info(f"Processing transaction for wallet {wallet_address}")
+            logger.info(f"Processing {len(digest.events)} transaction(s) for wallet {wallet_address}")
+            # A speculative post was generated for the wallet's first channel
+            speculative_post = await self._take_digest_post(digest)
 
-            # Store transaction event in state
-            state = FSMContext(
-                storage=self.fsm_storage,
-                key=f'user_{user_id}'
-            )
-            await state.set_data({'current_tx_event': tx_event})
+            notified_users = set()
+            for channel_username, user_id in channels:
+                if user_id not in notified_users:
+                    notified_users.add(user_id)
 
-            # Send transaction notification
-            tx_message = (
-                f"🔔 New transaction detected!\n\n"
-                f"{tx_event.format_brief()}"
-            )
-            await self.bot.send_message(
-                chat_id=user_id,
-                text=tx_message
-            )
-            logger.info(f"Transaction notification sent to user {user_id}")
+                    # Send transaction notification
+                    if tx_event is digest:
+                        tx_message = f"🔔 {len(digest.events)} new transactions detected!\n\n{digest.format_brief()}"
+                    else:
+                        tx_message = f"🔔 New transaction detected!\n\n{tx_event.format_brief()}"
+                    await self.outbound_queue.send_message(
+                        chat_id=user_id,
+                        text=tx_message
+                    )
+                    logger.info(f"Transaction notification sent to user {user_id}")
 
-            # Generate and send post proposal
-            if channel_username:
+                # Generate and send post proposal
                 try:
-                    post_proposal = await self.generate_post_proposal(tx_event, channel_username)
-                    await self.bot.send_message(
+                    post_proposal, speculative_post = speculative_post, None
+                    if not post_proposal:
+                        post_proposal = await self.generate_post_proposal(tx_event, channel_username)
+                    proposal_id = await self.proposal_store.put(channel_username, tx_event)
+                    await self.outbound_queue.send_message(
                         chat_id=user_id,
                         text=(
                             f"📝 Suggested post for @{channel_username}:\n\n"
                             f"{post_proposal}"
                         ),
-                        reply_markup=self._create_post_keyboard(channel_username)
+                        reply_markup=self._create_post_keyboard(channel_username, proposal_id)
                     )
-                    logger.info(f"Post proposal sent to user {user_id}")
+                    logger.info(f"Post proposal {proposal_id} sent to user {user_id}")
+                    await self.prefetch_proposal_candidates(proposal_id, tx_event, channel_username)
                 except Exception as e:
                     logger.error(f"Error generating/sending post proposal: {e}", exc_info=True)
 
@@ -188,9 +406,84 @@ Generate a single post that explains the transaction and reasoning:"""
         except Exception as e:
             logger.error(f"Error in sync callback: {e}", exc_info=True)
 
+    async def handle_pending_transaction(self, pending: PendingTransaction, wallet_address: str):
+        """Handle pending transaction: notify early, start post generation, reconcile on drop"""
+        try:
+            # Get every channel the wallet is linked to, each user is notified once
+            channels = await self.storage.get_channels_for_wallet(wallet_address)
+            if not channels:
+                return
+            user_ids = list(dict.fromkeys(user_id for _, user_id in channels))
+
+            key = self._tx_key(pending.hash)
+
+            if pending.status == 'PENDING':
+                # Forget speculative posts whose transactions never reached handle_transaction
+                now = time.time()
+                for stale_key, (_, started_at, task) in list(self._speculative_posts.items()):
+                    if task.done() and now - started_at > 900:
+                        del self._speculative_posts[stale_key]
+
+                # Speculate for the first channel only, _deliver_digest uses the post there
+                details = self._describe_pending(pending)
+                if details:
+                    task = asyncio.create_task(self.generate_pending_post_proposal(pending, channels[0][0]))
+                    self._speculative_posts[key] = (details, now, task)
+
+                for user_id in user_ids:
+                    await self.outbound_queue.send_message(
+                        chat_id=user_id,
+                        text=f"⏳ Pending transaction detected!\n\n{pending.format_brief()}"
+                    )
+                    logger.info(f"Pending transaction notification sent to user {user_id}")
+
+            elif pending.status == 'DROPPED':
+                speculative = self._speculative_posts.pop(key, None)
+                if speculative:
+                    speculative[2].cancel()
+                for user_id in user_ids:
+                    await self.outbound_queue.send_message(
+                        chat_id=user_id,
+                        text=f"❌ Pending transaction was dropped or replaced:\n{pending.hash}"
+                    )
+
+        except Exception as e:
+            logger.error(f"Error handling pending transaction: {e}", exc_info=True)
+
+    def _sync_pending_callback(self, pending: PendingTransaction, wallet_address: str):
+        """Schedule pending transaction handling without blocking the watcher thread"""
+        try:
+            asyncio.run_coroutine_threadsafe(
+                self.handle_pending_transaction(pending, wallet_address),
+                self._loop
+            )
+        except Exception as e:
+            logger.error(f"Error in pending callback: {e}", exc_info=True)
+
+    async def unsubscribe_wallet(self, wallet_address: str) -> bool:
+        """Stop monitoring a wallet once no channel links it anymore, return whether it was stopped"""
+        try:
+            if await self.storage.get_channels_for_wallet(wallet_address):
+                # Another channel (or user) still follows the wallet
+                return False
+
+            unsubscribe_from_pending(wallet_address)
+            if unsubscribe_from_wallet(wallet_address):
+                logger.info(f"Stopped monitoring wallet {wallet_address}")
+                return True
+            return False
+        except Exception as e:
+            logger.error(f"Error unsubscribing from wallet: {e}")
+            return False
+
     def subscribe_wallet(self, wallet_address: str) -> bool:
         """Subscribe to wallet updates"""
         try:
+            if monitor_service.is_subscribed(wallet_address):
+                # One subscription serves every channel linked to the wallet
+                logger.info(f"Wallet {wallet_address} is already monitored")
+                return True
+
             logger.info(f"Subscribing to wallet {wallet_address}")
             success = subscribe_to_wallet(
                 wallet_address=wallet_address,
@@ -198,6 +491,11 @@ Generate a single post that explains the transaction and reasoning:"""
             )
             if success:
                 logger.info(f"Successfully subscribed to wallet {wallet_address}")
+                if subscribe_to_pending(
+                    wallet_address=wallet_address,
+                    callback=lambda pending: self._sync_pending_callback(pending, wallet_address)
+                ):
+                    logger.info(f"Watching pending transactions of wallet {wallet_address}")
             else:
                 logger.warning(f"Failed to subscribe to wallet {wallet_address}")
             return success
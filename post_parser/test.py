@@ -0,0 +1,31 @@
+import asyncio
+import time
+from post_parser.services.rate_limiter import TokenBucket
+
+# Checks of the services that need no Telegram connection
+# Run from the repository root: python -m post_parser.test
+
+async def test_fractional_rate():
+    """A bucket slower than one token per second still hands out tokens"""
+    bucket = TokenBucket(0.5, capacity=0.5)
+    started = time.monotonic()
+    await asyncio.wait_for(bucket.acquire(), timeout=1)  # The first token is available at once
+    await asyncio.wait_for(bucket.acquire(), timeout=3)  # The next one after 1 / rate seconds
+    elapsed = time.monotonic() - started
+    assert 1.8 <= elapsed <= 2.5, f"expected about 2s for two tokens, took {elapsed:.2f}s"
+    print(f"Fractional rate: 2 tokens at 0.5/s in {elapsed:.2f}s")
+
+async def test_burst():
+    """Up to capacity tokens are available at once, then the rate applies"""
+    bucket = TokenBucket(10, capacity=5)
+    assert all(bucket.try_acquire() for _ in range(5))
+    assert not bucket.try_acquire()
+    print("Burst: 5 tokens at once, the 6th waits")
+
+async def main():
+    await test_fractional_rate()
+    await test_burst()
+    print("All checks passed")
+
+if __name__ == "__main__":
+    asyncio.run(main())
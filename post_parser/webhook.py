@@ -0,0 +1,131 @@
+import asyncio
+import hmac
+import logging
+import time
+from typing import List, Optional, Set
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+class WebhookServer:
+    """Receives Telegram updates over HTTP and feeds them to the dispatcher
+
+    Updates are acknowledged right away and handled in background tasks, at
+    most `max_concurrent_updates` at a time. When `max_pending_updates` are
+    in flight, new requests get 503 so Telegram retries them later. On stop
+    the server refuses new updates and waits up to `drain_timeout` seconds for
+    the ones already accepted.
+    """
+
+    def __init__(
+        self,
+        dp: Dispatcher,
+        bot: Bot,
+        secret_token: str = "",
+        path: str = "/webhook",
+        max_concurrent_updates: int = 64,
+        max_pending_updates: int = 1000,
+        drain_timeout: float = 30
+    ):
+        self.dp = dp
+        self.bot = bot
+        self.secret_token = secret_token
+        self.path = path
+        self.max_pending_updates = max_pending_updates
+        self.drain_timeout = drain_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrent_updates)
+        self._tasks: Set[asyncio.Task] = set()
+        self._draining = False
+        self._runner: Optional[web.AppRunner] = None
+        self.stats = {"received": 0, "rejected": 0, "handled": 0, "failed": 0, "total_latency": 0.0, "max_latency": 0.0}
+
+    def create_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self.path, self.handle)
+        return app
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Verify and accept one update"""
+        if self.secret_token and not hmac.compare_digest(
+            request.headers.get(SECRET_HEADER, ""), self.secret_token
+        ):
+            return web.Response(status=401)
+
+        if self._draining or len(self._tasks) >= self.max_pending_updates:
+            self.stats["rejected"] += 1
+            return web.Response(status=503)
+
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": self.bot})
+        except Exception as e:
+            logger.warning(f"Invalid webhook update: {e}")
+            return web.Response(status=400)
+
+        self.stats["received"] += 1
+        task = asyncio.create_task(self._process(update, time.monotonic()))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.Response()
+
+    async def _process(self, update: Update, received_at: float) -> None:
+        async with self._semaphore:
+            try:
+                await self.dp.feed_update(self.bot, update)
+                self.stats["handled"] += 1
+            except Exception as e:
+                self.stats["failed"] += 1
+                logger.error(f"Error handling update {update.update_id}: {e}", exc_info=True)
+            finally:
+                latency = time.monotonic() - received_at
+                self.stats["total_latency"] += latency
+                self.stats["max_latency"] = max(self.stats["max_latency"], latency)
+
+    async def start(self, host: str, port: int) -> None:
+        """Start listening"""
+        self._runner = web.AppRunner(self.create_app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logger.info(f"Webhook server listening on {host}:{port}{self.path}")
+
+    async def stop(self) -> None:
+        """Refuse new updates, wait for accepted ones and shut the server down"""
+        self._draining = True
+        if self._tasks:
+            logger.info(f"Draining {len(self._tasks)} webhook updates...")
+            _, pending = await asyncio.wait(set(self._tasks), timeout=self.drain_timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                logger.warning(f"Cancelled {len(pending)} updates still running after {self.drain_timeout}s")
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+
+async def run_webhook(dp: Dispatcher, bot: Bot, webhook_config: dict, allowed_updates: List[str]) -> None:
+    """Register the webhook with Telegram and serve updates until cancelled"""
+    server = WebhookServer(
+        dp,
+        bot,
+        secret_token=webhook_config["secret_token"],
+        path=webhook_config["path"],
+        max_concurrent_updates=webhook_config["max_concurrent_updates"],
+        max_pending_updates=webhook_config["max_pending_updates"],
+        drain_timeout=webhook_config["drain_timeout"]
+    )
+    await server.start(webhook_config["host"], webhook_config["port"])
+    await bot.set_webhook(
+        url=webhook_config["url"].rstrip('/') + webhook_config["path"],
+        secret_token=webhook_config["secret_token"] or None,
+        allowed_updates=allowed_updates,
+        max_connections=webhook_config["max_connections"]
+    )
+    logger.info("Webhook registered with Telegram")
+
+    try:
+        await asyncio.Event().wait()  # Serve until the task is cancelled
+    finally:
+        await server.stop()
@@ -0,0 +1,73 @@
+import asyncio
+from typing import List, Optional, Tuple
+from .models import Channel, Wallet, Personality
+from .storage import Storage
+
+"""
+Async interface to Storage for code running on the event loop.
+
+In-memory operations only hold the storage lock for a few dictionary updates,
+so they run inline on the loop. Anything touching the backend (flush, compact,
+close) or copying every channel (snapshot_channels) is moved to a worker
+thread so it never blocks the loop.
+"""
+
+class AsyncStorage:
+    """Async-first facade over Storage sharing its data and consistency guarantees"""
+
+    def __init__(self, storage: Storage):
+        self.storage = storage
+
+    def batch(self):
+        """Apply several mutations atomically (use without awaiting inside the block)"""
+        return self.storage.batch()
+
+    async def get_channel(self, username: str) -> Optional[Channel]:
+        """Get channel by username"""
+        return self.storage.get_channel(username)
+
+    async def get_user_channels(self, user_id: int) -> List[Channel]:
+        """Get all channels for a user"""
+        return self.storage.get_user_channels(user_id)
+
+    async def get_channels_for_wallet(self, wallet_address: str) -> List[Tuple[str, int]]:
+        """Get (channel_username, user_id) pairs linked to a wallet address"""
+        return self.storage.get_channels_for_wallet(wallet_address)
+
+    async def get_channel_wallets(self, username: str) -> List[Wallet]:
+        """Get all wallets for a channel"""
+        return self.storage.get_channel_wallets(username)
+
+    async def snapshot_channels(self) -> List[Channel]:
+        """Get copies of all channels that are not affected by later updates"""
+        return await asyncio.to_thread(self.storage.snapshot_channels)
+
+    async def add_channel(self, user_id: int, username: str, title: Optional[str] = None) -> Channel:
+        """Add channel to storage and link it to user"""
+        return self.storage.add_channel(user_id, username, title)
+
+    async def add_wallet(self, channel_username: str, wallet_address: str, chain: str = "Base",
+                         user_id: Optional[int] = None) -> Optional[Wallet]:
+        """Add wallet to channel, its notifications go to user_id (the channel's owner by default)"""
+        return self.storage.add_wallet(channel_username, wallet_address, chain, user_id)
+
+    async def remove_wallet(self, channel_username: str, wallet_address: str, user_id: Optional[int] = None) -> bool:
+        """Remove wallet from channel, only the one user_id added when given"""
+        return self.storage.remove_wallet(channel_username, wallet_address, user_id)
+
+    async def update_channel_personality(self, username: str, personality: Personality) -> bool:
+        """Update channel's personality analysis"""
+        return self.storage.update_channel_personality(username, personality)
+
+    async def set_channel_entity(self, username: str, channel_id: int, access_hash: Optional[int],
+                                 title: Optional[str] = None) -> bool:
+        """Store resolved Telegram id and access hash of a channel"""
+        return self.storage.set_channel_entity(username, channel_id, access_hash, title)
+
+    async def flush(self) -> None:
+        """Write all pending changes to the backend"""
+        await asyncio.to_thread(self.storage.flush)
+
+    async def close(self) -> None:
+        """Flush remaining changes and close the backend"""
+        await asyncio.to_thread(self.storage.close)
@@ -0,0 +1,375 @@
+import json
+import os
+import mmap
+import queue
+import struct
+import zlib
+import marshal
+import sqlite3
+import logging
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+"""
+Persistence backends for Storage.
+
+Storage keeps every channel in memory and hands dirty records to a backend in
+batches. A backend only has to load everything once at startup and apply
+batches of write operations:
+
+    ("channel", username, record)   - upsert channel record (see channel_to_dict)
+    ("link", user_id, username)     - link channel to user
+"""
+
+logger = logging.getLogger(__name__)
+
+class StorageBackend:
+    """Backend that persists nothing, used for the plain in-memory mode"""
+
+    def load(self) -> Tuple[Dict[str, dict], Dict[int, List[str]]]:
+        """Load all channel records and user -> channel links"""
+        return {}, {}
+
+    def write_batch(self, ops: List[tuple]) -> None:
+        """Apply a batch of write operations"""
+        pass
+
+    def needs_compaction(self) -> bool:
+        """Whether the backend wants a full snapshot via compact()"""
+        return False
+
+    def compact(self, channels: Dict[str, dict], user_channels: Dict[int, List[str]]) -> None:
+        """Replace accumulated history with a snapshot of the full state"""
+        pass
+
+    def close(self) -> None:
+        """Release backend resources"""
+        pass
+
+class LogBackend(StorageBackend):
+    """Append-only operation log with periodic compacted snapshots
+
+    Every batch is appended to wal.log as a length-prefixed, checksummed JSON
+    frame and fsynced. Once the log grows past compact_threshold bytes, Storage
+    hands over its full state, which is written to snapshot.bin as JSON and a
+    fresh log is started. Recovery reads the snapshot and replays the log tail,
+    stopping at the first torn or corrupt frame.
+
+    Both files start with a header of magic bytes, format version and
+    generation number. A log is only replayed on top of the snapshot of the
+    same generation, so a crash between writing a new snapshot and starting
+    its log never replays stale operations. Files of older releases (marshal,
+    no magic bytes) are read once and rewritten in the current format; that
+    has to happen on the Python version that wrote them.
+    """
+
+    FORMAT_VERSION = 1  # 1: JSON payloads, older files without a header used marshal
+    SNAPSHOT_MAGIC = b"ISNP"
+    LOG_MAGIC = b"IWAL"
+    FILE_HEADER = struct.Struct("<4sHQ")  # magic, format version, generation
+    FRAME_HEADER = struct.Struct("<II")  # payload length, crc32
+    LEGACY_LOG_HEADER = struct.Struct("<Q")  # generation
+
+    def __init__(self, directory: str, compact_threshold: int = 16 * 1024 * 1024, fsync: bool = True):
+        os.makedirs(directory, exist_ok=True)
+        self.snapshot_path = os.path.join(directory, "snapshot.bin")
+        self.log_path = os.path.join(directory, "wal.log")
+        self.compact_threshold = compact_threshold
+        self.fsync = fsync
+        self.generation = 0
+        self._log = None
+        self._legacy = False  # Files in the marshal format were found, rewrite them on load
+        logger.info(f"Initialized log storage backend at {directory}")
+
+    def _sync(self, f) -> None:
+        f.flush()
+        if self.fsync:
+            os.fsync(f.fileno())
+
+    def _write_atomic(self, path: str, data: bytes) -> None:
+        """Write file contents so readers see either the old or the new version"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+            self._sync(f)
+        os.replace(tmp_path, path)
+
+    def _open_log(self, generation: int) -> None:
+        """Start an empty log for the given snapshot generation"""
+        if self._log:
+            self._log.close()
+        self._write_atomic(self.log_path, self.FILE_HEADER.pack(self.LOG_MAGIC, self.FORMAT_VERSION, generation))
+        self._log = open(self.log_path, "ab")
+        self.generation = generation
+
+    def _read_header(self, data, magic: bytes) -> Optional[Tuple[int, int]]:
+        """Get (format version, generation) of a file, None for the headerless legacy format"""
+        if len(data) < self.FILE_HEADER.size or data[:len(magic)] != magic:
+            return None
+        _, version, generation = self.FILE_HEADER.unpack_from(data)
+        if version > self.FORMAT_VERSION:
+            raise ValueError(f"Storage file format {version} is newer than supported {self.FORMAT_VERSION}")
+        return version, generation
+
+    def _read_snapshot(self) -> Tuple[Dict[str, dict], Dict[int, List[str]]]:
+        if not os.path.exists(self.snapshot_path) or os.path.getsize(self.snapshot_path) == 0:
+            return {}, {}
+
+        with open(self.snapshot_path, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                header = self._read_header(data, self.SNAPSHOT_MAGIC)
+                if header is None:
+                    snapshot = marshal.loads(data)
+                    self._legacy = True
+                else:
+                    snapshot = json.loads(data[self.FILE_HEADER.size:])
+                    snapshot["generation"] = header[1]
+
+        self.generation = snapshot["generation"]
+        # JSON object keys are strings
+        user_channels = {int(user_id): usernames for user_id, usernames in snapshot["user_channels"].items()}
+        return snapshot["channels"], user_channels
+
+    def _replay_log(self, channels: Dict[str, dict], user_channels: Dict[int, List[str]]) -> int:
+        """Apply log frames of the current generation, return number of replayed batches"""
+        if not os.path.exists(self.log_path):
+            return 0
+
+        with open(self.log_path, "rb") as f:
+            data = f.read()
+
+        header = self._read_header(data, self.LOG_MAGIC)
+        if header is not None:
+            generation, offset, decode = header[1], self.FILE_HEADER.size, json.loads
+        elif len(data) >= self.LEGACY_LOG_HEADER.size:
+            generation, offset, decode = self.LEGACY_LOG_HEADER.unpack_from(data)[0], self.LEGACY_LOG_HEADER.size, marshal.loads
+            self._legacy = True
+        else:
+            return 0
+        if generation != self.generation:
+            return 0
+
+        batches = 0
+        while offset + self.FRAME_HEADER.size <= len(data):
+            length, checksum = self.FRAME_HEADER.unpack_from(data, offset)
+            start = offset + self.FRAME_HEADER.size
+            payload = data[start:start + length]
+            if len(payload) < length or zlib.crc32(payload) != checksum:
+                logger.warning(f"Discarding torn log tail at offset {offset}")
+                break
+
+            for op in decode(payload):
+                self._apply(op, channels, user_channels)
+            offset = start + length
+            batches += 1
+
+        return batches
+
+    @staticmethod
+    def _apply(op: tuple, channels: Dict[str, dict], user_channels: Dict[int, List[str]]) -> None:
+        if op[0] == "channel":
+            channels[op[1]] = op[2]
+        elif op[0] == "link":
+            usernames = user_channels.setdefault(op[1], [])
+            if op[2] not in usernames:
+                usernames.append(op[2])
+
+    def load(self) -> Tuple[Dict[str, dict], Dict[int, List[str]]]:
+        channels, user_channels = self._read_snapshot()
+        batches = self._replay_log(channels, user_channels)
+        logger.info(f"Recovered {len(channels)} channels from snapshot generation {self.generation} and {batches} log batches")
+
+        # Fold the replayed tail into a new generation so the log starts clean
+        if batches or self._legacy:
+            if self._legacy:
+                logger.info(f"Migrating storage files to format version {self.FORMAT_VERSION}")
+            self.compact(channels, user_channels)
+            self._legacy = False
+        else:
+            self._open_log(self.generation)
+        return channels, user_channels
+
+    def write_batch(self, ops: List[tuple]) -> None:
+        payload = json.dumps(ops, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self._log.write(self.FRAME_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+        self._sync(self._log)
+
+    def needs_compaction(self) -> bool:
+        return self._log is not None and self._log.tell() >= self.compact_threshold
+
+    def compact(self, channels: Dict[str, dict], user_channels: Dict[int, List[str]]) -> None:
+        generation = self.generation + 1
+        payload = json.dumps(
+            {"channels": channels, "user_channels": user_channels},
+            ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+        self._write_atomic(
+            self.snapshot_path,
+            self.FILE_HEADER.pack(self.SNAPSHOT_MAGIC, self.FORMAT_VERSION, generation) + payload
+        )
+        self._open_log(generation)
+        logger.info(f"Compacted storage log into snapshot generation {generation} ({len(channels)} channels)")
+
+    def close(self) -> None:
+        if self._log:
+            self._log.close()
+            self._log = None
+
+class SQLiteBackend(StorageBackend):
+    """SQLite backend storing channel records as JSON documents"""
+
+    def __init__(self, path: str, pool_size: int = 4):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        # Connections are handed out to one thread at a time (flusher, to_thread flushes)
+        self._pool: queue.Queue = queue.Queue()
+        for _ in range(max(1, pool_size)):
+            connection = sqlite3.connect(path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._pool.put(connection)
+
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS channels (username TEXT PRIMARY KEY, data TEXT NOT NULL)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS user_channels ("
+                "user_id INTEGER NOT NULL, username TEXT NOT NULL, position INTEGER NOT NULL, "
+                "PRIMARY KEY (user_id, username))"
+            )
+            connection.commit()
+        logger.info(f"Initialized SQLite storage backend at {path} with {pool_size} connections")
+
+    @contextmanager
+    def _connection(self):
+        """Borrow a connection from the pool"""
+        connection = self._pool.get()
+        try:
+            yield connection
+        finally:
+            self._pool.put(connection)
+
+    def load(self) -> Tuple[Dict[str, dict], Dict[int, List[str]]]:
+        with self._connection() as connection:
+            channels = {
+                username: json.loads(data)
+                for username, data in connection.execute("SELECT username, data FROM channels")
+            }
+
+            user_channels: Dict[int, List[str]] = {}
+            for user_id, username in connection.execute(
+                "SELECT user_id, username FROM user_channels ORDER BY user_id, position"
+            ):
+                user_channels.setdefault(user_id, []).append(username)
+
+        return channels, user_channels
+
+    def write_batch(self, ops: List[tuple]) -> None:
+        channel_rows = [
+            (op[1], json.dumps(op[2], ensure_ascii=False))
+            for op in ops if op[0] == "channel"
+        ]
+        link_rows = [(op[1], op[2]) for op in ops if op[0] == "link"]
+
+        with self._connection() as connection, connection:
+            connection.executemany(
+                "INSERT INTO channels (username, data) VALUES (?, ?) "
+                "ON CONFLICT(username) DO UPDATE SET data = excluded.data",
+                channel_rows
+            )
+            connection.executemany(
+                "INSERT OR IGNORE INTO user_channels (user_id, username, position) "
+                "VALUES (?1, ?2, (SELECT COUNT(*) FROM user_channels WHERE user_id = ?1))",
+                link_rows
+            )
+
+    def close(self) -> None:
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+class MongoBackend(StorageBackend):
+    """MongoDB backend, one document per channel and per user link"""
+
+    def __init__(self, uri: str, database: str, pool_size: int = 4):
+        from pymongo import MongoClient
+
+        self.client = MongoClient(uri, maxPoolSize=pool_size)
+        self.db = self.client[database]
+        self.db.user_channels.create_index([("user_id", 1), ("position", 1)])
+        logger.info(f"Initialized MongoDB storage backend at {uri}/{database}")
+
+    def load(self) -> Tuple[Dict[str, dict], Dict[int, List[str]]]:
+        channels = {}
+        for document in self.db.channels.find():
+            document.pop("_id")
+            channels[document["username"]] = document
+
+        user_channels: Dict[int, List[str]] = {}
+        for link in self.db.user_channels.find().sort([("user_id", 1), ("position", 1)]):
+            user_channels.setdefault(link["user_id"], []).append(link["username"])
+
+        return channels, user_channels
+
+    def write_batch(self, ops: List[tuple]) -> None:
+        from pymongo import ReplaceOne, UpdateOne
+
+        channel_ops = [
+            ReplaceOne({"_id": op[1]}, {"_id": op[1], **op[2]}, upsert=True)
+            for op in ops if op[0] == "channel"
+        ]
+        link_ops = []
+        positions: Dict[int, int] = {}
+        for op in ops:
+            if op[0] != "link":
+                continue
+            user_id, username = op[1], op[2]
+            if user_id not in positions:
+                positions[user_id] = self.db.user_channels.count_documents({"user_id": user_id})
+            link_ops.append(UpdateOne(
+                {"_id": f"{user_id}:{username}"},
+                {"$setOnInsert": {"user_id": user_id, "username": username, "position": positions[user_id]}},
+                upsert=True
+            ))
+            positions[user_id] += 1
+
+        if channel_ops:
+            self.db.channels.bulk_write(channel_ops, ordered=False)
+        if link_ops:
+            self.db.user_channels.bulk_write(link_ops, ordered=True)
+
+    def close(self) -> None:
+        self.client.close()
+
+def create_backend(storage_config: Optional[dict], base_dir: Optional[str] = None) -> StorageBackend:
+    """Create storage backend from the 'storage' config section, relative paths are resolved against base_dir"""
+    storage_config = storage_config or {}
+    backend = storage_config.get("backend", "memory")
+
+    def resolve(path: str) -> str:
+        return os.path.join(base_dir, path) if base_dir else path
+
+    if backend == "sqlite":
+        return SQLiteBackend(
+            resolve(storage_config.get("path", "data/storage.db")),
+            pool_size=storage_config.get("pool_size", 4)
+        )
+    if backend == "mongo":
+        return MongoBackend(
+            storage_config.get("mongo_uri", "mongodb://localhost:27017"),
+            storage_config.get("mongo_database", "influencer_ai"),
+            pool_size=storage_config.get("pool_size", 4)
+        )
+    if backend == "log":
+        return LogBackend(
+            resolve(storage_config.get("path", "data/storage")),
+            compact_threshold=storage_config.get("compact_threshold", 16 * 1024 * 1024),
+            fsync=storage_config.get("fsync", True)
+        )
+    if backend == "memory":
+        return StorageBackend()
+
+    raise ValueError(f"Unknown storage backend: {backend}")
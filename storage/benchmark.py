@@ -0,0 +1,78 @@
+import os
+import random
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from storage.storage import Storage
+from storage.backends import LogBackend, SQLiteBackend, StorageBackend
+
+# Benchmark configuration
+CHANNELS = 1_000_000  # One wallet each, override with the first argument
+CHANNELS_PER_USER = 10
+LOOKUPS = 100_000
+
+def address(number: int) -> str:
+    return f"0x{number:040x}"
+
+def percentile(values: list, share: float) -> float:
+    return sorted(values)[int(len(values) * share) - 1] * 1e6 if values else 0.0
+
+def populate(storage: Storage, count: int) -> None:
+    for i in range(count):
+        username = f"channel{i}"
+        storage.add_channel(i // CHANNELS_PER_USER, username)
+        storage.add_wallet(username, address(i))
+
+def measure_lookups(storage: Storage, count: int) -> None:
+    rng = random.Random(0)
+    numbers = [rng.randrange(count) for _ in range(LOOKUPS)]
+    latencies = []
+    for number in numbers:
+        started = time.perf_counter()
+        channels = storage.get_channels_for_wallet(address(number))
+        latencies.append(time.perf_counter() - started)
+        assert channels == [(f"channel{number}", number // CHANNELS_PER_USER)]
+    print(
+        f"  Wallet lookups: mean {statistics.mean(latencies) * 1e6:.1f} µs, "
+        f"p99 {percentile(latencies, 0.99):.1f} µs"
+    )
+
+def run(name: str, create_backend, count: int, persistent: bool = True) -> None:
+    print(f"{name}:")
+    started = time.monotonic()
+    storage = Storage(create_backend(), flush_interval=1.0, batch_size=500)
+    populate(storage, count)
+    populated = time.monotonic() - started
+    storage.flush()
+    print(f"  {count:,} channels and wallets added in {populated:.1f}s, flushed after {time.monotonic() - started:.1f}s")
+
+    measure_lookups(storage, count)
+    storage.close()
+    if not persistent:
+        return
+
+    started = time.monotonic()
+    storage = Storage(create_backend())
+    print(f"  Restart: loaded {len(storage.channels):,} channels in {time.monotonic() - started:.1f}s")
+    assert len(storage.channels) == count
+    storage.close()
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else CHANNELS
+    directory = tempfile.mkdtemp()
+    try:
+        run("Memory", StorageBackend, count, persistent=False)
+        run("SQLite", lambda: SQLiteBackend(os.path.join(directory, "storage.db")), count)
+        run("Log", lambda: LogBackend(os.path.join(directory, "storage"), fsync=False), count)
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    # ru_maxrss is in kilobytes on Linux
+    print(f"Peak memory: {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:,.0f} MB")
+
+if __name__ == "__main__":
+    # Run from the repository root: python -m storage.benchmark [channels]
+    main()
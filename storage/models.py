@@ -7,6 +7,7 @@ class Wallet:
     address: str
     chain: str
     added_at: datetime
+    user_id: Optional[int] = None  # User who added the wallet and gets its notifications, None means the channel's owner
 
 @dataclass
 class Personality:
@@ -26,4 +27,81 @@ class Channel:
     added_at: datetime
     wallets: List[Wallet]
     personality: Optional[Personality]
-    user_id: int
\ No newline at end of file
+    user_id: int
+    channel_id: Optional[int] = None  # Resolved Telegram id, saves username lookups
+    access_hash: Optional[int] = None
+    resolved_at: Optional[float] = None  # Unix time channel_id was resolved, None for records from before it was kept
+
+def _datetime_to_str(value) -> Optional[str]:
+    """Serialize datetime (or already serialized string) to ISO format"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _datetime_from_str(value) -> Optional[datetime]:
+    """Deserialize ISO format string to datetime"""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+def channel_to_dict(channel: Channel) -> dict:
+    """Convert channel with its wallets and personality to a JSON-serializable dict"""
+    personality = None
+    if channel.personality:
+        personality = {
+            "name": channel.personality.name,
+            "traits": channel.personality.traits,
+            "interests": channel.personality.interests,
+            "communication_style": channel.personality.communication_style,
+            "created_at": _datetime_to_str(channel.personality.created_at),
+            "updated_at": _datetime_to_str(channel.personality.updated_at),
+            "post_count": channel.personality.post_count,
+            "raw_analysis": channel.personality.raw_analysis
+        }
+
+    return {
+        "username": channel.username,
+        "title": channel.title,
+        "added_at": _datetime_to_str(channel.added_at),
+        "wallets": [
+            {
+                "address": wallet.address,
+                "chain": wallet.chain,
+                "added_at": _datetime_to_str(wallet.added_at),
+                "user_id": wallet.user_id
+            }
+            for wallet in channel.wallets or []
+        ],
+        "personality": personality,
+        "user_id": channel.user_id,
+        "channel_id": channel.channel_id,
+        "access_hash": channel.access_hash,
+        "resolved_at": channel.resolved_at
+    }
+
+def channel_from_dict(data: dict) -> Channel:
+    """Create channel from dict produced by channel_to_dict"""
+    personality = None
+    if data.get("personality"):
+        # Timestamps are kept as produced by the analyzer (ISO strings)
+        personality = Personality(**data["personality"])
+
+    return Channel(
+        username=data["username"],
+        title=data.get("title"),
+        added_at=_datetime_from_str(data["added_at"]),
+        wallets=[
+            Wallet(
+                address=wallet["address"],
+                chain=wallet["chain"],
+                added_at=_datetime_from_str(wallet["added_at"]),
+                user_id=wallet.get("user_id")
+            )
+            for wallet in data.get("wallets", [])
+        ],
+        personality=personality,
+        user_id=data["user_id"],
+        channel_id=data.get("channel_id"),
+        access_hash=data.get("access_hash"),
+        resolved_at=data.get("resolved_at")
+    )
@@ -1,6 +1,11 @@
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set, Tuple
+from contextlib import contextmanager
+from dataclasses import replace
 from datetime import datetime
-from .models import Channel, Wallet, Personality
+import threading
+import time
+from .models import Channel, Wallet, Personality, channel_to_dict, channel_from_dict
+from .backends import StorageBackend, create_backend
 import logging
 
 """
@@ -8,17 +13,127 @@ Canonical storage implementation for the post parser application.
 Handles in-memory storage of channels, wallets, and personalities.
 
 This is the single source of truth for data storage in the application.
+All reads are served from memory; mutations are written behind to the
+configured backend in batches by a background flusher thread.
+
+Consistency: every mutation runs under one lock, so it is atomic and
+immediately visible to later reads from any thread. Lists held by the storage
+(channel.wallets, user channel lists) are never mutated in place but replaced,
+so a list obtained from a read stays a consistent snapshot while writers
+continue. Readers outside the event loop thread should use the snapshot_*
+methods, which return copies detached from further updates.
 """
 
 logger = logging.getLogger(__name__)
 
 class Storage:
     """In-memory storage for channels, wallets, and personalities"""
-    def __init__(self):
+    def __init__(self, backend: Optional[StorageBackend] = None, flush_interval: float = 1.0, batch_size: int = 500):
         self.channels: Dict[str, Channel] = {}  # username -> Channel
+        self._usernames: Dict[str, str] = {}  # lowercased username -> username as stored, Telegram ignores case
         self.user_channels: Dict[int, List[str]] = {}  # user_id -> [channel_usernames]
+        self._wallet_index: Dict[str, Set[Tuple[str, int]]] = {}  # lowercased address -> {(channel_username, user_id)}
+        self._lock = threading.RLock()  # Guards channels, user_channels and the wallet index
+        self.backend = backend or StorageBackend()
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        # Write-behind state: dirty channels are serialized at flush time, so
+        # repeated updates of one channel between flushes are written once
+        self._dirty_channels: Set[str] = set()
+        self._pending_links: List[Tuple[int, str]] = []
+        self._pending_lock = threading.Lock()
+        self._flush_lock = threading.Lock()  # One flush (and compaction) at a time
+        self._flush_event = threading.Event()
+        self._closed = threading.Event()
+
+        self._load()
         self._migrate_channels()
 
+        self._flusher = threading.Thread(target=self._flush_loop, daemon=True)
+        self._flusher.start()
+
+    def _load(self):
+        """Load all records from backend into memory"""
+        records, user_channels = self.backend.load()
+        self.channels = {username: channel_from_dict(record) for username, record in records.items()}
+        self._usernames = {username.lower(): username for username in self.channels}
+        self.user_channels = user_channels
+        for channel in self.channels.values():
+            for wallet in channel.wallets or []:
+                self._index_wallet(wallet, channel)
+        if records:
+            logger.info(f"Loaded {len(self.channels)} channels for {len(self.user_channels)} users from storage backend")
+
+    def _mark_dirty(self, username: str, link_user_id: Optional[int] = None):
+        """Queue channel (and optionally a user link) for the next flush"""
+        with self._pending_lock:
+            self._dirty_channels.add(username)
+            if link_user_id is not None:
+                self._pending_links.append((link_user_id, username))
+            pending = len(self._dirty_channels) + len(self._pending_links)
+        if pending >= self.batch_size:
+            self._flush_event.set()
+
+    def _flush_loop(self):
+        """Flush pending writes every flush_interval or when a batch fills up"""
+        while not self._closed.is_set():
+            self._flush_event.wait(self.flush_interval)
+            self._flush_event.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing storage: {e}", exc_info=True)
+
+    def flush(self):
+        """Write all pending changes to the backend"""
+        with self._flush_lock:
+            with self._pending_lock:
+                dirty = self._dirty_channels
+                links = self._pending_links
+                self._dirty_channels = set()
+                self._pending_links = []
+
+            if not dirty and not links:
+                return
+
+            with self._lock:
+                ops = [
+                    ("channel", username, channel_to_dict(self.channels[username]))
+                    for username in dirty if username in self.channels
+                ]
+            ops.extend(("link", user_id, username) for user_id, username in links)
+
+            try:
+                self.backend.write_batch(ops)
+            except Exception:
+                # Keep the changes queued for the next attempt
+                with self._pending_lock:
+                    self._dirty_channels |= dirty
+                    self._pending_links = links + self._pending_links
+                raise
+
+            logger.debug(f"Flushed {len(ops)} storage operations")
+
+            if self.backend.needs_compaction():
+                self._compact()
+
+    def _compact(self):
+        """Hand the full current state to the backend as a snapshot, called under _flush_lock"""
+        # Only copies are taken under the lock, serializing them happens outside of it
+        with self._lock:
+            channels = self.snapshot_channels()
+            user_channels = {user_id: list(usernames) for user_id, usernames in self.user_channels.items()}
+        self.backend.compact({channel.username: channel_to_dict(channel) for channel in channels}, user_channels)
+
+    def close(self):
+        """Stop the flusher, write remaining changes and close the backend"""
+        self._closed.set()
+        self._flush_event.set()
+        self._flusher.join(timeout=5.0)
+        self.flush()
+        self.backend.close()
+
     def _migrate_channels(self):
         """Migrate existing channels to include user_id"""
         for username, channel in self.channels.items():
@@ -29,100 +144,185 @@ class Storage:
                         channel.user_id = user_id
                         break
 
+    def _channel_username(self, username: str) -> str:
+        """Get username as stored for any spelling of it (with or without @, any case)"""
+        username = username.lstrip('@')
+        return self._usernames.get(username.lower(), username)
+
+    @staticmethod
+    def _normalize_address(wallet_address: str) -> str:
+        """Normalize wallet address for index lookups"""
+        return wallet_address.strip().lower()
+
+    @staticmethod
+    def _index_entry(wallet: Wallet, channel: Channel) -> Tuple[str, int]:
+        """Index entry of a wallet: its channel and the user who added it"""
+        return channel.username, wallet.user_id if wallet.user_id is not None else channel.user_id
+
+    def _index_wallet(self, wallet: Wallet, channel: Channel):
+        """Add wallet -> channel entry to the reverse index"""
+        key = self._normalize_address(wallet.address)
+        self._wallet_index.setdefault(key, set()).add(self._index_entry(wallet, channel))
+
+    def _unindex_wallet(self, wallet: Wallet, channel: Channel):
+        """Remove wallet -> channel entry from the reverse index"""
+        key = self._normalize_address(wallet.address)
+        entries = self._wallet_index.get(key)
+        if entries is None:
+            return
+        entries.discard(self._index_entry(wallet, channel))
+        if not entries:
+            del self._wallet_index[key]
+
+    @contextmanager
+    def batch(self):
+        """Apply several mutations atomically: readers see all of them or none"""
+        with self._lock:
+            yield self
+
     def get_channel(self, username: str) -> Optional[Channel]:
         """Get channel by username"""
-        username = username.lstrip('@')
-        return self.channels.get(username)
+        return self.channels.get(self._channel_username(username))
 
     def get_user_channels(self, user_id: int) -> List[Channel]:
         """Get all channels for a user"""
-        usernames = self.user_channels.get(user_id, [])
-        return [self.channels[username] for username in usernames if username in self.channels]
+        with self._lock:
+            usernames = self.user_channels.get(user_id, [])
+            return [self.channels[username] for username in usernames if username in self.channels]
+
+    def snapshot_channel(self, username: str) -> Optional[Channel]:
+        """Get a copy of channel that is not affected by later updates"""
+        with self._lock:
+            channel = self.get_channel(username)
+            return replace(channel, wallets=list(channel.wallets or [])) if channel else None
+
+    def snapshot_channels(self) -> List[Channel]:
+        """Get copies of all channels that are not affected by later updates"""
+        with self._lock:
+            return [replace(channel, wallets=list(channel.wallets or [])) for channel in self.channels.values()]
 
     def add_channel(self, user_id: int, username: str, title: Optional[str] = None) -> Channel:
         """Add channel to storage and link it to user"""
-        username = username.lstrip('@')
+        with self._lock:
+            username = self._channel_username(username)
+            # Check if channel already exists
+            if username in self.channels:
+                channel = self.channels[username]
+                # Update user_id if not set
+                if not hasattr(channel, 'user_id'):
+                    channel.user_id = user_id
+            else:
+                channel = Channel(
+                    username=username,
+                    title=title,
+                    added_at=datetime.utcnow(),
+                    wallets=[],
+                    personality=None,
+                    user_id=user_id  # Store user_id in channel
+                )
+                self.channels[username] = channel
+                self._usernames[username.lower()] = username
+                self._mark_dirty(username)
 
-        # Check if channel already exists
-        if username in self.channels:
-            channel = self.channels[username]
-            # Update user_id if not set
-            if not hasattr(channel, 'user_id'):
-                channel.user_id = user_id
-        else:
-            channel = Channel(
-                username=username,
-                title=title,
-                added_at=datetime.utcnow(),
-                wallets=[],
-                personality=None,
-                user_id=user_id  # Store user_id in channel
-            )
-            self.channels[username] = channel
-
-        # Link to user if not already linked
-        if user_id not in self.user_channels:
-            self.user_channels[user_id] = []
-        if username not in self.user_channels[user_id]:
-            self.user_channels[user_id].append(username)
-
-        return channel
-
-    def add_wallet(self, channel_username: str, wallet_address: str, chain: str = "Base") -> Optional[Wallet]:
-        """Add wallet to channel and subscribe to updates"""
+            # Link to user if not already linked
+            usernames = self.user_channels.get(user_id, [])
+            if username not in usernames:
+                self.user_channels[user_id] = usernames + [username]
+                self._mark_dirty(username, link_user_id=user_id)
+
+            return channel
+
+    def add_wallet(self, channel_username: str, wallet_address: str, chain: str = "Base",
+                   user_id: Optional[int] = None) -> Optional[Wallet]:
+        """Add wallet to channel, its notifications go to user_id (the channel's owner by default)"""
         try:
-            # Get user_id for the channel
-            channel = self.get_channel(channel_username)
-            if not channel:
-                return None
+            with self._lock:
+                # Get user_id for the channel
+                channel = self.get_channel(channel_username)
+                if not channel:
+                    return None
 
-            # Create wallet record
-            wallet = Wallet(
-                address=wallet_address,
-                chain=chain,
-                added_at=datetime.utcnow()
-            )
+                # Create wallet record
+                wallet = Wallet(
+                    address=wallet_address,
+                    chain=chain,
+                    added_at=datetime.utcnow(),
+                    user_id=user_id
+                )
 
-            # Add to channel's wallets
-            if not channel.wallets:
-                channel.wallets = []
-            channel.wallets.append(wallet)
+                # Replace rather than append, readers may be iterating the old list
+                channel.wallets = (channel.wallets or []) + [wallet]
+                self._index_wallet(wallet, channel)
+                self._mark_dirty(channel.username)
 
-            return wallet
+                return wallet
 
         except Exception as e:
             logger.error(f"Error adding wallet: {e}")
             return None
 
-    def get_user_id_for_wallet(self, wallet_address: str) -> Optional[int]:
-        """Get user_id associated with a wallet address"""
-        try:
-            logger.info(f"Looking up user_id for wallet {wallet_address}")
-            for channel in self.channels.values():
-                logger.debug(f"Checking channel {channel.username}")
-                if channel.wallets:
-                    for wallet in channel.wallets:
-                        logger.debug(f"Checking wallet {wallet.address}")
-                        if wallet.address.lower() == wallet_address.lower():
-                            logger.info(f"Found user_id {channel.user_id} for wallet {wallet_address}")
-                            return channel.user_id
-            logger.warning(f"No channel found with wallet {wallet_address}")
-            return None
-        except Exception as e:
-            logger.error(f"Error getting user_id for wallet: {e}", exc_info=True)
-            return None
+    def remove_wallet(self, channel_username: str, wallet_address: str, user_id: Optional[int] = None) -> bool:
+        """Remove wallet from channel, only the one user_id added when given"""
+        with self._lock:
+            channel = self.get_channel(channel_username)
+            if not channel or not channel.wallets:
+                return False
+
+            key = self._normalize_address(wallet_address)
+            removed = [
+                wallet for wallet in channel.wallets
+                if self._normalize_address(wallet.address) == key
+                and (user_id is None or self._index_entry(wallet, channel)[1] == user_id)
+            ]
+            if not removed:
+                return False
+
+            channel.wallets = [wallet for wallet in channel.wallets if wallet not in removed]
+            for wallet in removed:
+                self._unindex_wallet(wallet, channel)
+            self._mark_dirty(channel.username)
+            return True
+
+    def get_channels_for_wallet(self, wallet_address: str) -> List[Tuple[str, int]]:
+        """Get (channel_username, user_id) pairs linked to a wallet address"""
+        with self._lock:
+            return sorted(self._wallet_index.get(self._normalize_address(wallet_address), ()))
 
     def update_channel_personality(self, username: str, personality: Personality) -> bool:
         """Update channel's personality analysis"""
-        username = username.lstrip('@')
-        channel = self.channels.get(username)
-        if channel:
-            channel.personality = personality
-            return True
-        return False
+        with self._lock:
+            channel = self.get_channel(username)
+            if channel:
+                channel.personality = personality
+                self._mark_dirty(channel.username)
+                return True
+            return False
 
     def get_channel_wallets(self, username: str) -> List[Wallet]:
         """Get all wallets for a channel"""
-        username = username.lstrip('@')
-        channel = self.channels.get(username)
-        return channel.wallets if channel else []
\ No newline at end of file
+        channel = self.get_channel(username)
+        return channel.wallets if channel else []
+
+    def set_channel_entity(self, username: str, channel_id: int, access_hash: Optional[int],
+                           title: Optional[str] = None) -> bool:
+        """Store resolved Telegram id and access hash of a channel, and when they were resolved"""
+        with self._lock:
+            channel = self.get_channel(username)
+            if not channel:
+                return False
+            channel.channel_id = channel_id
+            channel.access_hash = access_hash
+            channel.resolved_at = time.time()
+            if title:
+                channel.title = title
+            self._mark_dirty(channel.username)
+            return True
+
+def create_storage(storage_config: Optional[dict] = None, base_dir: Optional[str] = None) -> Storage:
+    """Create storage with the backend described by the 'storage' config section"""
+    storage_config = storage_config or {}
+    return Storage(
+        backend=create_backend(storage_config, base_dir),
+        flush_interval=storage_config.get("flush_interval", 1.0),
+        batch_size=storage_config.get("batch_size", 500)
+    )
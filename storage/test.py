@@ -0,0 +1,115 @@
+from storage.storage import Storage
+from storage.backends import SQLiteBackend
+import os
+import random
+import tempfile
+import threading
+import time
+
+# Stress test configuration
+CHANNELS = 50
+WRITERS = 8
+READERS = 8
+DURATION = 5.0  # seconds
+MOVING_WALLETS = 20  # Always linked to exactly one channel, moved between channels atomically
+
+def address(prefix: int, number: int) -> str:
+    return f"0x{prefix:04x}{number:036x}"
+
+def writer(storage: Storage, writer_id: int, stop: threading.Event, counts: dict):
+    """Add and remove own wallets, move the shared ones between channels"""
+    rng = random.Random(writer_id)
+    owned = []
+    operations = 0
+    while not stop.is_set():
+        choice = rng.random()
+        if choice < 0.4 or not owned:
+            wallet_address = address(writer_id + 1, operations)
+            channel = f"channel{rng.randrange(CHANNELS)}"
+            if storage.add_wallet(channel, wallet_address, user_id=100 + writer_id):
+                owned.append((channel, wallet_address))
+        elif choice < 0.7:
+            channel, wallet_address = owned.pop(rng.randrange(len(owned)))
+            assert storage.remove_wallet(channel, wallet_address), f"lost {wallet_address}"
+        else:
+            wallet_address = address(0, rng.randrange(MOVING_WALLETS))
+            with storage.batch():
+                current = storage.get_channels_for_wallet(wallet_address)[0][0]
+                target = f"channel{rng.randrange(CHANNELS)}"
+                if target != current:
+                    storage.remove_wallet(current, wallet_address)
+                    storage.add_wallet(target, wallet_address)
+        operations += 1
+    counts[f"writer{writer_id}"] = operations
+
+def reader(storage: Storage, reader_id: int, stop: threading.Event, counts: dict, errors: list):
+    """Look wallets up while they change, moved wallets must always have exactly one channel"""
+    rng = random.Random(1000 + reader_id)
+    lookups = 0
+    while not stop.is_set():
+        wallet_address = address(0, rng.randrange(MOVING_WALLETS))
+        channels = {username for username, _ in storage.get_channels_for_wallet(wallet_address)}
+        if len(channels) != 1:
+            errors.append(f"{wallet_address} linked to {len(channels)} channels")
+        snapshot = storage.snapshot_channel(f"channel{rng.randrange(CHANNELS)}")
+        addresses = [wallet.address for wallet in snapshot.wallets]
+        if len(addresses) != len(set(addresses)):
+            errors.append(f"duplicate wallets in {snapshot.username}")
+        lookups += 1
+    counts[f"reader{reader_id}"] = lookups
+
+def index_of(storage: Storage) -> dict:
+    """Wallet -> (channel, user who added it) as the records say, to compare with the index"""
+    index = {}
+    for channel in storage.snapshot_channels():
+        for wallet in channel.wallets:
+            user_id = wallet.user_id if wallet.user_id is not None else channel.user_id
+            index.setdefault(wallet.address.lower(), set()).add((channel.username, user_id))
+    return index
+
+def main():
+    path = os.path.join(tempfile.mkdtemp(), "storage.db")
+    storage = Storage(SQLiteBackend(path), flush_interval=0.1, batch_size=100)
+    for i in range(CHANNELS):
+        storage.add_channel(i % 10, f"channel{i}")
+    for i in range(0, CHANNELS, 5):
+        storage.add_channel(100 + i % WRITERS, f"channel{i}")  # Channels a writer's user also linked
+    for i in range(MOVING_WALLETS):
+        storage.add_wallet(f"channel{i % CHANNELS}", address(0, i))
+
+    stop = threading.Event()
+    counts, errors = {}, []
+    threads = [threading.Thread(target=writer, args=(storage, i, stop, counts)) for i in range(WRITERS)]
+    threads += [threading.Thread(target=reader, args=(storage, i, stop, counts, errors)) for i in range(READERS)]
+    print(f"Running {WRITERS} writers and {READERS} readers for {DURATION}s...")
+    for thread in threads:
+        thread.start()
+    time.sleep(DURATION)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    writes = sum(count for name, count in counts.items() if name.startswith("writer"))
+    lookups = sum(count for name, count in counts.items() if name.startswith("reader"))
+    print(f"Writes: {writes / DURATION:,.0f}/s, lookups: {lookups / DURATION:,.0f}/s")
+
+    expected = index_of(storage)
+    index = {key: set(entries) for key, entries in storage._wallet_index.items()}
+    if index != expected:
+        errors.append("wallet index differs from channel records")
+
+    # Everything written behind must come back after a restart
+    storage.close()
+    reloaded = Storage(SQLiteBackend(path))
+    if index_of(reloaded) != expected:
+        errors.append("reloaded storage differs from memory")
+    reloaded.close()
+
+    if errors:
+        print(f"{len(errors)} errors, first: {errors[:5]}")
+    else:
+        print("All checks passed")
+
+if __name__ == "__main__":
+    # Run from the repository root: python -m storage.test
+    main()